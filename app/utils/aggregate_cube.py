@@ -0,0 +1,247 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.context_builder import parameter_columns
+from app.utils.district_index import normalize_name
+from app.utils.helpers import DISTRICT_KEYWORDS, YEAR_KEYWORDS, cache_token, content_fingerprint, dataset_fingerprint, find_column, normalize_names, to_year
+from app.utils.standards import outside_limits
+
+CUBE_DIR = "data/cache"
+QUANTILES = (0.1, 0.5, 0.9)
+MERGEABLE = ("count", "sum", "min", "max", "exceed", "mean")
+
+
+class AggregateCube:
+    """District × year × parameter statistics held as dense NumPy arrays.
+
+    The last district and last year slot hold the "all districts" / "all years"
+    margins, computed from rows rather than merged, so quantiles stay exact for
+    any single (district or all, year or all) lookup.
+    """
+
+    def __init__(self, districts: List[str], years: List[int], parameters: List[str],
+                 arrays: Dict[str, np.ndarray], quantiles=QUANTILES, fingerprint: str = ""):
+        self.districts = list(districts)
+        self.years = [int(year) for year in years]
+        self.parameters = list(parameters)
+        self.arrays = arrays
+        self.quantiles = tuple(quantiles)
+        self.fingerprint = fingerprint
+        self._district_pos = {normalize_name(name): i for i, name in enumerate(self.districts)}
+        self._year_pos = {year: i for i, year in enumerate(self.years)}
+        self._param_pos = {name: i for i, name in enumerate(self.parameters)}
+
+    # -- lookups -------------------------------------------------------------
+    def _d(self, district: Optional[str]) -> Optional[int]:
+        return len(self.districts) if district is None else self._district_pos.get(normalize_name(district))
+
+    def _y(self, year: Optional[int]) -> Optional[int]:
+        return len(self.years) if year is None else self._year_pos.get(int(year))
+
+    def has_district(self, district: str) -> bool:
+        return normalize_name(district) in self._district_pos
+
+    def value(self, stat: str, parameter: str, district: Optional[str] = None, year: Optional[int] = None) -> float:
+        """One statistic for one cell. ``stat`` is count/sum/min/max/exceed/mean or p10/p50/p90."""
+        d, y, p = self._d(district), self._y(year), self._param_pos.get(parameter)
+        if d is None or y is None or p is None:
+            return float("nan")
+        return float(self._stat_array(stat)[d, y, p])
+
+    def rows(self, district: Optional[str] = None, year: Optional[int] = None) -> int:
+        """Number of samples in a cell, whether or not any parameter was measured."""
+        d, y = self._d(district), self._y(year)
+        return 0 if d is None or y is None else int(self.arrays["rows"][d, y])
+
+    def cell(self, district: Optional[str] = None, year: Optional[int] = None) -> pd.DataFrame:
+        """All statistics for every parameter in one (district, year) cell."""
+        d, y = self._d(district), self._y(year)
+        if d is None or y is None:
+            return pd.DataFrame(index=self.parameters)
+        columns = ["count", "mean", "min", "max", "exceed"] + [f"p{int(q * 100)}" for q in self.quantiles]
+        return pd.DataFrame({stat: self._stat_array(stat)[d, y] for stat in columns}, index=self.parameters)
+
+    def yearly(self, stat: str, parameter: str, district: Optional[str] = None) -> pd.Series:
+        """Statistic per year for one parameter, e.g. for trend charts."""
+        d, p = self._d(district), self._param_pos.get(parameter)
+        if d is None or p is None or not self.years:
+            return pd.Series(dtype=float)
+        series = pd.Series(self._stat_array(stat)[d, :len(self.years), p], index=self.years, name=parameter)
+        counts = self.arrays["count"][d, :len(self.years), p]
+        return series[counts > 0]
+
+    def combine(self, stat: str, parameter: str, district: Optional[str], start: Optional[int],
+                end: Optional[int]) -> Optional[float]:
+        """Mergeable statistic (count/sum/min/max/exceed/mean) over a year range; None if not mergeable."""
+        d, p = self._d(district), self._param_pos.get(parameter)
+        if d is None or p is None or stat not in MERGEABLE:
+            return None
+        years = np.asarray(self.years)
+        mask = np.ones(len(years), dtype=bool)
+        if start is not None:
+            mask &= years >= start
+        if end is not None:
+            mask &= years <= end
+        counts = self.arrays["count"][d, :len(years), p][mask]
+        if counts.sum() == 0:
+            return float("nan")
+        if stat == "mean":
+            return float(self.arrays["sum"][d, :len(years), p][mask].sum() / counts.sum())
+        cells = self.arrays[stat][d, :len(years), p][mask][counts > 0]
+        if stat == "min":
+            return float(cells.min())
+        if stat == "max":
+            return float(cells.max())
+        return float(cells.sum())
+
+    def extreme_district(self, stat: str, parameter: str, start: Optional[int] = None,
+                         end: Optional[int] = None) -> Optional[str]:
+        """District holding the overall ``max`` or ``min`` of a parameter in a year range."""
+        p = self._param_pos.get(parameter)
+        if p is None or stat not in ("max", "min") or not self.districts:
+            return None
+        if start is None and end is None:
+            cells = self.arrays[stat][:len(self.districts), -1, p]
+        else:
+            years = np.asarray(self.years)
+            mask = np.ones(len(years), dtype=bool)
+            if start is not None:
+                mask &= years >= start
+            if end is not None:
+                mask &= years <= end
+            if not mask.any():
+                return None
+            reduce = np.fmax.reduce if stat == "max" else np.fmin.reduce
+            cells = reduce(self.arrays[stat][:len(self.districts), :len(years), p][:, mask], axis=1)
+        if np.isnan(cells).all():
+            return None
+        return self.districts[int(np.nanargmax(cells) if stat == "max" else np.nanargmin(cells))]
+
+    def _stat_array(self, stat: str) -> np.ndarray:
+        if stat == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return self.arrays["sum"] / self.arrays["count"]
+        if stat.startswith("p") and stat[1:].isdigit():
+            return self.arrays["quantiles"][self.quantiles.index(int(stat[1:]) / 100)]
+        return self.arrays[stat]
+
+    # -- persistence ---------------------------------------------------------
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = json.dumps({
+            "districts": self.districts, "years": self.years, "parameters": self.parameters,
+            "quantiles": list(self.quantiles), "fingerprint": self.fingerprint,
+        })
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, meta=np.array(meta), **self.arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "AggregateCube":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+        return cls(meta["districts"], meta["years"], meta["parameters"], arrays,
+                   tuple(meta["quantiles"]), meta["fingerprint"])
+
+
+def _place(target: np.ndarray, result: pd.DataFrame, order: pd.Index, d_index: np.ndarray, y_index: np.ndarray) -> None:
+    target[d_index, y_index, :] = result.reindex(order).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def build_cube(df: pd.DataFrame, quantiles=QUANTILES, fingerprint: Optional[str] = None) -> AggregateCube:
+    """One grouped pass per margin over the numeric parameters; rows without a year only reach the all-years slot."""
+    district_col = find_column(df.columns, DISTRICT_KEYWORDS)
+    year_col = find_column(df.columns, YEAR_KEYWORDS)
+    parameters = parameter_columns(df)
+    values = df[parameters].astype(np.float64).reset_index(drop=True)
+
+    if district_col is not None:
+        names = normalize_names(df[district_col])
+        districts = [str(name) for name in names.cat.categories]
+        d_codes = names.cat.codes.to_numpy()
+    else:
+        districts, d_codes = [], np.full(len(df), -1)
+    if year_col is not None:
+        year_values = to_year(df[year_col]).to_numpy()
+        years = sorted(int(year) for year in np.unique(year_values[~np.isnan(year_values)]))
+        y_codes = np.where(np.isnan(year_values), -1, np.searchsorted(years, np.nan_to_num(year_values)))
+    else:
+        years, y_codes = [], np.full(len(df), -1)
+
+    # Exceedance indicators: 1 outside the permissible range, 0 inside, NaN when unmeasured
+    exceed = pd.DataFrame(np.nan, index=values.index, columns=parameters)
+    for col in parameters:
+        outside = outside_limits(values[col], col)
+        if outside is not None:
+            exceed[col] = outside.astype(float).where(values[col].notna())
+
+    D, Y, P = len(districts) + 1, len(years) + 1, len(parameters)
+    arrays = {
+        "rows": np.zeros((D, Y), dtype=np.int64),
+        "count": np.zeros((D, Y, P), dtype=np.int32),
+        "sum": np.zeros((D, Y, P), dtype=np.float64),
+        "min": np.full((D, Y, P), np.nan, dtype=np.float32),
+        "max": np.full((D, Y, P), np.nan, dtype=np.float32),
+        "exceed": np.zeros((D, Y, P), dtype=np.int32),
+        "quantiles": np.full((len(quantiles), D, Y, P), np.nan, dtype=np.float32),
+    }
+
+    all_rows = np.zeros(len(values), dtype=np.int64)
+    groupings = [
+        (d_codes, y_codes, False, False),
+        (d_codes, all_rows, False, True),
+        (all_rows, y_codes, True, False),
+        (all_rows, all_rows, True, True),
+    ]
+    for d_key, y_key, d_all, y_all in groupings:
+        keep = (d_key >= 0) & (y_key >= 0)
+        if not keep.any():
+            continue
+        keys = [d_key[keep], y_key[keep]]
+        grouped = values[keep].groupby(keys, sort=False)
+        sizes = grouped.size()
+        # Margin groupings collapse to the reserved last slot
+        d_index = np.full(len(sizes), D - 1) if d_all else sizes.index.get_level_values(0).to_numpy()
+        y_index = np.full(len(sizes), Y - 1) if y_all else sizes.index.get_level_values(1).to_numpy()
+        arrays["rows"][d_index, y_index] = sizes.to_numpy()
+        if not parameters:
+            continue
+        order = sizes.index
+        _place(arrays["count"], grouped.count(), order, d_index, y_index)
+        _place(arrays["sum"], grouped.sum(), order, d_index, y_index)
+        _place(arrays["min"], grouped.min(), order, d_index, y_index)
+        _place(arrays["max"], grouped.max(), order, d_index, y_index)
+        _place(arrays["exceed"], exceed[keep].groupby(keys, sort=False).sum(), order, d_index, y_index)
+        quantile_frame = grouped.quantile(list(quantiles))
+        for qi, q in enumerate(quantiles):
+            q_result = quantile_frame.xs(q, level=-1).reindex(order)
+            arrays["quantiles"][qi, d_index, y_index, :] = q_result.to_numpy(dtype=np.float32, na_value=np.nan)
+
+    return AggregateCube(districts, years, parameters, arrays, quantiles,
+                         fingerprint or dataset_fingerprint(df))
+
+
+def load_or_build_cube(df: pd.DataFrame, cache_dir: str = CUBE_DIR, version: Optional[str] = None) -> AggregateCube:
+    """Reuse the persisted cube for this dataset version, building it on first use."""
+    # Keyed on the data version when the caller has one, else on a hash of every row:
+    # the sampled dataset_fingerprint misses corrections to rows it does not sample
+    fingerprint = cache_token(version) if version else content_fingerprint(df)
+    path = os.path.join(cache_dir, f"cube-{fingerprint}.npz")
+    if os.path.exists(path):
+        try:
+            return AggregateCube.load(path)
+        except (OSError, ValueError, KeyError):
+            pass
+    cube = build_cube(df, fingerprint=fingerprint)
+    try:
+        cube.save(path)
+    except OSError:
+        # A read-only deployment still gets the in-memory cube
+        pass
+    return cube
@@ -0,0 +1,55 @@
+"""Process-wide dataset resources shared by main.py and single_app.py.
+
+Both apps resolve the same catalogue and hold the same read-only
+``DatasetHandle`` per data version, so they are defined once here.
+"""
+import os
+
+import streamlit as st
+
+from app.utils.dataset_handle import DatasetHandle
+from app.utils.dataset_registry import CATALOG_PATH, load_registry
+from app.utils.shared_dataset import attach, shared_version
+
+
+def shared_dataset_dir():
+    # Directory published by `python -m app.utils.shared_dataset`; when set, every worker maps the same files.
+    # Read per call so a .env loaded after import still applies.
+    return os.getenv("HYDROAI_SHARED_DATASET")
+
+
+def catalog_stamp():
+    return os.path.getmtime(CATALOG_PATH) if os.path.exists(CATALOG_PATH) else None
+
+
+@st.cache_resource(max_entries=2)
+def get_registry(stamp):
+    # State datasets listed in data/catalog.json (the store or single file when there is none);
+    # re-read when the catalog file changes
+    return load_registry()
+
+
+@st.cache_resource(max_entries=2)
+def get_dataset_handle(version):
+    # One read-only frame per process and data version; reruns get the same object instead of a
+    # cache_data copy. A new version token (mtime, size, content digest or publish) loads afresh.
+    if version.startswith("shared-"):
+        frame = attach(shared_dataset_dir(), version[len("shared-"):])
+    else:
+        # Catalog version plus state scope: only the sources and rows of the scoped state are read
+        scope = version.split("|", 1)[1]
+        frame = get_registry(catalog_stamp()).load(states=None if scope == "all" else [scope])
+    return DatasetHandle(frame, version)
+
+
+def current_data_version():
+    shared_dir = shared_dataset_dir()
+    published = shared_version(shared_dir) if shared_dir else None
+    return f"shared-{published}" if published else get_registry(catalog_stamp()).version()
+
+
+def scoped_version(data_version, state):
+    # Catalogued data is loaded one state at a time; a published shared dataset is served whole
+    if data_version.startswith("shared-"):
+        return data_version
+    return f"{data_version}|{'all' if state == 'All States' else state}"
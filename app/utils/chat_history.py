@@ -0,0 +1,287 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing, contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_SQLITE_PATH = "data/chat_history.sqlite"
+DEFAULT_TTL = 30 * 24 * 3600
+# Expired sessions are dropped when the store opens and then at most this often, as sessions start
+PURGE_INTERVAL = 3600
+# Messages rendered on every rerun; older ones are fetched a page at a time on request
+WINDOW = 20
+PAGE = 20
+# Latest messages sent verbatim with follow-up prompts; anything older is summarized
+KEEP_VERBATIM = 4
+# Summarize once this many messages have fallen out of the verbatim window
+SUMMARY_BATCH = 6
+SUMMARY_CHARS = 1200
+MEMORY_CHARS = 2000
+SNIPPET_CHARS = 160
+
+
+class MemoryChatStore:
+    """Per-process message log; each session keeps at most ``max_messages``."""
+
+    def __init__(self, max_messages: int = 1000, ttl: float = DEFAULT_TTL):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._messages: Dict[str, deque] = {}
+        self._summaries: Dict[str, Tuple[str, int]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._purged = time.time()
+
+    def append(self, session: str, role: str, content: str) -> dict:
+        with self._lock:
+            message = {"id": self._next_id, "role": role, "content": content, "created": time.time()}
+            self._next_id += 1
+            self._messages.setdefault(session, deque(maxlen=self.max_messages)).append(message)
+        return message
+
+    def page(self, session: str, limit: int, before: Optional[int] = None) -> List[dict]:
+        messages = self._messages.get(session, ())
+        selected = [m for m in reversed(messages) if before is None or m["id"] < before][:limit]
+        return selected[::-1]
+
+    def between(self, session: str, after: int, upto: int) -> List[dict]:
+        return [m for m in self._messages.get(session, ()) if after < m["id"] <= upto]
+
+    def count(self, session: str) -> int:
+        return len(self._messages.get(session, ()))
+
+    def summary(self, session: str) -> Tuple[str, int]:
+        return self._summaries.get(session, ("", 0))
+
+    def set_summary(self, session: str, text: str, covered: int) -> None:
+        self._summaries[session] = (text, covered)
+
+    def purge_expired(self) -> int:
+        """Drop sessions with no message newer than the TTL."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            stale = [session for session, messages in self._messages.items()
+                     if not messages or messages[-1]["created"] < cutoff]
+            for session in stale:
+                del self._messages[session]
+                self._summaries.pop(session, None)
+            self._purged = time.time()
+        return len(stale)
+
+    def purge_if_due(self, interval: float = PURGE_INTERVAL) -> int:
+        return self.purge_expired() if time.time() - self._purged >= interval else 0
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "sessions": len(self._messages),
+                "messages": sum(len(messages) for messages in self._messages.values())}
+
+
+class SQLiteChatStore:
+    """Message log and summaries on disk, so a session survives reloads and restarts."""
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, session TEXT NOT NULL, role TEXT NOT NULL, "
+                "content TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session, id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "session TEXT PRIMARY KEY, summary TEXT NOT NULL, covered INTEGER NOT NULL, updated REAL NOT NULL)"
+            )
+        self.purge_expired()
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3's own context manager commits but never closes the connection
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    def append(self, session: str, role: str, content: str) -> dict:
+        created = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (session, role, content, created) VALUES (?, ?, ?, ?)",
+                (session, role, content, created),
+            )
+        return {"id": cursor.lastrowid, "role": role, "content": content, "created": created}
+
+    def page(self, session: str, limit: int, before: Optional[int] = None) -> List[dict]:
+        # Newest first through the (session, id) index, so cost tracks the page size, not the log
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, role, content, created FROM messages WHERE session = ? AND id < ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session, before if before is not None else 2 ** 62, limit),
+            ).fetchall()
+        return [{"id": row[0], "role": row[1], "content": row[2], "created": row[3]} for row in reversed(rows)]
+
+    def between(self, session: str, after: int, upto: int) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, role, content, created FROM messages WHERE session = ? AND id > ? AND id <= ? ORDER BY id",
+                (session, after, upto),
+            ).fetchall()
+        return [{"id": row[0], "role": row[1], "content": row[2], "created": row[3]} for row in rows]
+
+    def count(self, session: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM messages WHERE session = ?", (session,)).fetchone()[0]
+
+    def summary(self, session: str) -> Tuple[str, int]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT summary, covered FROM summaries WHERE session = ?", (session,)).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def set_summary(self, session: str, text: str, covered: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO summaries (session, summary, covered, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(session) DO UPDATE SET summary = excluded.summary, covered = excluded.covered, "
+                "updated = excluded.updated",
+                (session, text, covered, time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        """Drop sessions with no message newer than the TTL."""
+        cutoff = time.time() - self.ttl
+        with self._connect() as conn:
+            stale = "SELECT session FROM messages GROUP BY session HAVING MAX(created) < ?"
+            conn.execute(f"DELETE FROM summaries WHERE session IN ({stale})", (cutoff,))
+            cursor = conn.execute(f"DELETE FROM messages WHERE session IN ({stale})", (cutoff,))
+        self._purged = time.time()
+        return cursor.rowcount
+
+    def purge_if_due(self, interval: float = PURGE_INTERVAL) -> int:
+        return self.purge_expired() if time.time() - self._purged >= interval else 0
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            sessions, messages = conn.execute("SELECT COUNT(DISTINCT session), COUNT(*) FROM messages").fetchone()
+        return {"backend": "sqlite", "sessions": sessions, "messages": messages}
+
+
+def build_chat_store(backend: str = "sqlite", path: str = DEFAULT_SQLITE_PATH):
+    if backend == "memory":
+        return MemoryChatStore()
+    if backend == "sqlite":
+        return SQLiteChatStore(path)
+    raise ValueError(f"Unknown chat history backend: {backend}")
+
+
+def snippet(text: str, limit: int = SNIPPET_CHARS, first_sentence: bool = True) -> str:
+    """A message without markdown or HTML (by default only its first sentence), cut to ``limit`` characters."""
+    text = re.sub(r"<[^>]+>|[#*_`>|]+", " ", text)
+    text = " ".join(text.split())
+    sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0] if first_sentence else text
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + "…"
+
+
+def extractive_summary(previous: str, messages: Sequence[dict], max_chars: int = SUMMARY_CHARS) -> str:
+    """Append one line per message to the running summary, dropping the oldest lines past ``max_chars``."""
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        lines.append(f"{'Q' if message['role'] == 'user' else 'A'}: {snippet(message['content'])}")
+    while len(lines) > 1 and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _generate(model, prompt_text: str, gate) -> str:
+    with gate():
+        return model.generate_content(prompt_text).text.strip()
+
+
+def model_summarizer(model, build_prompt: Callable[[str, str], str], max_chars: int = SUMMARY_CHARS,
+                     dispatcher=None) -> Callable[[str, Sequence[dict]], str]:
+    """Summarizer that asks ``model`` to fold new turns into the summary, falling back to the extractive one.
+
+    With a ``dispatcher`` (``LLMDispatcher``) the call shares the chat's concurrency
+    slots, rate limit and retries, like every other model request.
+    """
+    def summarize(previous: str, messages: Sequence[dict]) -> str:
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt_text = build_prompt(previous, transcript)
+        try:
+            if dispatcher is None:
+                text = model.generate_content(prompt_text).text.strip()
+            else:
+                key = "summary-" + hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()
+                text = dispatcher.call(key, _generate, model, prompt_text, dispatcher.upstream)
+        except Exception:
+            return extractive_summary(previous, messages, max_chars)
+        return text[:max_chars] if text else extractive_summary(previous, messages, max_chars)
+    return summarize
+
+
+class ChatHistory:
+    """One session's conversation, cheap to render on every rerun.
+
+    Only the last ``window`` messages are held in memory; the full log lives
+    in the store and older pages are read on request. Messages that fall out
+    of the verbatim window are folded into a rolling summary in batches, so
+    ``memory()`` stays bounded however long the session runs.
+    """
+
+    def __init__(self, store, session_id: str, window: int = WINDOW,
+                 summarizer: Optional[Callable[[str, Sequence[dict]], str]] = None):
+        self.store = store
+        self.session_id = session_id
+        self.summarizer = summarizer or extractive_summary
+        self.tail = deque(store.page(session_id, window), maxlen=window)
+        self.total = store.count(session_id)
+        self.summary, self.summarized_upto = store.summary(session_id)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def append(self, role: str, content: str) -> dict:
+        message = self.store.append(self.session_id, role, content)
+        self.tail.append(message)
+        self.total += 1
+        return message
+
+    def recent(self) -> List[dict]:
+        return list(self.tail)
+
+    def hidden(self) -> int:
+        """Messages older than the in-memory window."""
+        return self.total - len(self.tail)
+
+    def older(self, limit: int = PAGE) -> List[dict]:
+        """Up to ``limit`` messages just before the window, oldest first."""
+        if not self.tail or limit <= 0:
+            return []
+        return self.store.page(self.session_id, limit, before=self.tail[0]["id"])
+
+    def summarize(self, keep_verbatim: int = KEEP_VERBATIM, batch: int = SUMMARY_BATCH) -> bool:
+        """Fold messages older than the verbatim window into the summary once ``batch`` are pending."""
+        if len(self.tail) <= keep_verbatim:
+            return False
+        upto = self.tail[-keep_verbatim - 1]["id"] if keep_verbatim else self.tail[-1]["id"]
+        pending = self.store.between(self.session_id, self.summarized_upto, upto)
+        if len(pending) < batch:
+            return False
+        self.summary = self.summarizer(self.summary, pending)
+        self.summarized_upto = upto
+        self.store.set_summary(self.session_id, self.summary, upto)
+        return True
+
+    def memory(self, max_chars: int = MEMORY_CHARS, exclude_last: bool = False) -> str:
+        """Summary of earlier turns plus the not yet summarized messages, for follow-up prompts.
+
+        ``exclude_last`` leaves out the newest message, e.g. the question being asked.
+        """
+        recent = list(self.tail)[:-1] if exclude_last else list(self.tail)
+        recent = [message for message in recent if message["id"] > self.summarized_upto]
+        parts = [f"Earlier: {self.summary}"] if self.summary else []
+        parts += [f"{message['role']}: {snippet(message['content'], 400, first_sentence=False)}" for message in recent]
+        text = "\n".join(parts)
+        return text if len(text) <= max_chars else "…" + text[-(max_chars - 1):]
@@ -0,0 +1,160 @@
+import os
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.helpers import YEAR_KEYWORDS, find_column, to_year
+from app.utils.standards import STANDARDS, normalize_parameter_name, outside_limits, parameter_for_column
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("HYDROAI_CONTEXT_TOKENS", "1200"))
+QUANTILES = (0.1, 0.5, 0.9)
+HEADER = "param|unit|n|mean|p10|p50|p90|max|limit|over|trend/yr"
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for the English/number mix we send
+    return (len(text) + 3) // 4
+
+
+def parameter_columns(df: pd.DataFrame) -> List[str]:
+    year_col = find_column(df.columns, YEAR_KEYWORDS)
+    return [
+        col for col in df.select_dtypes(include=[np.number]).columns
+        if col != year_col and not re.search(r"(^|_)(id|code|sl|s\.?no|lat|lon|long|latitude|longitude)$", str(col).lower())
+    ]
+
+
+def select_parameters(df: pd.DataFrame, query: str, limit: Optional[int] = None,
+                      counts: Optional[pd.Series] = None) -> List[str]:
+    """Rank numeric columns: those named in the query, then regulated ones, then the densest."""
+    query_terms = set(normalize_parameter_name(query).split())
+    query_text = " " + normalize_parameter_name(query) + " "
+
+    def mentioned(col) -> bool:
+        key = parameter_for_column(col)
+        names = {normalize_parameter_name(col)}
+        if key is not None:
+            names.update(normalize_parameter_name(alias) for alias in STANDARDS[key]["aliases"] + (key,))
+        return any((name in query_terms) if " " not in name else (f" {name} " in query_text) for name in names if name)
+
+    counts = df.count() if counts is None else counts
+    ranked = sorted(
+        parameter_columns(df),
+        key=lambda col: (not mentioned(col), parameter_for_column(col) is None, -counts[col]),
+    )
+    return ranked[:limit] if limit else ranked
+
+
+def _fmt(value) -> str:
+    if value is None or pd.isna(value):
+        return "-"
+    value = float(value)
+    if value == 0:
+        return "0"
+    if abs(value) >= 1000:
+        return f"{value:.0f}"
+    return f"{value:.3g}"
+
+
+def parameter_rows(df: pd.DataFrame, params: Sequence[str]) -> List[str]:
+    """One dense pipe-separated row per parameter, computed column-wise in one pass."""
+    if not params or df.empty:
+        return []
+    values = df[list(params)].astype(float)
+    stats = values.agg(['count', 'mean', 'max'])
+    quantiles = values.quantile(list(QUANTILES))
+
+    year_col = find_column(df.columns, YEAR_KEYWORDS)
+    yearly = None
+    if year_col is not None:
+        years = to_year(df[year_col])
+        if years.nunique() >= 3:
+            yearly = values.groupby(years.to_numpy()).mean()
+
+    rows = []
+    for col in params:
+        spec = STANDARDS.get(parameter_for_column(col) or "")
+        limit = spec["permissible"] if spec else None
+        exceed = outside_limits(values[col], col)
+        over = "-" if exceed is None else f"{int(exceed.sum())}"
+        trend = None
+        if yearly is not None:
+            points = yearly[col].dropna()
+            if len(points) >= 3:
+                trend = np.polyfit(points.index.to_numpy(dtype=float), points.to_numpy(), 1)[0]
+        rows.append("|".join([
+            str(col), spec["unit"] if spec else "", str(int(stats.at['count', col])),
+            _fmt(stats.at['mean', col]), *(_fmt(quantiles.at[q, col]) for q in QUANTILES),
+            _fmt(stats.at['max', col]), _fmt(limit), over, _fmt(trend),
+        ]))
+    return rows
+
+
+def cube_parameter_rows(cube, params: Sequence[str], district: Optional[str] = None) -> List[str]:
+    """Same rows as ``parameter_rows``, read from a precomputed aggregate cube."""
+    cell = cube.cell(district)
+    rows = []
+    for col in params:
+        spec = STANDARDS.get(parameter_for_column(col) or "")
+        trend = None
+        yearly = cube.yearly("mean", col, district)
+        if len(yearly) >= 3:
+            trend = np.polyfit(yearly.index.to_numpy(dtype=float), yearly.to_numpy(), 1)[0]
+        rows.append("|".join([
+            str(col), spec["unit"] if spec else "", str(int(cell.at[col, 'count'])),
+            _fmt(cell.at[col, 'mean']), *(_fmt(cell.at[col, f"p{int(q * 100)}"]) for q in QUANTILES),
+            _fmt(cell.at[col, 'max']), _fmt(spec["permissible"] if spec else None),
+            f"{int(cell.at[col, 'exceed'])}" if spec else "-", _fmt(trend),
+        ]))
+    return rows
+
+
+def build_context(df: pd.DataFrame, query: str, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                  label: str = "Dataset", max_parameters: int = 12, cube=None,
+                  district: Optional[str] = None) -> Tuple[str, dict]:
+    """Compact, query-focused parameter table that fits in ``token_budget`` tokens.
+
+    Returns the context text and a size report. Parameters are added in relevance
+    order until the next row would exceed the budget, so the prompt size depends
+    on the budget rather than on how many columns the dataset has. With an
+    aggregate ``cube`` the rows for ``district`` (or all districts) are looked up
+    instead of computed from ``df``.
+    """
+    use_cube = cube is not None and (district is None or cube.has_district(district))
+    counts = cube.cell(district)["count"] if use_cube else None
+    ranked = select_parameters(df, query, max_parameters, counts=counts)
+    if use_cube:
+        ranked = [col for col in ranked if col in counts.index]
+    head = f"{label}: {len(df):,} samples. Limits are BIS IS 10500 permissible; over = samples beyond limit.\n{HEADER}"
+    used = estimate_tokens(head)
+    lines = [head]
+    included = []
+    # Compute rows in small batches so a wide frame is never summarized in full
+    batch = 8
+    for start in range(0, len(ranked), batch):
+        chunk = ranked[start:start + batch]
+        stop = False
+        rows = cube_parameter_rows(cube, chunk, district) if use_cube else parameter_rows(df, chunk)
+        for col, row in zip(chunk, rows):
+            cost = estimate_tokens(row) + 1
+            if used + cost > token_budget:
+                stop = True
+                break
+            lines.append(row)
+            included.append(col)
+            used += cost
+        if stop:
+            break
+
+    text = "\n".join(lines)
+    report = {
+        "tokens": estimate_tokens(text),
+        "chars": len(text),
+        "budget": token_budget,
+        "parameters": len(included),
+        "parameters_dropped": len(parameter_columns(df)) - len(included),
+        "rows": len(df),
+    }
+    return text, report
@@ -0,0 +1,223 @@
+import codecs
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.helpers import YEAR_NUMBER_KEYWORDS, normalize_names
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+DATA_PATH = "data/gujarat_groundwater_merged_final.csv"
+STORE_DIR = "data/store"
+MANIFEST_NAME = "_manifest.json"
+
+# Bytes inspected per block when guessing a file's encoding
+ENCODING_SAMPLE_BYTES = 256 * 1024
+ENCODING_SAMPLE_BLOCKS = 4
+
+# Text columns that repeat a small set of values across every row
+CATEGORICAL_KEYWORDS = ('district', 'state', 'stn_name', 'location', 'block', 'tehsil')
+
+
+def columnar_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def is_categorical_column(col) -> bool:
+    name = str(col).lower()
+    return any(key in name for key in CATEGORICAL_KEYWORDS)
+
+
+def is_year_column(col) -> bool:
+    name = str(col).lower()
+    return any(key in name for key in YEAR_NUMBER_KEYWORDS)
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the fixed columnar schema: categoricals for names, float32/int16 for numbers."""
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if is_categorical_column(col) and not pd.api.types.is_numeric_dtype(series):
+            # Names are normalized once here so consumers can compare categories directly
+            out[col] = normalize_names(series)
+        elif is_year_column(col):
+            years = pd.to_numeric(series, errors='coerce')
+            if years.notna().any() and years.dropna().between(-32768, 32767).all() \
+                    and (years.dropna() % 1 == 0).all():
+                out[col] = years.astype("Int16")
+            else:
+                out[col] = series
+        elif pd.api.types.is_float_dtype(series):
+            out[col] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series):
+            out[col] = pd.to_numeric(series, downcast='integer')
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+def convert_to_columnar(csv_path: str = DATA_PATH, output_path: Optional[str] = None) -> str:
+    """Build the typed Parquet copy of a CSV dataset and return its path."""
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow is required to write the columnar dataset")
+    output_path = output_path or columnar_path(csv_path)
+    df = optimize_dtypes(pd.read_csv(csv_path))
+    df.to_parquet(output_path, engine="pyarrow", index=False)
+    return output_path
+
+
+def has_fresh_columnar_copy(csv_path: str) -> bool:
+    parquet_path = columnar_path(csv_path)
+    if not HAS_PYARROW or not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+
+def load_dataset(path: str = DATA_PATH, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Load the dataset, preferring the columnar copy when it is newer than the CSV.
+
+    ``columns`` limits the read to the given columns so callers only pay for what they use.
+    """
+    columns = list(columns) if columns is not None else None
+    if has_fresh_columnar_copy(path):
+        return pd.read_parquet(columnar_path(path), engine="pyarrow", columns=columns)
+    return optimize_dtypes(pd.read_csv(path, usecols=columns))
+
+
+def manifest_path(store_dir: str = STORE_DIR) -> str:
+    return os.path.join(store_dir, MANIFEST_NAME)
+
+
+def read_manifest(store_dir: str = STORE_DIR) -> dict:
+    path = manifest_path(store_dir)
+    if not os.path.exists(path):
+        return {"version": 0, "partitions": {}}
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def has_store(store_dir: str = STORE_DIR) -> bool:
+    return os.path.exists(manifest_path(store_dir))
+
+
+# The last concatenated read of each store: its column/partition selection, every partition's
+# version and row range, and the frame. An ingest only bumps the versions of partitions it
+# touched, so the rest is sliced out of this frame instead of being read again, and only the
+# concatenated copy is kept rather than a second one per partition.
+_STORE_CACHE: Dict[str, Tuple[tuple, Dict[str, Tuple[int, int, int]], pd.DataFrame]] = {}
+
+
+def load_store(store_dir: str = STORE_DIR, columns: Optional[Sequence[str]] = None,
+               partitions: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Load the partitioned store written by app.utils.ingest, reusing unchanged partitions."""
+    manifest = read_manifest(store_dir)
+    selection = (tuple(columns) if columns is not None else None,
+                 tuple(sorted(partitions)) if partitions is not None else None)
+    entries = [(key, entry) for key, entry in sorted(manifest["partitions"].items())
+               if partitions is None or key in partitions]
+    cached_selection, cached_ranges, cached = _STORE_CACHE.get(store_dir, (None, {}, None))
+    if cached_selection != selection:
+        cached_ranges, cached = {}, None
+    elif len(cached_ranges) == len(entries) and all(
+            cached_ranges.get(key, (None,))[0] == entry["version"] for key, entry in entries):
+        return cached.copy(deep=False)
+
+    frames, ranges, start = [], {}, 0
+    for key, entry in entries:
+        version, first, last = cached_ranges.get(key, (None, 0, 0))
+        if version == entry["version"]:
+            frame = cached.iloc[first:last]
+        else:
+            path = os.path.join(store_dir, entry["path"])
+            frame = pd.read_parquet(path, engine="pyarrow", columns=selection[0] and list(selection[0]))
+        ranges[key] = (entry["version"], start, start + len(frame))
+        start += len(frame)
+        frames.append(frame)
+    if not frames:
+        _STORE_CACHE.pop(store_dir, None)
+        return pd.DataFrame(columns=list(columns) if columns is not None else None)
+    combined = pd.concat(frames, ignore_index=True)
+    # Per-partition categoricals have different categories; re-unify the name columns
+    for col in combined.columns:
+        if is_categorical_column(col) and not pd.api.types.is_numeric_dtype(combined[col]):
+            combined[col] = combined[col].astype("category")
+    _STORE_CACHE[store_dir] = (selection, ranges, combined)
+    # Callers get their own frame object; column assignment cannot reach the cached one
+    return combined.copy(deep=False)
+
+
+def file_digest(path: str, block: int = 64 * 1024) -> str:
+    """Hash of the first and last ``block`` bytes: catches rewrites that keep mtime and size."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        digest.update(handle.read(block))
+        size = os.fstat(handle.fileno()).st_size
+        if size > block:
+            handle.seek(max(block, size - block))
+            digest.update(handle.read(block))
+    return digest.hexdigest()[:12]
+
+
+def detect_encoding(path: str, sample_bytes: int = ENCODING_SAMPLE_BYTES,
+                    blocks: int = ENCODING_SAMPLE_BLOCKS) -> str:
+    """Guess a text file's encoding from a few blocks spread across it.
+
+    A byte-order mark wins; otherwise the first of UTF-8 and cp1252 that decodes
+    every block, with latin-1 (which decodes anything) as the fallback. Sampling
+    beyond the head catches files whose first rows are plain ASCII.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as handle:
+        head = handle.read(sample_bytes)
+        samples = [head]
+        for offset in np.linspace(sample_bytes, max(sample_bytes, size - sample_bytes), blocks).astype(int)[1:]:
+            if offset >= size:
+                break
+            handle.seek(offset)
+            samples.append(handle.read(sample_bytes))
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            for i, sample in enumerate(samples):
+                if i and encoding == "utf-8":
+                    # A block may start inside a multi-byte character
+                    sample = sample[next((j for j, byte in enumerate(sample[:4]) if byte & 0xC0 != 0x80), 0):]
+                # Not final: a block may also end inside one
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def data_version(path: str = DATA_PATH, store_dir: str = STORE_DIR) -> str:
+    """Token that changes whenever the data the app would load changes."""
+    if has_store(store_dir):
+        return f"store-{read_manifest(store_dir).get('version', 0)}"
+    return file_version(path)
+
+
+def file_version(path: str) -> str:
+    """Version token of a single dataset file, following its columnar copy when that is what gets read."""
+    source = columnar_path(path) if has_fresh_columnar_copy(path) else path
+    stat = os.stat(source)
+    return f"{os.path.basename(source)}-{stat.st_mtime_ns}-{stat.st_size}-{file_digest(source)}"
+
+
+if __name__ == "__main__":
+    output = convert_to_columnar()
+    print(f"Saved columnar dataset as: {output}")
@@ -0,0 +1,100 @@
+from typing import Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.helpers import dataset_fingerprint
+
+
+MASKED_ARRAYS = (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)
+
+
+def _locked(values: np.ndarray) -> np.ndarray:
+    values.flags.writeable = False
+    return values
+
+
+def _read_only(series: pd.Series) -> Optional[pd.Series]:
+    """Rebuild one column on read-only arrays, or None when its dtype offers no public way to."""
+    dtype, array = series.dtype, series.array
+    if isinstance(dtype, pd.CategoricalDtype):
+        # ``codes`` is a view of the category codes, so the rebuilt column shares them
+        values = pd.Categorical.from_codes(_locked(array.codes), dtype=dtype)
+    elif isinstance(dtype, np.dtype):
+        values = _locked(series.to_numpy())
+    elif isinstance(array, MASKED_ARRAYS):
+        # Nullable columns are small (Year, counts); they are copied once into locked data + mask
+        data = array.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+        values = type(array)(_locked(data), _locked(np.asarray(array.isna())))
+    elif getattr(dtype, "storage", None) == "pyarrow" or isinstance(dtype, pd.ArrowDtype):
+        return series  # Arrow buffers are immutable already
+    else:
+        return None
+    return pd.Series(values, index=series.index, name=series.name, copy=False)
+
+
+def freeze(frame: pd.DataFrame) -> Tuple[pd.DataFrame, Set[str]]:
+    """Rebuild ``frame`` on read-only arrays so in-place writes raise instead of leaking into the cache.
+
+    Returns the frozen frame and the columns that could not be locked; the
+    handle hands those out as copies instead.
+    """
+    columns, mutable = {}, set()
+    for name in frame.columns:
+        locked = _read_only(frame[name])
+        if locked is None:
+            locked = frame[name]
+            mutable.add(name)
+        columns[name] = locked
+    return pd.DataFrame(columns, index=frame.index, copy=False), mutable
+
+
+class DatasetHandle:
+    """Immutable, process-shared dataset with a version token.
+
+    Meant to be held by ``st.cache_resource``: every rerun gets the same object,
+    so reading the data is O(1) instead of the unpickled copy ``st.cache_data``
+    hands out. ``frame``, ``view`` and ``slice`` return new frame objects that
+    share the handle's read-only arrays: assigning or adding a column only
+    changes the caller's frame, and in-place writes raise.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version: str):
+        self.version = version
+        self._frame, self._mutable = freeze(frame)
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        # A fresh shallow frame per caller, so column assignment cannot reach other sessions
+        return self._detach(self._frame.copy(deep=False))
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = dataset_fingerprint(self._frame)
+        return self._fingerprint
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._frame.columns
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    def view(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Column projection sharing the handle's arrays."""
+        return self._detach(self._frame.copy(deep=False) if columns is None else self._frame[list(columns)])
+
+    def slice(self, start: int, stop: int) -> pd.DataFrame:
+        """Contiguous row range sharing the handle's arrays."""
+        return self._detach(self._frame.iloc[start:stop])
+
+    def _detach(self, frame: pd.DataFrame) -> pd.DataFrame:
+        # Columns freeze could not lock are copied per caller rather than shared
+        for name in self._mutable.intersection(frame.columns):
+            frame[name] = frame[name].copy()
+        return frame
+
+    def is_current(self, version: str) -> bool:
+        return version == self.version
@@ -0,0 +1,340 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from app.utils.data_loader import (
+    DATA_PATH, STORE_DIR, columnar_path, file_version, has_fresh_columnar_copy, has_store,
+    is_categorical_column, load_dataset, load_store, optimize_dtypes, read_manifest
+)
+from app.utils.helpers import (
+    DISTRICT_KEYWORDS, LATITUDE_KEYWORDS, LONGITUDE_KEYWORDS, STATE_KEYWORDS, STATION_KEYWORDS, YEAR_KEYWORDS,
+    find_column, normalize_names, to_year
+)
+from app.utils.ingest import list_partitions
+from app.utils.standards import map_parameter_columns
+
+CATALOG_PATH = "data/catalog.json"
+PROFILE_PATH = "data/cache/catalog_profiles.json"
+
+# Resolved in this order, each from the columns the earlier fields left over: station first,
+# because STATE_KEYWORDS also matches "stn_name" when a file has no state column
+FIELD_KEYWORDS = {
+    "station": STATION_KEYWORDS,
+    "state": STATE_KEYWORDS,
+    "district": DISTRICT_KEYWORDS,
+    "year": YEAR_KEYWORDS,
+    "latitude": LATITUDE_KEYWORDS,
+    "longitude": LONGITUDE_KEYWORDS,
+}
+# Unified column names when the primary source has no column for a field
+DEFAULT_FIELD_NAMES = {
+    "station": "STN_NAME", "state": "STATE", "district": "DISTRICT",
+    "year": "Year", "latitude": "LATITUDE", "longitude": "LONGITUDE",
+}
+# Sample dates of a dated source loaded next to sources with plain years, when its own name is taken
+DATE_COLUMN = "Sample_Date"
+
+
+def resolve_columns(columns: Sequence[str], overrides: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Map fields (state, district, year...) to a source's columns; catalog overrides win."""
+    overrides = overrides or {}
+    mapping = {field: col for field, col in overrides.items() if col in columns}
+    for field, keywords in FIELD_KEYWORDS.items():
+        if field not in mapping:
+            col = find_column([c for c in columns if c not in mapping.values()], keywords)
+            if col is not None:
+                mapping[field] = col
+    return mapping
+
+
+def parquet_columns(path: str) -> List[str]:
+    import pyarrow.parquet as pq
+    return list(pq.read_schema(path).names)
+
+
+class DatasetSource:
+    """One catalogued file or partitioned store.
+
+    ``state`` labels a file that covers a single state but has no state column;
+    ``columns`` overrides the field mapping for headers the heuristics miss.
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None, store: Optional[str] = None,
+                 state: Optional[str] = None, columns: Optional[Dict[str, str]] = None):
+        if (path is None) == (store is None):
+            raise ValueError(f"Catalog entry {name!r} needs exactly one of 'path' or 'store'")
+        self.name = name
+        self.path = path
+        self.store = store
+        self.state = " ".join(state.split()).title() if state else None
+        self.overrides = columns or {}
+
+    @property
+    def entry(self) -> dict:
+        """The catalog entry as written, so a changed mapping or path rebuilds the profile."""
+        return {"path": self.path, "store": self.store, "state": self.state, "columns": self.overrides}
+
+    @property
+    def kind(self) -> str:
+        if self.store is not None:
+            return "store"
+        return "parquet" if self.path.endswith(".parquet") else "csv"
+
+    def version(self) -> str:
+        if self.store is not None:
+            return f"store-{read_manifest(self.store).get('version', 0)}"
+        return file_version(self.path)
+
+    def columns(self) -> List[str]:
+        """Header only; no rows are read."""
+        if self.store is not None:
+            partitions = read_manifest(self.store)["partitions"]
+            if not partitions:
+                return []
+            first = min(partitions.values(), key=lambda entry: entry["path"])
+            return parquet_columns(os.path.join(self.store, first["path"]))
+        if self.kind == "parquet" or has_fresh_columnar_copy(self.path):
+            return parquet_columns(self.path if self.kind == "parquet" else columnar_path(self.path))
+        return list(pd.read_csv(self.path, nrows=0).columns)
+
+    def read(self, columns: Optional[Sequence[str]] = None, filters: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        """Rows whose name columns hold one of the given (normalized) names, e.g. ``{"STATE": ["Gujarat"]}``.
+
+        Filters go as far down as the format allows: district filters pick store
+        partitions, and filters on the typed Parquet copy (whose names were
+        normalized when it was written) are applied by pyarrow while reading.
+        """
+        filters = filters or {}
+        read_columns = None if columns is None else list(dict.fromkeys(list(columns) + list(filters)))
+        if self.store is not None:
+            districts = next((values for col, values in filters.items() if "district" in col.lower()), None)
+            partitions = list(list_partitions(self.store, districts=districts)) if districts else None
+            frame = load_store(self.store, columns=read_columns, partitions=partitions)
+        elif self.kind == "csv" and has_fresh_columnar_copy(self.path):
+            pushed = [(col, "in", list(values)) for col, values in filters.items() if is_categorical_column(col)]
+            frame = pd.read_parquet(columnar_path(self.path), engine="pyarrow", columns=read_columns,
+                                    filters=pushed or None)
+        elif self.kind == "parquet":
+            frame = optimize_dtypes(pd.read_parquet(self.path, engine="pyarrow", columns=read_columns))
+        else:
+            frame = load_dataset(self.path, columns=read_columns)
+        for col, values in filters.items():
+            frame = frame[normalize_names(frame[col]).isin(values).to_numpy()]
+        return frame if columns is None else frame[[col for col in columns if col in frame.columns]]
+
+
+class DatasetRegistry:
+    """Catalogue of state datasets that reads as one table.
+
+    Each source gets a profile (columns, field mapping, states, districts,
+    years, rows) built from a projected read and kept in ``PROFILE_PATH`` per
+    source version. ``load`` uses the profiles to skip sources that cannot
+    match, pushes the remaining filters into the Parquet or partition read, and
+    renames every source onto the primary source's column names, so memory
+    follows the states asked for rather than the size of the catalogue.
+    """
+
+    def __init__(self, sources: Sequence[DatasetSource], profile_path: str = PROFILE_PATH):
+        if not sources:
+            raise ValueError("The dataset catalog is empty")
+        names = [source.name for source in sources]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate catalog entries: {names}")
+        self.sources = list(sources)
+        self.profile_path = profile_path
+        self._profiles: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def version(self) -> str:
+        """Token that changes whenever any catalogued source changes."""
+        parts = [f"{source.name}={source.version()}" for source in self.sources]
+        return "catalog-" + hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+    def _build_profile(self, source: DatasetSource, version: str) -> dict:
+        columns = source.columns()
+        mapping = resolve_columns(columns, source.overrides)
+        keys = [mapping[field] for field in ("state", "district", "year") if field in mapping]
+        frame = source.read(columns=keys or columns[:1])
+        rows = len(frame)
+
+        frame = frame[keys]
+        states = normalize_names(frame[mapping["state"]]) if "state" in mapping else None
+        districts = normalize_names(frame[mapping["district"]]) if "district" in mapping else None
+        if states is None:
+            label = source.state or ""
+            states = pd.Series(pd.Categorical([label] * len(frame)), index=frame.index)
+        by_state = {}
+        if districts is not None:
+            pairs = pd.DataFrame({"state": states, "district": districts}).dropna().drop_duplicates()
+            for state, group in pairs.groupby("state", observed=True):
+                by_state[str(state)] = sorted(str(name) for name in group["district"])
+        for state in states.dropna().unique():
+            by_state.setdefault(str(state), [])
+        by_state.pop("", None)
+
+        years = to_year(frame[mapping["year"]]).dropna() if "year" in mapping else pd.Series(dtype=float)
+        return {
+            "version": version,
+            "entry": source.entry,
+            "kind": source.kind,
+            "columns": columns,
+            "mapping": mapping,
+            "parameters": map_parameter_columns(columns),
+            "rows": rows,
+            "states": by_state,
+            "years": [int(years.min()), int(years.max())] if not years.empty else None,
+        }
+
+    def profiles(self) -> Dict[str, dict]:
+        """Profile per source name, rebuilt only for sources whose version changed."""
+        with self._lock:
+            if not self._profiles and os.path.exists(self.profile_path):
+                with open(self.profile_path, encoding="utf-8") as handle:
+                    self._profiles = json.load(handle)
+            changed = False
+            for source in self.sources:
+                version = source.version()
+                profile = self._profiles.get(source.name, {})
+                if profile.get("version") != version or profile.get("entry") != source.entry:
+                    self._profiles[source.name] = self._build_profile(source, version)
+                    changed = True
+            current = {source.name: self._profiles[source.name] for source in self.sources}
+            if changed:
+                os.makedirs(os.path.dirname(self.profile_path) or ".", exist_ok=True)
+                tmp_path = self.profile_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as handle:
+                    json.dump(self._profiles, handle, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.profile_path)
+            return current
+
+    def states(self, profiles: Optional[Dict[str, dict]] = None) -> List[str]:
+        profiles = profiles or self.profiles()
+        return sorted({state for profile in profiles.values() for state in profile["states"]})
+
+    def match_state(self, text: str, profiles: Optional[Dict[str, dict]] = None) -> Optional[str]:
+        """First catalogued state named in free text, preferring longer names."""
+        lowered = text.lower()
+        for state in sorted(self.states(profiles), key=len, reverse=True):
+            if re.search(r"\b" + re.escape(state.lower()) + r"\b", lowered):
+                return state
+        return None
+
+    def plan(self, states: Optional[Sequence[str]] = None, districts: Optional[Sequence[str]] = None,
+             profiles: Optional[Dict[str, dict]] = None) -> List[DatasetSource]:
+        """Sources that can hold rows for the given states and districts, judged from the profiles alone."""
+        profiles = profiles or self.profiles()
+        selected = []
+        for source in self.sources:
+            held = profiles[source.name]["states"]
+            if states is not None and not any(state in held for state in states):
+                continue
+            if districts is not None:
+                held_districts = {name for state, names in held.items()
+                                  if states is None or state in states for name in names}
+                if not held_districts.intersection(districts):
+                    continue
+            selected.append(source)
+        return selected
+
+    def load(self, states: Optional[Sequence[str]] = None, districts: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Unified frame for the given states/districts (all when ``None``), in the primary source's column names."""
+        profiles = self.profiles()
+        primary = profiles[self.sources[0].name]
+        # The primary (first) source's names are the unified ones, so a one-file catalog reads unchanged
+        field_names = dict(DEFAULT_FIELD_NAMES, **primary["mapping"])
+        year_col = field_names["year"]
+        reads = []
+        for source in self.plan(states, districts, profiles):
+            profile = profiles[source.name]
+            mapping = profile["mapping"]
+            filters = {}
+            if states is not None and "state" in mapping and set(profile["states"]) - set(states):
+                filters[mapping["state"]] = list(states)
+            if districts is not None:
+                filters[mapping["district"]] = list(districts)
+            reads.append((source, mapping, profile, source.read(filters=filters)))
+
+        # Sources keep their year/date column as is unless the loaded ones disagree (years in one file,
+        # sample dates in another); only then do the dated ones get a year column, keeping their dates
+        dated = {source.name: mapping["year"] for source, mapping, _, frame in reads
+                 if "year" in mapping and not pd.api.types.is_numeric_dtype(frame[mapping["year"]])}
+        mixed_years = 0 < len(dated) < sum("year" in mapping for _, mapping, _, _ in reads)
+        if mixed_years and year_col in dated.values():
+            # The primary's column holds dates; the shared plain years get the default name instead
+            year_col = DEFAULT_FIELD_NAMES["year"]
+        frames = []
+        for source, mapping, profile, frame in reads:
+            renames = {col: field_names[field] for field, col in mapping.items() if field != "year"}
+            if "year" in mapping:
+                renames[mapping["year"]] = year_col
+            renames.update({col: primary["parameters"].get(key, key) for key, col in profile["parameters"].items()})
+            if mixed_years and source.name in dated:
+                date_col = mapping["year"] if mapping["year"] != year_col else DATE_COLUMN
+                frame = frame.rename(columns={mapping["year"]: date_col})
+                frame[year_col] = to_year(frame[date_col]).astype("Int16")
+                renames.pop(mapping["year"])
+            frame = frame.rename(columns={col: name for col, name in renames.items()
+                                          if col != name and name not in frame.columns})
+            if "state" not in mapping and source.state:
+                frame[field_names["state"]] = pd.Categorical([source.state] * len(frame))
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+        combined = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        for col in combined.columns:
+            if is_categorical_column(col) and not pd.api.types.is_numeric_dtype(combined[col]):
+                # Concatenated files have different categories, and filtered reads keep the unused ones
+                categorical = combined[col] if isinstance(combined[col].dtype, pd.CategoricalDtype) \
+                    else combined[col].astype("category")
+                combined[col] = categorical.cat.remove_unused_categories()
+        return combined
+
+    def describe(self) -> List[dict]:
+        """One row per source for the admin panel."""
+        profiles = self.profiles()
+        rows = []
+        for source in self.sources:
+            profile = profiles[source.name]
+            rows.append({
+                "name": source.name,
+                "kind": profile["kind"],
+                "rows": profile["rows"],
+                "states": ", ".join(profile["states"]) or "–",
+                "years": "–" if not profile["years"] else f"{profile['years'][0]}–{profile['years'][1]}",
+                "mapping": ", ".join(f"{field}={col}" for field, col in profile["mapping"].items()),
+            })
+        return rows
+
+
+def default_sources(path: str = DATA_PATH, store_dir: str = STORE_DIR) -> List[DatasetSource]:
+    # Without a catalog the app reads what it always did: the partitioned store, else the single file
+    if has_store(store_dir):
+        return [DatasetSource("default", store=store_dir)]
+    return [DatasetSource("default", path=path)]
+
+
+def load_registry(catalog_path: str = CATALOG_PATH, profile_path: str = PROFILE_PATH) -> DatasetRegistry:
+    """Registry from ``catalog_path``, or the single default dataset when there is no catalog.
+
+    The catalog is ``{"datasets": [{"name": ..., "path": ... | "store": ..., "state": ..., "columns": {...}}]}``;
+    relative paths are taken from the working directory, like DATA_PATH.
+    """
+    if not os.path.exists(catalog_path):
+        return DatasetRegistry(default_sources(), profile_path)
+    with open(catalog_path, encoding="utf-8") as handle:
+        entries = json.load(handle)["datasets"]
+    return DatasetRegistry([DatasetSource(**entry) for entry in entries], profile_path)
+
+
+if __name__ == "__main__":
+    registry = load_registry(sys.argv[1] if len(sys.argv) > 1 else CATALOG_PATH)
+    print(f"Catalog version: {registry.version()}")
+    for row in registry.describe():
+        print(f"{row['name']}: {row['kind']}, {row['rows']:,} rows, states {row['states']}, "
+              f"years {row['years']}\n  {row['mapping']}")
@@ -0,0 +1,210 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per ``per`` seconds, in bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, per: float = 60.0, burst: int = 1):
+        self.fill_rate = rate / per
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.fill_rate
+            time.sleep(wait)
+
+
+class _Broadcast:
+    """Chunks of one in-flight stream, replayed to every session following it."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._ready = threading.Condition()
+
+    def put(self, chunk: str) -> None:
+        with self._ready:
+            self.chunks.append(chunk)
+            self._ready.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._ready:
+            self.done = True
+            self.error = error
+            self._ready.notify_all()
+
+    def follow(self, timeout: float) -> Iterator[str]:
+        position = 0
+        while True:
+            with self._ready:
+                if not self._ready.wait_for(lambda: position < len(self.chunks) or self.done, timeout=timeout):
+                    raise TimeoutError(f"No response chunk from the model within {timeout:g}s")
+                pending, finished, error = self.chunks[position:], self.done, self.error
+            position += len(pending)
+            yield from pending
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class LLMDispatcher:
+    """Process-wide pool for model calls shared by every Streamlit session.
+
+    Upstream concurrency is bounded by ``max_concurrency`` no matter how many
+    script threads are running, and concurrent submissions with the same key
+    share a single in-flight call (or stream). Submitted functions wrap their
+    model call in ``upstream()``, so only requests that actually reach the model
+    take a concurrency slot and a rate-limit token; cache hits do not.
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 60.0, retries: int = 2,
+                 backoff: float = 1.0, retry_on=(Exception,), rate_limiter: Optional[RateLimiter] = None):
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_on = retry_on
+        # More workers than slots, so cache hits and backoff sleeps never queue behind streams
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 4, thread_name_prefix="hydroai-llm")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._inflight: Dict[str, Future] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self._lock = threading.Lock()
+        self.counters = {"submitted": 0, "coalesced": 0, "retries": 0, "failed": 0, "upstream": 0}
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters["coalesced"] += 1
+                return future
+            self.counters["submitted"] += 1
+            future = self._executor.submit(self._run, fn, *args, **kwargs)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def call(self, key: str, fn: Callable, *args, timeout: float = None, **kwargs):
+        """Submit and wait; raises ``concurrent.futures.TimeoutError`` after ``timeout`` seconds."""
+        return self.submit(key, fn, *args, **kwargs).result(timeout=timeout or self.timeout)
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _run(self, fn: Callable, *args, **kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                return fn(*args, **kwargs)
+            except self.retry_on:
+                if attempt == self.retries:
+                    with self._lock:
+                        self.counters["failed"] += 1
+                    raise
+                with self._lock:
+                    self.counters["retries"] += 1
+                # Exponential backoff with jitter so retries from many sessions spread out
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    @contextmanager
+    def slot(self, timeout: float = None):
+        """Hold one of the concurrency slots, e.g. for the lifetime of a streamed response."""
+        if not self._slots.acquire(timeout=timeout or self.timeout):
+            raise TimeoutError("Timed out waiting for a free model slot")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def upstream(self, timeout: float = None):
+        """Slot plus rate-limit token for one model request; retries take a new token each time."""
+        with self.slot(timeout):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            with self._lock:
+                self.counters["upstream"] += 1
+            yield
+
+    def stream(self, key: str, fn: Callable[..., Iterable[str]], *args, timeout: float = None,
+               **kwargs) -> Iterator[str]:
+        """Run ``fn(*args, **kwargs)`` in the pool and iterate its chunks.
+
+        Concurrent streams with the same key share one upstream stream, each
+        follower replaying it from the first chunk. A failure before the first
+        chunk is retried like ``call``; once text has been shown it is raised.
+        ``TimeoutError`` is raised when no chunk arrives within ``timeout``.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            if broadcast is not None:
+                self.counters["coalesced"] += 1
+            else:
+                self.counters["submitted"] += 1
+                broadcast = self._streams[key] = _Broadcast()
+                self._executor.submit(self._produce, key, broadcast, fn, args, kwargs)
+        return broadcast.follow(timeout or self.timeout)
+
+    def _produce(self, key: str, broadcast: _Broadcast, fn: Callable, args, kwargs) -> None:
+        try:
+            for attempt in range(self.retries + 1):
+                started = len(broadcast.chunks)
+                try:
+                    for chunk in fn(*args, **kwargs):
+                        broadcast.put(chunk)
+                    broadcast.finish()
+                    return
+                except self.retry_on as error:
+                    if attempt == self.retries or len(broadcast.chunks) > started:
+                        with self._lock:
+                            self.counters["failed"] += 1
+                        broadcast.finish(error)
+                        return
+                    with self._lock:
+                        self.counters["retries"] += 1
+                    time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        except BaseException as error:
+            broadcast.finish(error)
+        finally:
+            with self._lock:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._inflight) + len(self._streams),
+                        max_concurrency=self.max_concurrency)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def build_dispatcher() -> LLMDispatcher:
+    # HYDROAI_LLM_RPM caps upstream requests per minute across all sessions (0 = unlimited)
+    rpm = float(os.getenv("HYDROAI_LLM_RPM", "0"))
+    return LLMDispatcher(
+        max_concurrency=int(os.getenv("HYDROAI_LLM_CONCURRENCY", "8")),
+        timeout=float(os.getenv("HYDROAI_LLM_TIMEOUT", "60")),
+        retries=int(os.getenv("HYDROAI_LLM_RETRIES", "2")),
+        rate_limiter=RateLimiter(rpm) if rpm > 0 else None,
+    )
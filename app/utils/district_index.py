@@ -0,0 +1,98 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_name(value) -> str:
+    return " ".join(str(value).split()).lower()
+
+
+class DistrictIndex:
+    """District name lookups over a frame, with each district's rows as a contiguous range.
+
+    Built once per dataset; filtering a district becomes a dictionary lookup
+    plus an ``iloc`` slice instead of a full-column string comparison. The
+    frame itself is shared, not copied: when it is not already grouped only
+    the sort order is kept, and a slice gathers just that district's rows.
+    """
+
+    def __init__(self, df: pd.DataFrame, district_col: str):
+        self.district_col = district_col
+
+        # Normalize the (few) distinct names, not every row
+        raw = df[district_col]
+        categorical = raw if isinstance(raw.dtype, pd.CategoricalDtype) else raw.astype("category")
+        keys = pd.Index(categorical.cat.categories.map(normalize_name))
+        unique_keys = pd.Index(keys.unique())
+        remap = np.append(unique_keys.get_indexer(keys), -1)
+        codes = remap[categorical.cat.codes.to_numpy()]
+
+        self._frame = df
+        self._order: Optional[np.ndarray] = None
+        if np.all(codes[1:] >= codes[:-1]):
+            # Already grouped (e.g. a published shared dataset): ranges index the frame directly
+            sorted_codes = codes
+        else:
+            self._order = np.argsort(codes, kind="stable")
+            sorted_codes = codes[self._order]
+
+        starts = np.searchsorted(sorted_codes, np.arange(len(unique_keys)), side="left")
+        stops = np.searchsorted(sorted_codes, np.arange(len(unique_keys)), side="right")
+
+        self._ranges: Dict[str, Tuple[int, int]] = {}
+        self._display: Dict[str, str] = {}
+        for code, key in enumerate(unique_keys):
+            if stops[code] > starts[code]:
+                self._ranges[key] = (int(starts[code]), int(stops[code]))
+                first = int(starts[code]) if self._order is None else int(self._order[starts[code]])
+                self._display[key] = str(raw.iat[first]).strip()
+        self._max_words = max((len(key.split()) for key in self._ranges), default=1)
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._display.values())
+
+    def __contains__(self, name) -> bool:
+        return normalize_name(name) in self._ranges
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def _rows(self, start: int, stop: int) -> pd.DataFrame:
+        if self._order is None:
+            return self._frame.iloc[start:stop]
+        return self._frame.iloc[self._order[start:stop]]
+
+    def slice(self, name: str) -> pd.DataFrame:
+        start, stop = self._ranges.get(normalize_name(name), (0, 0))
+        return self._rows(start, stop)
+
+    def grouped(self) -> pd.DataFrame:
+        """The whole frame with districts in contiguous runs (copies unless already grouped)."""
+        return self._rows(0, len(self._frame))
+
+    def match_text(self, text: str) -> Optional[str]:
+        """Return the first district mentioned in free text, preferring longer names."""
+        words = re.findall(r"[\w&.-]+", text.lower())
+        for size in range(self._max_words, 0, -1):
+            for i in range(len(words) - size + 1):
+                key = " ".join(words[i:i + size]).strip(".-")
+                if key in self._ranges:
+                    return self._display[key]
+        return None
+
+    def match_all(self, text: str) -> List[str]:
+        """Every distinct district mentioned in free text, longer names first and without overlaps."""
+        words = re.findall(r"[\w&.-]+", text.lower())
+        taken = [False] * len(words)
+        found = []
+        for size in range(self._max_words, 0, -1):
+            for i in range(len(words) - size + 1):
+                key = " ".join(words[i:i + size]).strip(".-")
+                if key in self._ranges and not any(taken[i:i + size]):
+                    taken[i:i + size] = [True] * size
+                    if self._display[key] not in found:
+                        found.append(self._display[key])
+        return found
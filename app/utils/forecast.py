@@ -0,0 +1,372 @@
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.utils.aggregate_cube import CUBE_DIR
+from app.utils.context_builder import _fmt, parameter_columns
+from app.utils.district_index import normalize_name
+from app.utils.helpers import DISTRICT_KEYWORDS, STATION_KEYWORDS, YEAR_KEYWORDS, cache_token, content_fingerprint, dataset_fingerprint, find_column, normalize_names
+from app.utils.standards import STANDARDS, parameter_for_column
+
+HORIZON = 5
+# A trend needs at least this many samples spread over two or more distinct times
+MIN_POINTS = 4
+# Two-sided 90% normal prediction band
+BAND_Z = 1.645
+FIT_FIELDS = ("n", "tmean", "spread", "level", "slope", "sigma", "last")
+STATION_FIELDS = ("n", "tmean", "level", "slope", "last")
+FORECAST_HEADER = "param|unit|n|now|slope/yr|{year}|band|limit|crosses"
+
+
+def decimal_years(series: pd.Series) -> tuple:
+    """Time in fractional years, plus month index (0–11) when the column holds dates."""
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64), None
+    dates = pd.to_datetime(series, errors='coerce', format='mixed', dayfirst=True)
+    days = np.where(dates.dt.is_leap_year, 366.0, 365.0)
+    years = dates.dt.year.to_numpy(dtype=np.float64, na_value=np.nan)
+    day_of_year = dates.dt.dayofyear.to_numpy(dtype=np.float64, na_value=np.nan)
+    months = dates.dt.month.to_numpy(dtype=np.float64, na_value=np.nan)
+    return years + (day_of_year - 1) / days, np.nan_to_num(months - 1).astype(np.int64)
+
+
+def fit_trends(series: np.ndarray, t: np.ndarray, y: np.ndarray, groups: int) -> Dict[str, np.ndarray]:
+    """Least-squares line y = level + slope · (t − tmean) for every series at once.
+
+    ``series`` labels each observation with its series number. Every sum is a
+    bincount, so the cost is linear in observations however many series there
+    are. ``level`` is the series mean; ``slope`` and ``sigma`` (residual
+    standard error) are NaN for series with fewer than MIN_POINTS samples or a
+    single distinct time.
+    """
+    n = np.bincount(series, minlength=groups).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tmean = np.bincount(series, weights=t, minlength=groups) / n
+        level = np.bincount(series, weights=y, minlength=groups) / n
+        # Centred times keep the sums well conditioned for calendar years
+        dt = t - tmean[series]
+        spread = np.bincount(series, weights=dt * dt, minlength=groups)
+        slope = np.bincount(series, weights=dt * y, minlength=groups) / spread
+        residual = y - level[series] - np.nan_to_num(slope)[series] * dt
+        rss = np.bincount(series, weights=residual * residual, minlength=groups)
+        sigma = np.sqrt(rss / (n - 2))
+    valid = (n >= MIN_POINTS) & (spread > 1e-9)
+    slope[~valid] = np.nan
+    sigma[~valid] = np.nan
+    last = np.full(groups, np.nan)
+    np.fmax.at(last, series, t)
+    return {"n": n, "tmean": tmean, "spread": spread, "level": level, "slope": slope, "sigma": sigma,
+            "last": last, "residual": residual}
+
+
+def seasonal_index(series: np.ndarray, months: np.ndarray, residual: np.ndarray, groups: int) -> np.ndarray:
+    """Mean detrended residual per (series, calendar month), centred on zero per series."""
+    slots = series * 12 + months
+    counts = np.bincount(slots, minlength=groups * 12).reshape(groups, 12)
+    sums = np.bincount(slots, weights=residual, minlength=groups * 12).reshape(groups, 12)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        index = np.where(counts > 0, sums / counts, 0.0)
+    # Offsets average to zero over the observations, so the trend level is unchanged
+    index -= (index * counts).sum(axis=1, keepdims=True) / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    return index
+
+
+class ForecastEngine:
+    """Linear trends per district × parameter and per station × parameter.
+
+    District fits are dense (districts + 1, parameters) arrays whose last row
+    is the whole dataset, like ``AggregateCube``. Station fits are kept only
+    for series with a usable trend, as flat arrays. Each fit stores its
+    sufficient statistics, so forecasts and prediction bands are evaluated
+    without refitting. With dated samples an additive monthly seasonal index
+    is removed before fitting, and forecasts are annual (mid-year) values.
+    """
+
+    def __init__(self, districts: List[str], parameters: List[str], stations: List[str],
+                 arrays: Dict[str, np.ndarray], first_year: int, last_year: int,
+                 year_offset: float = 0.0, seasonal: bool = False, fingerprint: str = ""):
+        self.districts = list(districts)
+        self.parameters = list(parameters)
+        self.stations = list(stations)
+        self.arrays = arrays
+        self.first_year = int(first_year)
+        self.last_year = int(last_year)
+        self.year_offset = float(year_offset)
+        self.seasonal = bool(seasonal)
+        self.fingerprint = fingerprint
+        self._district_pos = {normalize_name(name): i for i, name in enumerate(self.districts)}
+        self._param_pos = {name: i for i, name in enumerate(self.parameters)}
+
+    # -- lookups -------------------------------------------------------------
+    def _d(self, district: Optional[str]) -> Optional[int]:
+        return len(self.districts) if district is None else self._district_pos.get(normalize_name(district))
+
+    def has_district(self, district: str) -> bool:
+        return normalize_name(district) in self._district_pos
+
+    def _predict(self, d: int, p: int, times: np.ndarray):
+        a = {field: self.arrays[field][d, p] for field in FIT_FIELDS}
+        mean = a["level"] + a["slope"] * (times - a["tmean"])
+        half = BAND_Z * a["sigma"] * np.sqrt(1 + 1 / a["n"] + (times - a["tmean"]) ** 2 / a["spread"])
+        return mean, half
+
+    def counts(self, district: Optional[str] = None) -> pd.Series:
+        """Samples per parameter behind each fit, e.g. for ranking parameters."""
+        d = self._d(district)
+        values = self.arrays["n"][d] if d is not None else np.zeros(len(self.parameters))
+        return pd.Series(values, index=self.parameters)
+
+    def trend(self, parameter: str, district: Optional[str] = None) -> Optional[dict]:
+        """Slope per year, fitted level at the last year and fit size; None without a usable trend."""
+        d, p = self._d(district), self._param_pos.get(parameter)
+        if d is None or p is None or np.isnan(self.arrays["slope"][d, p]):
+            return None
+        now, _ = self._predict(d, p, np.array([self.last_year + self.year_offset]))
+        return {
+            "slope": float(self.arrays["slope"][d, p]),
+            "now": float(now[0]),
+            "n": int(self.arrays["n"][d, p]),
+            "sigma": float(self.arrays["sigma"][d, p]),
+            "last": int(np.floor(self.arrays["last"][d, p])),
+        }
+
+    def forecast(self, parameter: str, district: Optional[str] = None, horizon: int = HORIZON,
+                 start: Optional[int] = None) -> pd.DataFrame:
+        """Trend value with a 90% prediction band per year, from ``start`` (default: next year) to the horizon."""
+        d, p = self._d(district), self._param_pos.get(parameter)
+        if d is None or p is None or np.isnan(self.arrays["slope"][d, p]):
+            return pd.DataFrame(columns=["forecast", "lower", "upper"], dtype=float)
+        years = np.arange(self.last_year + 1 if start is None else start, self.last_year + horizon + 1)
+        mean, half = self._predict(d, p, years + self.year_offset)
+        # Concentrations cannot go negative
+        return pd.DataFrame({
+            "forecast": np.maximum(mean, 0),
+            "lower": np.maximum(mean - half, 0),
+            "upper": np.maximum(mean + half, 0),
+        }, index=pd.Index(years, name="year"))
+
+    def outlook(self, district: Optional[str] = None, parameters: Optional[Sequence[str]] = None,
+                horizon: int = HORIZON) -> pd.DataFrame:
+        """Current level, slope, horizon forecast and the year a BIS limit is reached, per parameter."""
+        d = self._d(district)
+        target = self.last_year + horizon
+        rows = {}
+        for parameter in parameters if parameters is not None else self.parameters:
+            p = self._param_pos.get(parameter)
+            if d is None or p is None or np.isnan(self.arrays["slope"][d, p]):
+                continue
+            slope = float(self.arrays["slope"][d, p])
+            (now, ahead), (_, half) = self._predict(d, p, np.array([self.last_year, target]) + self.year_offset)
+            spec = STANDARDS.get(parameter_for_column(parameter) or "")
+            limit = crossing = np.nan
+            if spec:
+                limit = spec["permissible"]
+                bound = limit if slope > 0 else spec.get("lower")
+                inside = now < spec["permissible"] and now > spec.get("lower", -np.inf)
+                if bound is not None and slope != 0 and inside:
+                    level, tmean = self.arrays["level"][d, p], self.arrays["tmean"][d, p]
+                    year = int(np.ceil(tmean + (bound - level) / slope - self.year_offset))
+                    crossing = year if year <= target else np.nan
+            rows[parameter] = {
+                "n": int(self.arrays["n"][d, p]), "now": max(now, 0.0), "slope": slope,
+                "forecast": max(ahead, 0.0), "lower": max(ahead - half, 0.0), "upper": max(ahead + half, 0.0),
+                "limit": limit, "crossing": crossing,
+            }
+        return pd.DataFrame.from_dict(rows, orient="index",
+                                      columns=["n", "now", "slope", "forecast", "lower", "upper", "limit", "crossing"])
+
+    def station_trends(self, parameter: str, district: Optional[str] = None, limit: Optional[int] = 10,
+                       rising: bool = True) -> pd.DataFrame:
+        """Stations ranked by slope (steepest rise first, or steepest fall with ``rising=False``)."""
+        columns = ["station", "district", "slope", "now", "n", "last"]
+        p, d = self._param_pos.get(parameter), self._d(district)
+        if p is None or d is None or not self.stations:
+            return pd.DataFrame(columns=columns)
+        a = self.arrays
+        mask = a["station_param"] == p
+        if district is not None:
+            mask &= a["station_district"] == d
+        ids = np.flatnonzero(mask)
+        order = np.argsort(-a["station_slope"][ids] if rising else a["station_slope"][ids], kind="stable")
+        ids = ids[order[:limit] if limit else order]
+        district_names = np.array(self.districts + [""], dtype=object)
+        now = a["station_level"][ids] + a["station_slope"][ids] * (self.last_year + self.year_offset - a["station_tmean"][ids])
+        return pd.DataFrame({
+            "station": np.array(self.stations, dtype=object)[a["station_id"][ids]],
+            "district": district_names[a["station_district"][ids]],
+            "slope": a["station_slope"][ids],
+            "now": np.maximum(now, 0),
+            "n": a["station_n"][ids].astype(int),
+            "last": np.floor(a["station_last"][ids]).astype(int),
+        }, columns=columns)
+
+    def describe(self, district: Optional[str] = None, parameters: Optional[Sequence[str]] = None,
+                 horizon: int = HORIZON, stations: int = 3) -> str:
+        """Compact forecast table for a prompt, with the fastest-rising wells of the leading parameters."""
+        outlook = self.outlook(district, parameters, horizon)
+        if outlook.empty:
+            return ""
+        target = self.last_year + horizon
+        lines = [
+            f"Trend forecast: least-squares fit on {self.first_year}-{self.last_year} samples"
+            f"{', seasonally adjusted' if self.seasonal else ''}; band = 90% prediction interval; "
+            f"crosses = year the BIS limit is reached within the horizon.",
+            FORECAST_HEADER.format(year=target),
+        ]
+        for parameter, row in outlook.iterrows():
+            spec = STANDARDS.get(parameter_for_column(parameter) or "")
+            lines.append("|".join([
+                str(parameter), spec["unit"] if spec else "", str(int(row["n"])), _fmt(row["now"]),
+                f"{row['slope']:+.3g}", _fmt(row["forecast"]), f"{_fmt(row['lower'])}-{_fmt(row['upper'])}",
+                _fmt(row["limit"]), "-" if pd.isna(row["crossing"]) else str(int(row["crossing"])),
+            ]))
+        if stations:
+            for parameter in outlook.index[:2]:
+                wells = self.station_trends(parameter, district, limit=stations)
+                wells = wells[wells["slope"] > 0]
+                if not wells.empty:
+                    lines.append(f"Fastest-rising wells ({parameter}/yr): " + ", ".join(
+                        f"{row.station} {row.slope:+.3g}" for row in wells.itertuples()))
+        return "\n".join(lines)
+
+    # -- persistence ---------------------------------------------------------
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = json.dumps({
+            "districts": self.districts, "parameters": self.parameters, "stations": self.stations,
+            "first_year": self.first_year, "last_year": self.last_year, "year_offset": self.year_offset,
+            "seasonal": self.seasonal, "fingerprint": self.fingerprint,
+        })
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, meta=np.array(meta), **self.arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "ForecastEngine":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+        return cls(meta["districts"], meta["parameters"], meta["stations"], arrays, meta["first_year"],
+                   meta["last_year"], meta["year_offset"], meta["seasonal"], meta["fingerprint"])
+
+
+def fit_forecaster(df: pd.DataFrame, seasonal: Optional[bool] = None,
+                   fingerprint: Optional[str] = None) -> Optional[ForecastEngine]:
+    """Fit every district and station trend for every parameter; None without a year/date column.
+
+    The only Python loop is over parameters; each iteration fits all series of
+    that parameter with ``fit_trends``. ``seasonal=None`` removes a monthly
+    seasonal index when the time column holds dates covering several months.
+    """
+    year_col = find_column(df.columns, YEAR_KEYWORDS)
+    if year_col is None:
+        return None
+    t, months = decimal_years(df[year_col])
+    if np.isnan(t).all():
+        return None
+    if seasonal is None:
+        seasonal = months is not None and np.unique(months[~np.isnan(t)]).size > 1
+    seasonal = bool(seasonal and months is not None)
+    parameters = parameter_columns(df)
+
+    district_col = find_column(df.columns, DISTRICT_KEYWORDS)
+    if district_col is not None:
+        names = normalize_names(df[district_col])
+        districts = [str(name) for name in names.cat.categories]
+        d_codes = names.cat.codes.to_numpy().astype(np.int64)
+    else:
+        districts, d_codes = [], np.full(len(df), -1, dtype=np.int64)
+    station_col = find_column(df.columns, STATION_KEYWORDS)
+    if station_col is not None:
+        station_names = normalize_names(df[station_col])
+        stations = [str(name) for name in station_names.cat.categories]
+        s_codes = station_names.cat.codes.to_numpy().astype(np.int64)
+    else:
+        stations, s_codes = [], np.full(len(df), -1, dtype=np.int64)
+
+    D, P, S = len(districts) + 1, len(parameters), len(stations)
+    # Rows without a district only reach the whole-dataset slot
+    slots = np.where(d_codes >= 0, d_codes, D - 1)
+    # A station belongs to the district of its last row
+    station_district = np.full(S, D - 1, dtype=np.int64)
+    station_district[s_codes[s_codes >= 0]] = slots[s_codes >= 0]
+
+    arrays = {field: np.full((D, P), np.nan) for field in FIT_FIELDS}
+    if seasonal:
+        arrays["seasonal"] = np.zeros((D, P, 12))
+    station_parts = {field: [] for field in STATION_FIELDS + ("id", "param")}
+
+    for p, col in enumerate(parameters):
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+        rows = np.flatnonzero(~np.isnan(values) & ~np.isnan(t))
+        if rows.size == 0:
+            continue
+        y, times = values[rows], t[rows]
+        row_slots = slots[rows]
+        # Each sample counts towards its district and towards the whole dataset
+        has_district = row_slots < D - 1
+        series = np.concatenate([row_slots[has_district], np.full(rows.size, D - 1)])
+        series_t = np.concatenate([times[has_district], times])
+        series_y = np.concatenate([y[has_district], y])
+        season = None
+        if seasonal:
+            series_m = np.concatenate([months[rows][has_district], months[rows]])
+            first = fit_trends(series, series_t, series_y, D)
+            season = seasonal_index(series, series_m, first["residual"], D)
+            arrays["seasonal"][:, p] = season
+            series_y = series_y - season[series, series_m]
+        fit = fit_trends(series, series_t, series_y, D)
+        for field in FIT_FIELDS:
+            arrays[field][:, p] = fit[field]
+
+        if S:
+            on_station = s_codes[rows] >= 0
+            station_y = y[on_station]
+            if season is not None:
+                # Stations are too sparse for their own seasonal index; use their district's
+                station_y = station_y - season[row_slots[on_station], months[rows][on_station]]
+            station_fit = fit_trends(s_codes[rows][on_station], times[on_station], station_y, S)
+            usable = np.flatnonzero(~np.isnan(station_fit["slope"]))
+            station_parts["id"].append(usable)
+            station_parts["param"].append(np.full(usable.size, p))
+            for field in STATION_FIELDS:
+                station_parts[field].append(station_fit[field][usable])
+
+    ids = np.concatenate(station_parts["id"]) if station_parts["id"] else np.empty(0, dtype=np.int64)
+    arrays["station_id"] = ids.astype(np.int32)
+    arrays["station_param"] = (np.concatenate(station_parts["param"]) if station_parts["param"]
+                               else np.empty(0)).astype(np.int16)
+    arrays["station_district"] = station_district[ids].astype(np.int32)
+    for field in STATION_FIELDS:
+        arrays[f"station_{field}"] = (np.concatenate(station_parts[field]) if station_parts[field]
+                                      else np.empty(0))
+
+    valid_t = t[~np.isnan(t)]
+    return ForecastEngine(districts, parameters, stations, arrays, int(np.floor(valid_t.min())),
+                          int(np.floor(valid_t.max())), 0.5 if months is not None else 0.0, seasonal,
+                          fingerprint or dataset_fingerprint(df))
+
+
+def load_or_fit_forecaster(df: pd.DataFrame, cache_dir: str = CUBE_DIR,
+                           version: Optional[str] = None) -> Optional[ForecastEngine]:
+    """Reuse the persisted fits for this dataset version, fitting them on first use."""
+    # Keyed like the cube: the data version, or a hash of every row without one
+    fingerprint = cache_token(version) if version else content_fingerprint(df)
+    path = os.path.join(cache_dir, f"forecast-{fingerprint}.npz")
+    if os.path.exists(path):
+        try:
+            return ForecastEngine.load(path)
+        except (OSError, ValueError, KeyError):
+            pass
+    engine = fit_forecaster(df, fingerprint=fingerprint)
+    if engine is not None:
+        try:
+            engine.save(path)
+        except OSError:
+            # A read-only deployment still gets the in-memory fits
+            pass
+    return engine
@@ -1,60 +1,130 @@
+import hashlib
+import logging
+
+import numpy as np
 import pandas as pd
 
-def get_data_summary(df: pd.DataFrame) -> str:
-    # Print debug information
-    print("\n=== Debug Info ===")
-    print(f"DataFrame shape: {df.shape}")
-    print("Columns in DataFrame:", list(df.columns))
-    print("First few rows:")
-    print(df.head(2).to_string())
-    print("=================\n")
-    
-    # Try to find the state column with various possible names
-    state_col = None
-    for col in df.columns:
-        if 'state' in str(col).lower() or 'stn_name' in str(col).lower():
-            state_col = col
-            break
-    
-    # Try to find district column
-    district_col = None
-    for col in df.columns:
-        if 'district' in str(col).lower() or 'location' in str(col).lower():
-            district_col = col
-            break
-    
-    # Try to find year column
-    year_col = None
+logger = logging.getLogger(__name__)
+
+# Summaries keyed by data version; a handful of datasets per process at most
+_CACHE_SIZE = 8
+_SUMMARY_CACHE = {}
+
+# Column-name heuristics shared by every module that needs to locate these fields
+STATE_KEYWORDS = ('state', 'stn_name')
+DISTRICT_KEYWORDS = ('district', 'location')
+# Columns holding a plain year number; YEAR_KEYWORDS also accepts a sampling date
+YEAR_NUMBER_KEYWORDS = ('year', 'yr')
+YEAR_KEYWORDS = ('year', 'date', 'yr')
+STATION_KEYWORDS = ('stn_name', 'station', 'well', 'site', 'village')
+LATITUDE_KEYWORDS = ('latitude', 'lat')
+LONGITUDE_KEYWORDS = ('longitude', 'long', 'lon')
+
+def find_column(columns, keywords):
+    """Return the first column whose name contains any of the keywords."""
+    for col in columns:
+        if any(key in str(col).lower() for key in keywords):
+            return col
+    return None
+
+def normalize_column_names(columns) -> pd.Index:
+    """Strip surrounding whitespace and embedded line breaks from header names."""
+    return pd.Index(columns).astype(str).str.strip().str.replace('\n', '').str.replace('\r', '')
+
+def normalize_names(series: pd.Series) -> pd.Series:
+    """Categorical of whitespace-collapsed, title-cased names.
+
+    Only the distinct values are normalized; rows are remapped through their codes.
+    """
+    categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+    categories = categorical.cat.categories
+    normalized = pd.Index([" ".join(str(value).split()).title() for value in categories])
+    if normalized.equals(categories):
+        return categorical
+    unique = pd.Index(normalized.unique())
+    remap = np.append(unique.get_indexer(normalized), -1)
+    codes = remap[categorical.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, unique), index=series.index, name=series.name)
+
+def dataset_fingerprint(df: pd.DataFrame, sample_rows: int = 1000) -> str:
+    """Cheap identity for a frame: shape, schema and a hash of evenly spaced rows."""
+    positions = np.unique(np.linspace(0, len(df) - 1, min(len(df), sample_rows)).astype(int)) if len(df) else []
+    sample = df.iloc[positions]
+    # Hash sampled category codes plus table sizes, not the (possibly huge) category tables
+    categorical = [col for col in sample.columns if isinstance(sample[col].dtype, pd.CategoricalDtype)]
+    category_sizes = [len(df[col].cat.categories) for col in categorical]
+    if categorical:
+        sample = sample.copy()
+        for col in categorical:
+            sample[col] = sample[col].cat.codes
+    row_hash = pd.util.hash_pandas_object(sample, index=False).to_numpy() if len(sample) else np.array([], dtype=np.uint64)
+    digest = hashlib.sha256()
+    digest.update(repr((df.shape, [str(c) for c in df.columns], [str(t) for t in df.dtypes], category_sizes)).encode("utf-8"))
+    digest.update(row_hash.tobytes())
+    return digest.hexdigest()[:16]
+
+def content_fingerprint(df: pd.DataFrame) -> str:
+    """Hash of every row, so any corrected value changes it (unlike the sampled ``dataset_fingerprint``)."""
+    digest = hashlib.sha256()
+    digest.update(repr((df.shape, [str(c) for c in df.columns], [str(t) for t in df.dtypes])).encode("utf-8"))
     for col in df.columns:
-        if 'year' in str(col).lower() or 'date' in str(col).lower() or 'yr' in str(col).lower():
-            year_col = col
-            break
-    
-    # Process states
-    states = df[state_col].astype(str).str.strip().str.replace(r"\s+", " ", regex=True).str.title() if state_col is not None else pd.Series()
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Codes plus the category table hash the same as the labels, without expanding them
+            digest.update(pd.util.hash_pandas_object(series.cat.categories.to_series(), index=False).to_numpy().tobytes())
+            digest.update(series.cat.codes.to_numpy().tobytes())
+        else:
+            digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def cache_token(version: str) -> str:
+    """File-name-safe token for a data version string such as "catalog-ab12|Gujarat"."""
+    return hashlib.sha256(str(version).encode("utf-8")).hexdigest()[:16]
+
+def count_unique_names(series: pd.Series) -> int:
+    names = normalize_names(series)
+    codes = names.cat.codes.to_numpy()
+    return int(np.unique(codes[codes >= 0]).size)
+
+def _remember(cache: dict, key, value):
+    cache[key] = value
+    while len(cache) > _CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    return value
+
+def get_data_summary(df: pd.DataFrame, version: str = None) -> str:
+    # Keyed like the cube: the data version, or a hash of every row without one
+    fingerprint = cache_token(version) if version else content_fingerprint(df)
+    if fingerprint in _SUMMARY_CACHE:
+        return _SUMMARY_CACHE[fingerprint]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("DataFrame shape: %s", df.shape)
+        logger.debug("Columns in DataFrame: %s", list(df.columns))
+        logger.debug("First few rows:\n%s", df.head(2).to_string())
     
-    # Process districts
-    districts = df[district_col].astype(str).str.strip().str.replace(r"\s+", " ", regex=True).str.title() if district_col is not None else pd.Series()
+    state_col = find_column(df.columns, STATE_KEYWORDS)
+    district_col = find_column(df.columns, DISTRICT_KEYWORDS)
+    year_col = find_column(df.columns, YEAR_KEYWORDS)
     
-    # Process years
-    years = pd.to_numeric(df[year_col], errors='coerce') if year_col is not None else pd.Series()
+    # Uniques are counted on categorical codes, so only distinct names get normalized
+    num_states = count_unique_names(df[state_col]) if state_col is not None else 0
+    num_districts = count_unique_names(df[district_col]) if district_col is not None else 0
     
-    # Calculate metrics
-    num_states = states.nunique() if not states.empty else 0
-    num_districts = districts.nunique() if not districts.empty else 0
+    years = to_year(df[year_col]) if year_col is not None else pd.Series(dtype=float)
     year_min = int(years.min()) if not years.empty and not pd.isna(years.min()) else 'N/A'
     year_max = int(years.max()) if not years.empty and not pd.isna(years.max()) else 'N/A'
-    return f"""
-    Loaded groundwater quality dataset with {len(df)} samples.
-
-    Columns: {', '.join(df.columns.tolist())}
+    return _remember(_SUMMARY_CACHE, fingerprint, f"""
+    Loaded groundwater quality dataset with {len(df)} samples and {len(df.columns)} columns.
 
     Coverage:
     - States: {num_states}
     - Districts: {num_districts}
     - Years: {year_min}-{year_max}
+    """)
 
-    Sample data:
-    {df.head(3).to_string()}
-    """
-
+def to_year(series: pd.Series) -> pd.Series:
+    """Year as a float series from either a numeric year or a date-like column."""
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce').astype(float)
+    return pd.to_datetime(series, errors='coerce', format='mixed', dayfirst=True).dt.year.astype(float)
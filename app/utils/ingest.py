@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from app.utils.data_loader import STORE_DIR, detect_encoding, manifest_path, optimize_dtypes, read_manifest
+from app.utils.helpers import (
+    DISTRICT_KEYWORDS, STATION_KEYWORDS, YEAR_KEYWORDS, find_column, normalize_column_names, to_year
+)
+
+# A sampling date, not just the year the partition is keyed on
+SAMPLE_DATE_KEYWORDS = ('date',)
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def write_manifest(manifest: dict, store_dir: str = STORE_DIR) -> None:
+    # Write-then-rename so readers never see a half-written manifest
+    path = manifest_path(store_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _partition_value(value) -> str:
+    if value is None or pd.isna(value):
+        return "unknown"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return re.sub(r"[^\w.-]+", "_", " ".join(str(value).split()).title()).strip("_") or "unknown"
+
+
+def read_delta_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                      encoding: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Stream a delta file with the same header/row cleaning as clean_data.py; the encoding is detected if not given."""
+    for chunk in pd.read_csv(path, encoding=encoding or detect_encoding(path), chunksize=chunksize):
+        chunk.columns = normalize_column_names(chunk.columns)
+        chunk = chunk.dropna(how='all')
+        if not chunk.empty:
+            yield chunk
+
+
+def _partition_keys(chunk: pd.DataFrame) -> pd.Series:
+    year_col = find_column(chunk.columns, YEAR_KEYWORDS)
+    district_col = find_column(chunk.columns, DISTRICT_KEYWORDS)
+    years = to_year(chunk[year_col]) if year_col is not None else pd.Series(float("nan"), index=chunk.index)
+    districts = chunk[district_col] if district_col is not None else pd.Series(None, index=chunk.index)
+    year_part = years.map(_partition_value)
+    district_part = districts.astype(object).map(_partition_value)
+    return "year=" + year_part + "/district=" + district_part
+
+
+def _dedupe(frame: pd.DataFrame) -> pd.DataFrame:
+    station_col = find_column(frame.columns, STATION_KEYWORDS)
+    date_col = find_column(frame.columns, SAMPLE_DATE_KEYWORDS)
+    if station_col is None or date_col is None or station_col == date_col:
+        # Several readings per station and year are normal; only identical rows are repeats
+        return frame.drop_duplicates(keep='last')
+    # Later readings win, so a corrected delta overwrites the earlier value
+    return frame.drop_duplicates(subset=[station_col, date_col], keep='last')
+
+
+def ingest_delta(path: str, store_dir: str = STORE_DIR, chunksize: int = DEFAULT_CHUNKSIZE,
+                 encoding: Optional[str] = None) -> dict:
+    """Append a delta file to the partitioned store.
+
+    Only partitions that receive rows are read and rewritten, so the cost is
+    proportional to the delta rather than the full history. Returns a report
+    listing the affected partitions for cache invalidation.
+    """
+    started = time.perf_counter()
+    pending: Dict[str, List[pd.DataFrame]] = {}
+    rows_read = 0
+    for chunk in read_delta_chunks(path, chunksize=chunksize, encoding=encoding):
+        rows_read += len(chunk)
+        for key, part in chunk.groupby(_partition_keys(chunk), sort=False):
+            pending.setdefault(key, []).append(part)
+
+    manifest = read_manifest(store_dir)
+    rows_written = 0
+    duplicates = 0
+    for key, parts in pending.items():
+        part_dir = os.path.join(store_dir, *key.split("/"))
+        os.makedirs(part_dir, exist_ok=True)
+        part_file = os.path.join(part_dir, "data.parquet")
+        # Same dtype/name normalization as the stored rows so duplicates compare equal
+        incoming = optimize_dtypes(pd.concat(parts, ignore_index=True))
+        existing = pd.read_parquet(part_file) if os.path.exists(part_file) else None
+        combined = incoming if existing is None else pd.concat(
+            [existing.astype(object), incoming.astype(object)], ignore_index=True
+        )
+        merged = _dedupe(combined)
+        duplicates += len(combined) - len(merged)
+        rows_written += len(merged) - (len(existing) if existing is not None else 0)
+        optimize_dtypes(merged.infer_objects()).to_parquet(part_file + ".tmp", engine="pyarrow", index=False)
+        os.replace(part_file + ".tmp", part_file)
+
+        entry = manifest["partitions"].get(key, {"version": 0})
+        manifest["partitions"][key] = {
+            "path": os.path.relpath(part_file, store_dir),
+            "version": entry["version"] + 1,
+            "rows": len(merged),
+            "updated": time.time(),
+        }
+
+    if pending:
+        manifest["version"] = manifest.get("version", 0) + 1
+        write_manifest(manifest, store_dir)
+
+    return {
+        "rows_read": rows_read,
+        "rows_added": rows_written,
+        "duplicates": duplicates,
+        "partitions": sorted(pending),
+        "store_version": manifest.get("version", 0),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def list_partitions(store_dir: str = STORE_DIR, years: Optional[List[int]] = None,
+                    districts: Optional[List[str]] = None) -> Dict[str, dict]:
+    """Manifest entries, optionally filtered by year and district."""
+    wanted_years = {_partition_value(year) for year in years} if years else None
+    wanted_districts = {_partition_value(name) for name in districts} if districts else None
+    selected = {}
+    for key, entry in read_manifest(store_dir)["partitions"].items():
+        year_part, district_part = (piece.split("=", 1)[1] for piece in key.split("/"))
+        if wanted_years is not None and year_part not in wanted_years:
+            continue
+        if wanted_districts is not None and district_part not in wanted_districts:
+            continue
+        selected[key] = entry
+    return selected
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.utils.ingest DELTA.csv [DELTA.csv ...]")
+        sys.exit(1)
+    for delta in sys.argv[1:]:
+        report = ingest_delta(delta)
+        print(f"{delta}: +{report['rows_added']} rows, {report['duplicates']} duplicates, "
+              f"{len(report['partitions'])} partitions in {report['seconds']}s")
@@ -0,0 +1,131 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+
+metrics_logger = logging.getLogger("hydroai.metrics")
+
+ROLLING_WINDOW = int(os.getenv("HYDROAI_METRICS_WINDOW", "200"))
+
+
+def configure_metrics_logging() -> None:
+    """Send one JSON line per rerun to stderr unless logging is already set up."""
+    if not metrics_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        metrics_logger.addHandler(handler)
+        metrics_logger.setLevel(os.getenv("HYDROAI_METRICS_LEVEL", "INFO"))
+        metrics_logger.propagate = False
+
+
+class StageStats:
+    """Process-wide rolling window of stage durations across all sessions."""
+
+    def __init__(self, window: int = ROLLING_WINDOW):
+        self.window = window
+        self._durations = defaultdict(lambda: deque(maxlen=self.window))
+        self._counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, stages: Dict[str, float], counters: Dict[str, float]) -> None:
+        with self._lock:
+            for name, seconds in stages.items():
+                self._durations[name].append(seconds)
+            for name, value in counters.items():
+                self._counters[name] += value
+
+    def summary(self) -> list:
+        """Rows of stage, count, p50_ms, p95_ms, max_ms ordered by p95."""
+        with self._lock:
+            snapshot = {name: np.fromiter(values, dtype=float) for name, values in self._durations.items()}
+        rows = []
+        for name, values in snapshot.items():
+            if len(values):
+                p50, p95 = np.percentile(values, [50, 95]) * 1000
+                rows.append({"stage": name, "count": len(values), "p50_ms": round(p50, 2),
+                             "p95_ms": round(p95, 2), "max_ms": round(values.max() * 1000, 2)})
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+
+STAGE_STATS = StageStats()
+
+
+class RerunProfiler:
+    """Timers and counters for a single script rerun."""
+
+    def __init__(self, session_id: Optional[str] = None, stats: StageStats = STAGE_STATS):
+        self.session_id = session_id
+        self.stats = stats
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, float] = defaultdict(int)
+        self.tags: Dict[str, object] = {}
+        self._open: Dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def begin(self, name: str) -> None:
+        """Start a stage that spans code too long to wrap in ``with``; close it with ``end``."""
+        self._open[name] = time.perf_counter()
+
+    def end(self, name: str) -> None:
+        started = self._open.pop(name, None)
+        if started is not None:
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def timed(self, name: str):
+        """Decorator form of ``stage``."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def tag(self, **tags) -> None:
+        self.tags.update(tags)
+
+    def finish(self) -> dict:
+        self.stages["total"] = time.perf_counter() - self._started
+        record = {
+            "event": "rerun",
+            "ts": time.time(),
+            "session": self.session_id,
+            "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+            **self.tags,
+        }
+        self.stats.record(self.stages, self.counters)
+        if metrics_logger.isEnabledFor(logging.INFO):
+            metrics_logger.info(json.dumps(record, default=str))
+        return record
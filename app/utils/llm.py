@@ -0,0 +1,106 @@
+import os
+import time
+from typing import Iterable, Iterator, Sequence
+
+MODEL_NAME = "gemini-1.5-flash"
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Offline stand-in for ``genai.GenerativeModel`` with the same call shape."""
+
+    def __init__(self, model_name: str = MODEL_NAME, reply: str = None, delay: float = 0.0):
+        self.model_name = model_name
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    def _answer(self, prompt: str) -> str:
+        if self.reply is not None:
+            return self.reply
+        question = prompt.strip().splitlines()[-1] if prompt.strip() else ""
+        return f"[stub {self.model_name}] {len(prompt)} prompt chars. {question.strip()}"
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        self.calls += 1
+        if stream:
+            return self._stream(self._answer(prompt))
+        if self.delay:
+            time.sleep(self.delay)
+        return StubResponse(self._answer(prompt))
+
+    def _stream(self, text: str) -> Iterator[StubResponse]:
+        # Word-sized chunks, spreading the configured delay across them
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if self.delay:
+                time.sleep(self.delay / len(words))
+            yield StubResponse(word if i == len(words) - 1 else word + " ")
+
+
+_configured = False
+
+
+def cache_model_name(model_name: str = MODEL_NAME, stub: bool = None) -> str:
+    """Model name used in cache keys and report job ids.
+
+    Stub answers get their own name so they never land under the keys real
+    answers are cached and resumed by. ``stub`` defaults to HYDROAI_STUB_LLM.
+    """
+    if stub is None:
+        stub = bool(os.getenv("HYDROAI_STUB_LLM"))
+    return f"stub-{model_name}" if stub else model_name
+
+
+def get_model(model_name: str = MODEL_NAME):
+    """Return the Gemini model, or the stub when HYDROAI_STUB_LLM is set.
+
+    The SDK is imported and configured on first use only; it is the slowest
+    import in the app and most reruns never call the model.
+    """
+    global _configured
+    if os.getenv("HYDROAI_STUB_LLM"):
+        return StubModel(model_name)
+    import google.generativeai as genai
+    if not _configured:
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        _configured = True
+    return genai.GenerativeModel(model_name)
+
+
+def iter_text(response) -> Iterator[str]:
+    """Yield the text of each chunk from a ``stream=True`` response."""
+    for chunk in response:
+        text = getattr(chunk, "text", "")
+        if text:
+            yield text
+
+
+def strip_unwanted(chunks: Iterable[str], unwanted: Sequence[str]) -> Iterator[str]:
+    """Remove boilerplate phrases from a text stream, even when split across chunks.
+
+    Holds back just enough trailing characters to catch a phrase spanning a chunk
+    boundary and trims surrounding whitespace like ``str.strip`` on the full text.
+    """
+    unwanted = [phrase for phrase in unwanted if phrase]
+    hold = max((len(phrase) for phrase in unwanted), default=1) - 1
+    buffer = ""
+    started = False
+    for chunk in chunks:
+        buffer += chunk
+        for phrase in unwanted:
+            buffer = buffer.replace(phrase, "")
+        if not started:
+            buffer = buffer.lstrip()
+        if len(buffer) > hold:
+            cut = len(buffer) - hold
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+            started = True
+    buffer = buffer.rstrip() if started else buffer.strip()
+    if buffer:
+        yield buffer
@@ -0,0 +1,201 @@
+import re
+from typing import Optional, Sequence, Tuple
+
+import pandas as pd
+
+from app.utils.context_builder import build_context, estimate_tokens, select_parameters
+from app.utils.response_cache import fingerprint
+
+# Parameters with a trend forecast in Predictive Modeling prompts
+FORECAST_PARAMETERS = 6
+
+# Region named in whole-dataset prompts when the data carries no state labels (the original Gujarat file)
+DEFAULT_SCOPE = "Gujarat"
+
+# A question leans on earlier turns when it opens with a continuation or a pronoun ("And Surat?",
+# "What about nitrate?", "Those wells..."), cites an earlier answer, or names no place at all
+FOLLOW_UP_OPENERS = ("and", "also", "but", "so", "then", "now", "what about", "how about", "what else",
+                     "same", "it", "its", "they", "them", "their", "that", "those", "these")
+BACK_REFERENCES = ("you mentioned", "you said", "you suggested", "previous", "earlier", "as above", "the same",
+                   "last answer", "that district", "those districts", "these districts")
+# Scope words that make a question about the whole dataset self-contained
+DATASET_SCOPE_WORDS = ("dataset", "all districts", "every district", "each district", "across districts",
+                       "statewide", "whole state", "entire state", "overall", "all states")
+# Very short messages ("and Surat?", "why?") are follow-ups too
+FOLLOW_UP_MAX_WORDS = 4
+
+CITY_PROMPT = """
+You are HydroAI, an advanced groundwater intelligence system analyzing data for {city_name}
+Current Analysis Mode: {analysis_mode}
+
+🌊 CITY DATA ANALYSIS - {city_upper}:
+- Total samples: {sample_count:,}
+
+📈 PARAMETER SUMMARY:
+{city_context}
+{conversation}
+🎯 USER QUERY: {prompt}
+
+Provide a comprehensive analysis with:
+1. Key findings and insights
+2. Water quality assessment
+3. Potential concerns or recommendations
+4. Future predictions if applicable
+
+Use emojis and formatting for better readability. Keep response engaging and professional.
+"""
+
+DATASET_PROMPT = """
+You are HydroAI, an advanced groundwater intelligence system for {scope}.
+Current Analysis Mode: {analysis_mode}
+
+🌊 {scope_upper} GROUNDWATER DATASET:
+{data_summary}
+
+📈 PARAMETER SUMMARY:
+{dataset_context}
+{conversation}
+🎯 USER QUERY: {prompt}
+
+Provide insights based on the dataset with:
+1. Quantitative analysis with specific numbers
+2. Regional patterns and trends
+3. Water quality assessment
+4. Actionable recommendations
+
+Use emojis and professional formatting. Be concise but comprehensive.
+"""
+
+CONVERSATION_SECTION = """
+🧠 CONVERSATION SO FAR:
+{conversation}
+"""
+
+SUMMARY_PROMPT = """
+You maintain HydroAI's memory of a conversation about groundwater data.
+Merge the new messages into the existing summary. Keep districts, parameters,
+numbers and conclusions the user may refer back to; drop greetings and formatting.
+Reply with at most 8 short lines.
+
+EXISTING SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{transcript}
+"""
+
+PHRASING_PROMPT = """
+You are HydroAI. Rephrase the computed result below as a short, friendly answer to the user's question.
+Do not change or add any numbers.
+
+🎯 USER QUERY: {prompt}
+
+📊 COMPUTED RESULT:
+{result}
+"""
+
+
+def scope_label(states: Sequence[str] = ()) -> str:
+    """"Gujarat", "Gujarat and Rajasthan", "Gujarat, Karnataka and Rajasthan"; the default without states."""
+    states = [str(state) for state in states]
+    if not states:
+        return DEFAULT_SCOPE
+    return states[0] if len(states) == 1 else f"{', '.join(states[:-1])} and {states[-1]}"
+
+
+def is_follow_up(prompt: str, places: Sequence[str] = ()) -> bool:
+    """True when a question needs the conversation: short, opening with a continuation or
+    pronoun, citing an earlier answer, or naming none of ``places`` (the matched district,
+    the states in scope) nor a dataset-wide scope.
+    """
+    words = re.findall(r"[a-z']+", prompt.lower())
+    if len(words) <= FOLLOW_UP_MAX_WORDS:
+        return True
+    text = " " + " ".join(words) + " "
+    if any(text.startswith(f" {opener} ") for opener in FOLLOW_UP_OPENERS):
+        return True
+    if any(f" {phrase} " in text for phrase in BACK_REFERENCES):
+        return True
+    named = [" ".join(re.findall(r"[a-z']+", str(place).lower())) for place in places if place]
+    return not any(f" {phrase} " in text for phrase in DATASET_SCOPE_WORDS + tuple(named))
+
+
+def _conversation_section(conversation: str) -> str:
+    return CONVERSATION_SECTION.format(conversation=conversation) if conversation else ""
+
+
+def build_city_prompt(city: str, analysis_mode: str, sample_count: int, city_context: str, prompt: str,
+                      conversation: str = "") -> str:
+    return CITY_PROMPT.format(
+        city_name=city,
+        city_upper=city.upper(),
+        analysis_mode=analysis_mode,
+        sample_count=sample_count,
+        city_context=city_context,
+        conversation=_conversation_section(conversation),
+        prompt=prompt
+    )
+
+
+def build_dataset_prompt(analysis_mode: str, data_summary: str, dataset_context: str, prompt: str,
+                         conversation: str = "", scope: str = DEFAULT_SCOPE) -> str:
+    return DATASET_PROMPT.format(
+        scope=scope,
+        scope_upper=scope.upper(),
+        analysis_mode=analysis_mode,
+        data_summary=data_summary.strip(),
+        dataset_context=dataset_context,
+        conversation=_conversation_section(conversation),
+        prompt=prompt
+    )
+
+
+def build_summary_prompt(summary: str, transcript: str) -> str:
+    return SUMMARY_PROMPT.format(summary=summary or "(none)", transcript=transcript)
+
+
+def build_phrasing_prompt(prompt: str, result: str) -> str:
+    return PHRASING_PROMPT.format(prompt=prompt, result=result)
+
+
+def _with_forecast(context: str, context_report: dict, df: pd.DataFrame, prompt: str, analysis_mode: str,
+                   forecaster, district: Optional[str] = None) -> str:
+    if analysis_mode != "Predictive Modeling" or forecaster is None:
+        return context
+    if district is not None and not forecaster.has_district(district):
+        return context
+    parameters = select_parameters(df, prompt, FORECAST_PARAMETERS, counts=forecaster.counts(district))
+    forecast = forecaster.describe(district, [col for col in parameters if col in forecaster.parameters])
+    if not forecast:
+        return context
+    context_report["tokens"] += estimate_tokens(forecast) + 1
+    context_report["chars"] += len(forecast) + 2
+    return f"{context}\n\n{forecast}"
+
+
+def build_analysis_prompt(df: pd.DataFrame, prompt: str, analysis_mode: str, data_summary: str,
+                          city: Optional[str] = None, city_data: Optional[pd.DataFrame] = None,
+                          cube=None, forecaster=None, conversation: str = "",
+                          scope: str = DEFAULT_SCOPE) -> Tuple[str, dict, str]:
+    """Context-grounded prompt for a question about one district or the whole dataset.
+
+    Shared by the chat and the batch report CLI so both send the same prompt.
+    In Predictive Modeling mode a ``forecaster`` adds fitted trends and
+    forecasts for the most relevant parameters; ``conversation`` is the chat
+    memory, only sent (and only part of the fingerprint) for follow-up
+    questions, so a self-contained question hits the cache on any turn.
+    ``scope`` names the states a whole-dataset prompt covers (see ``scope_label``).
+    Returns the prompt text, the context size report and a fingerprint of the
+    context for cache keys.
+    """
+    if not is_follow_up(prompt, [city] + re.split(r",\s*|\s+and\s+", scope)):
+        conversation = ""
+    if city:
+        city_context, context_report = build_context(city_data, prompt, label=city, cube=cube, district=city)
+        city_context = _with_forecast(city_context, context_report, city_data, prompt, analysis_mode, forecaster, city)
+        context_prompt = build_city_prompt(city, analysis_mode, len(city_data), city_context, prompt, conversation)
+        return context_prompt, context_report, fingerprint(city, city_context, conversation)
+    dataset_context, context_report = build_context(df, prompt, cube=cube)
+    dataset_context = _with_forecast(dataset_context, context_report, df, prompt, analysis_mode, forecaster)
+    context_prompt = build_dataset_prompt(analysis_mode, data_summary, dataset_context, prompt, conversation, scope)
+    return context_prompt, context_report, fingerprint(scope, data_summary, dataset_context, conversation)
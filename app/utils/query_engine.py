@@ -0,0 +1,293 @@
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.context_builder import parameter_columns
+from app.utils.helpers import DISTRICT_KEYWORDS, YEAR_KEYWORDS, find_column, to_year
+from app.utils.standards import STANDARDS, normalize_parameter_name, outside_limits, parameter_for_column
+
+AGGREGATES = {
+    "mean": ("average", "avg", "mean"),
+    "max": ("max", "maximum", "highest", "peak"),
+    "min": ("min", "minimum", "lowest"),
+    "median": ("median",),
+    "count": ("count", "how many", "number of samples", "number of readings"),
+}
+AGGREGATE_LABELS = {"mean": "Average", "max": "Maximum", "min": "Minimum", "median": "Median", "count": "Sample count"}
+
+# Questions containing these need reasoning, not a lookup
+OPEN_ENDED = ("why", "explain", "predict", "forecast", "recommend", "should", "compare", "trend", "cause",
+              "impact", "suggest", "improve", "safe", "risk")
+
+# A lookup answers one unfiltered aggregate; these words add a comparison, a value
+# threshold or an exclusion that the cube cannot express
+COMPARISON_WORDS = ("vs", "versus", "compared", "comparison", "than", "difference", "against", "relative",
+                    "ratio")
+THRESHOLD_WORDS = ("above", "below", "over", "under", "exceed", "exceeds", "exceeding", "exceeded", "beyond",
+                   "greater", "less", "more", "fewer", "higher", "lower", "at least", "at most", "within",
+                   "limit", "threshold")
+NEGATION_WORDS = ("not", "no", "excluding", "exclude", "excludes", "except", "without", "besides", "apart",
+                  "outside", "other", "neither", "nor", "never")
+# One number per group ("per district", "by year", "district-wise") is a table, not a lookup
+GROUPING_WORDS = ("per", "by", "each", "every", "wise", "breakdown", "grouped", "yearly", "annual", "annually")
+# Two years only form a range when joined like "2015 to 2019", "2015-2019" or "between 2015 and 2019"
+RANGE_SEPARATOR = re.compile(r"\s*(?:-|–|—|to|through|thru|till|until)\s*", re.IGNORECASE)
+
+# Words that may follow "in"/"for"/"of" without naming a place
+PLACE_PREPOSITIONS = ("in", "at", "for", "of", "across", "near", "around")
+FILLER_WORDS = {"the", "a", "an", "all", "each", "every", "any", "total", "whole", "entire", "overall", "this",
+                "that", "these", "my", "our", "district", "districts", "dataset", "data", "sample", "samples",
+                "reading", "readings", "record", "records", "well", "wells", "station", "stations", "year",
+                "years", "period", "groundwater", "water", "value", "values", "level", "levels", "mg", "l",
+                "ppm", "is", "are", "was", "were", "there", "what", "how", "many", "much", "it", "its"}
+
+# Symbols that are also English words, units or single letters ("as", "mg" in mg/L, "na" for n/a)
+AMBIGUOUS_SYMBOLS = {"as", "th", "u", "f", "mg", "ca", "na", "k", "cl", "fe"}
+# Units name no parameter; "mg/L" would otherwise read as magnesium
+UNIT_PATTERN = re.compile(r"\b(?:mg|µg|ug|meq)\s*(?:/|per)\s*(?:l|litre|liter)\b(?:\s+as\s+caco3\b)?"
+                          r"|\b[µu]s\s*/\s*cm\b|\bppm\b|\bppb\b", re.IGNORECASE)
+
+YEAR_PATTERN = re.compile(r"\b(19\d{2}|20\d{2})\b")
+NUMBER_PATTERN = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?!\w|\.\d)")
+
+
+def _count(value) -> int:
+    # The cube returns NaN for years it has no slot for, which is simply no samples
+    return 0 if value is None or np.isnan(value) else int(value)
+
+
+def _phrase_in(text: str, phrase: str) -> bool:
+    return f" {phrase} " in text
+
+
+def _mentions(text: str, name: str, aggregate: str) -> bool:
+    # Ambiguous symbols only count right after the aggregate word, e.g. "max as" or "average f"
+    if len(name) == 1 or name in AMBIGUOUS_SYMBOLS:
+        return any(_phrase_in(text, f"{word} {name}") for word in AGGREGATES[aggregate])
+    return _phrase_in(text, name)
+
+
+def _unresolved_places(question: str, text: str, known: set) -> list:
+    """Words that look like a place name but are not a district, parameter or year."""
+    words = text.split()
+    candidates = []
+    for i, word in enumerate(words[:-1]):
+        if word in PLACE_PREPOSITIONS:
+            following = [w for w in words[i + 1:] if w not in FILLER_WORDS]
+            if following and following[0] not in PLACE_PREPOSITIONS:
+                candidates.append(following[0])
+    # Capitalised words after the first one, e.g. "fluoride Nagpur"
+    for word in re.findall(r"[A-Za-z]+", question)[1:]:
+        if word.istitle() and len(word) > 2:
+            candidates.append(word.lower())
+    return [word for word in candidates
+            if word not in known and word not in FILLER_WORDS and not word.isdigit()]
+
+
+def _year_range(question: str, text: str) -> Optional[tuple]:
+    """(start, end) named by the question's years; None for a list of years that is not one range."""
+    matches = list(YEAR_PATTERN.finditer(question))
+    if len(matches) > 2:
+        return None
+    if len(matches) == 2:
+        between = question[matches[0].end():matches[1].start()]
+        joined = RANGE_SEPARATOR.fullmatch(between) or (
+            between.strip().lower() == "and" and _phrase_in(text, "between"))
+        if not joined:
+            return None
+        years = sorted(int(match.group()) for match in matches)
+        return years[0], years[1]
+    if len(matches) == 1:
+        year = int(matches[0].group())
+        if _phrase_in(text, "since") or _phrase_in(text, "after") or _phrase_in(text, "from"):
+            return year, None
+        if _phrase_in(text, "before") or _phrase_in(text, "until") or _phrase_in(text, "till"):
+            return None, year
+        return year, year
+    return None, None
+
+
+def parse_query(question: str, columns, district_index=None) -> Optional[dict]:
+    """Extract district, parameter, year range and aggregate from a factual question.
+
+    Returns None when the question is open-ended or lacks a parameter or aggregate,
+    in which case it should go to the LLM. So do questions that compare, threshold,
+    exclude or group, list years that are not one range, name more than one district,
+    or name a place that is not a known district: answering them as a plain lookup
+    would silently drop that part.
+    """
+    question = UNIT_PATTERN.sub(" ", question)
+    text = " " + normalize_parameter_name(question) + " "
+    if any(_phrase_in(text, word) for word in OPEN_ENDED):
+        return None
+    if any(_phrase_in(text, word) for word in COMPARISON_WORDS + THRESHOLD_WORDS + NEGATION_WORDS + GROUPING_WORDS):
+        return None
+    if re.search(r"[<>=≤≥]|n[’']t\b", question.lower()):
+        return None
+
+    aggregate = next((name for name, words in AGGREGATES.items() if any(_phrase_in(text, w) for w in words)), None)
+    if aggregate is None:
+        return None
+
+    parameter = None
+    known = {word for words in AGGREGATES.values() for phrase in words for word in phrase.split()}
+    for col in columns:
+        key = parameter_for_column(col)
+        names = {normalize_parameter_name(col)}
+        if key is not None:
+            names.update(normalize_parameter_name(alias) for alias in STANDARDS[key]["aliases"] + (key,))
+        known.update(word for name in names for word in name.split())
+        if parameter is None and any(_mentions(text, name, aggregate) for name in names if name):
+            parameter = col
+    if parameter is None and aggregate != "count":
+        return None
+
+    districts = district_index.match_all(question) if district_index is not None else []
+    if len(districts) > 1:
+        return None
+    known.update(word for name in districts for word in normalize_parameter_name(name).split())
+    if _unresolved_places(question, text, known):
+        return None
+    remainder = question
+    for name in districts:
+        remainder = re.sub(re.escape(name), " ", remainder, flags=re.IGNORECASE)
+    if any(not YEAR_PATTERN.fullmatch(number) for number in NUMBER_PATTERN.findall(remainder)):
+        # A bare value such as "1.0" is a threshold the lookup would ignore
+        return None
+
+    year_range = _year_range(question, text)
+    if year_range is None:
+        return None
+
+    district = districts[0] if districts else None
+    return {"aggregate": aggregate, "parameter": parameter, "district": district, "years": year_range}
+
+
+def answer_from_cube(cube, parsed: dict) -> Optional[dict]:
+    """Look the aggregate up in a precomputed cube; None when the cube cannot answer exactly."""
+    district, parameter, aggregate = parsed["district"], parsed["parameter"], parsed["aggregate"]
+    start, end = parsed["years"]
+    if district is not None and not cube.has_district(district):
+        return None
+    whole_period = start is None and end is None
+    single_year = start is not None and start == end
+    if parameter is None:
+        if not whole_period and not single_year:
+            return None
+        samples = cube.rows(district, start)
+        if samples == 0:
+            return None
+        return {**parsed, "value": float(samples), "samples": samples, "where": None, "exceed": None}
+    if parameter not in cube.parameters:
+        return None
+
+    if whole_period or single_year:
+        samples = _count(cube.value("count", parameter, district, start))
+        value = cube.value("p50" if aggregate == "median" else aggregate, parameter, district, start)
+        exceed = cube.value("exceed", parameter, district, start)
+    elif aggregate == "median":
+        # Medians of year cells cannot be merged into the median of a range
+        return None
+    else:
+        samples = _count(cube.combine("count", parameter, district, start, end))
+        value = cube.combine(aggregate, parameter, district, start, end)
+        exceed = cube.combine("exceed", parameter, district, start, end)
+    if samples == 0 or value is None or np.isnan(value):
+        return None
+
+    where = None
+    if aggregate in ("max", "min") and not district:
+        where = cube.extreme_district(aggregate, parameter, start, end)
+    has_limit = STANDARDS.get(parameter_for_column(parameter) or "") is not None
+    return {**parsed, "value": float(samples) if aggregate == "count" else value, "samples": samples,
+            "where": where, "exceed": int(exceed) if has_limit else None}
+
+
+def answer_query(df: pd.DataFrame, parsed: dict, district_index=None, cube=None) -> Optional[dict]:
+    """Compute the aggregate for a parsed query; None if no rows match.
+
+    A precomputed ``cube`` answers most lookups without touching ``df``.
+    """
+    if cube is not None:
+        result = answer_from_cube(cube, parsed)
+        if result is not None:
+            return result
+    frame = district_index.slice(parsed["district"]) if parsed["district"] and district_index is not None else df
+    start, end = parsed["years"]
+    year_col = find_column(frame.columns, YEAR_KEYWORDS)
+    if (start is not None or end is not None) and year_col is not None:
+        years = to_year(frame[year_col]).to_numpy()
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= years >= start
+        if end is not None:
+            mask &= years <= end
+        frame = frame[mask]
+    if frame.empty:
+        return None
+
+    parameter = parsed["parameter"]
+    if parameter is None:
+        return {**parsed, "value": float(len(frame)), "samples": len(frame), "where": None, "exceed": None}
+
+    values = pd.to_numeric(frame[parameter], errors='coerce')
+    valid = values.dropna()
+    if valid.empty:
+        return None
+    aggregate = parsed["aggregate"]
+    value = float(len(valid)) if aggregate == "count" else float(getattr(valid, aggregate)())
+
+    where = None
+    district_col = find_column(frame.columns, DISTRICT_KEYWORDS)
+    if aggregate in ("max", "min") and not parsed["district"] and district_col is not None:
+        position = valid.idxmax() if aggregate == "max" else valid.idxmin()
+        where = str(frame.at[position, district_col])
+
+    over = outside_limits(valid, parameter)
+    exceed = int(over.sum()) if over is not None else None
+    return {**parsed, "value": value, "samples": int(len(valid)), "where": where, "exceed": exceed}
+
+
+def _number(value: float) -> str:
+    return f"{value:,.0f}" if abs(value) >= 1000 else f"{value:.3g}"
+
+
+def format_answer(result: dict) -> str:
+    parameter = result["parameter"]
+    spec = STANDARDS.get(parameter_for_column(parameter) or "") if parameter else None
+    unit = f" {spec['unit']}" if spec and spec["unit"] else ""
+    scope = result["district"] or "all districts"
+    start, end = result["years"]
+    if start is not None and end is not None:
+        period = f" in {start}" if start == end else f", {start}–{end}"
+    elif start is not None:
+        period = f" since {start}"
+    elif end is not None:
+        period = f" up to {end}"
+    else:
+        period = ""
+
+    label = AGGREGATE_LABELS[result["aggregate"]]
+    if parameter is None:
+        return f"**{label} for {scope}{period}:** {int(result['value']):,} samples"
+    value = f"{int(result['value']):,}" if result["aggregate"] == "count" else f"{_number(result['value'])}{unit}"
+    lines = [f"**{label} {parameter} for {scope}{period}:** {value} (from {result['samples']:,} samples)"]
+    if result["where"]:
+        lines.append(f"- Recorded in **{result['where']}**")
+    if spec and result["exceed"] is not None:
+        limit = f"{spec['lower']}–{spec['permissible']}" if "lower" in spec else f"{spec['permissible']}"
+        lines.append(f"- BIS permissible limit {limit}{unit}: "
+                     f"{result['exceed']:,} of {result['samples']:,} samples fall outside it")
+    return "\n".join(lines)
+
+
+def answer_question(question: str, df: pd.DataFrame, district_index=None, cube=None) -> Optional[str]:
+    """Markdown answer for a plain factual lookup, or None to defer to the LLM."""
+    columns = cube.parameters if cube is not None else parameter_columns(df)
+    parsed = parse_query(question, columns, district_index)
+    if parsed is None:
+        return None
+    result = answer_query(df, parsed, district_index, cube)
+    return format_answer(result) if result is not None else None
@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.utils.dispatcher import LLMDispatcher, RateLimiter
+from app.utils.prompts import DEFAULT_SCOPE, build_analysis_prompt
+from app.utils.response_cache import cached_generate, fingerprint, make_cache_key
+
+DEFAULT_QUESTIONS = (
+    "Summarize the current groundwater quality, the parameters that exceed BIS limits and the main concerns.",
+    "What actions should local authorities prioritize to make groundwater safe to drink?",
+)
+CHECKPOINT_NAME = "checkpoint.jsonl"
+UNWANTED_TEXT = "Here's a more detailed analysis of the groundwater data:"
+
+
+def slugify(value: str) -> str:
+    return re.sub(r"[^\w-]+", "_", str(value).strip().lower()).strip("_") or "dataset"
+
+
+def plan_jobs(districts: Sequence[Optional[str]], questions: Sequence[str], analysis_mode: str,
+              model_name: str, data_version: str = "", scope: str = "all") -> List[dict]:
+    """One job per district × question; ``None`` as a district means the whole dataset.
+
+    Job ids are stable for the same inputs, so a rerun with the same arguments
+    on the same data resumes instead of starting over. The data version and the
+    state scope are part of the id: new data or other states start fresh jobs
+    even in the same output directory.
+    """
+    return [
+        {"id": fingerprint(district or "", question, analysis_mode, model_name, data_version, scope),
+         "district": district, "question": question, "mode": analysis_mode}
+        for district in districts
+        for question in questions
+    ]
+
+
+class Checkpoint:
+    """Append-only JSON-lines log of finished jobs, safe to share between worker threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-write leaves at most one partial trailing line
+                        continue
+                    self.records[record["id"]] = record
+            with open(path, "rb+") as handle:
+                # Terminate a partial last line so the next record starts on its own line
+                handle.seek(0, os.SEEK_END)
+                if handle.tell():
+                    handle.seek(-1, os.SEEK_END)
+                    if handle.read(1) != b"\n":
+                        handle.write(b"\n")
+
+    def done(self, job_id: str) -> bool:
+        return job_id in self.records
+
+    def record(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            self.records[record["id"]] = record
+
+
+def run_job(job: dict, df, district_index, cube, data_summary: str, model, model_name: str, cache=None,
+            forecaster=None, gate=None, scope: str = DEFAULT_SCOPE) -> dict:
+    """Build the same prompt the chat would and return a finished report record.
+
+    ``gate`` wraps the model call only (see ``cached_generate``).
+    """
+    started = time.perf_counter()
+    district = job["district"]
+    city_data = district_index.slice(district) if district and district_index is not None else None
+    prompt_text, context_report, context_fingerprint = build_analysis_prompt(
+        df, job["question"], job["mode"], data_summary, district, city_data, cube, forecaster, scope=scope
+    )
+    key = make_cache_key(job["question"], job["mode"], model_name, context_fingerprint)
+    answer = cached_generate(model, prompt_text, key, cache, gate=gate).replace(UNWANTED_TEXT, "").strip()
+    return {
+        **job,
+        "answer": answer,
+        "samples": context_report["rows"],
+        "context_tokens": context_report["tokens"],
+        "seconds": round(time.perf_counter() - started, 3),
+        "finished": time.time(),
+    }
+
+
+def run_reports(jobs: Iterable[dict], work: Callable[[dict, Callable], dict], checkpoint: Checkpoint,
+                workers: int = 4, requests_per_minute: float = 0, retries: int = 2,
+                on_progress: Optional[Callable[[dict, Optional[Exception]], None]] = None) -> dict:
+    """Run pending jobs through a bounded, rate-limited pool, checkpointing each result.
+
+    ``work(job, gate)`` must enter ``gate()`` around its model call; that is
+    the only part that is rate limited. Failed jobs are not checkpointed, so
+    the next run retries them.
+    """
+    pending = [job for job in jobs if not checkpoint.done(job["id"])]
+    limiter = RateLimiter(requests_per_minute) if requests_per_minute > 0 else None
+    dispatcher = LLMDispatcher(max_concurrency=workers, retries=retries, rate_limiter=limiter)
+    futures = {dispatcher.submit(job["id"], work, job, dispatcher.upstream): job for job in pending}
+    failed = []
+    try:
+        for future in as_completed(futures):
+            job = futures[future]
+            error = future.exception()
+            if error is None:
+                checkpoint.record(future.result())
+            else:
+                failed.append({**job, "error": f"{type(error).__name__}: {error}"})
+            if on_progress is not None:
+                on_progress(job, error)
+    finally:
+        dispatcher.shutdown()
+    return {"pending": len(pending), "completed": len(pending) - len(failed), "failed": failed,
+            "stats": dispatcher.stats()}
+
+
+def write_reports(records: Sequence[dict], out_dir: str, formats: Sequence[str] = ("md", "json"),
+                  title: str = "HydroAI Groundwater Report") -> List[str]:
+    """Write one Markdown file per district plus an index, and/or a single JSON file."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    by_district: Dict[str, List[dict]] = {}
+    for record in records:
+        by_district.setdefault(record["district"] or "All districts", []).append(record)
+
+    if "md" in formats:
+        index_lines = [f"# {title}", ""]
+        for district in sorted(by_district):
+            items = by_district[district]
+            path = os.path.join(out_dir, f"{slugify(district)}.md")
+            lines = [f"# {district}", "", f"_{items[0]['samples']:,} samples · {items[0]['mode']}_", ""]
+            for item in items:
+                lines += [f"## {item['question']}", "", item["answer"], ""]
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write("\n".join(lines))
+            written.append(path)
+            index_lines.append(f"- [{district}]({os.path.basename(path)}) — {len(items)} answers")
+        index_path = os.path.join(out_dir, "index.md")
+        with open(index_path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(index_lines) + "\n")
+        written.append(index_path)
+
+    if "json" in formats:
+        path = os.path.join(out_dir, "report.json")
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"title": title, "generated": time.time(), "reports": list(records)},
+                      handle, ensure_ascii=False, indent=2)
+        written.append(path)
+    return written
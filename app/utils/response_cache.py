@@ -0,0 +1,209 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager, nullcontext
+from typing import Callable, ContextManager, Iterator, Optional
+
+from app.utils.llm import iter_text
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_SQLITE_PATH = "data/response_cache.sqlite"
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(str(prompt).lower().split())
+
+
+def fingerprint(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()[:16]
+
+
+def make_cache_key(prompt: str, analysis_mode: str, model_name: str, context_fingerprint: str) -> str:
+    return fingerprint(normalize_prompt(prompt), analysis_mode, model_name, context_fingerprint)
+
+
+class MemoryResponseCache:
+    """In-process LRU with a TTL. Each entry counts its own hits and misses."""
+
+    def __init__(self, max_entries: int = 512, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry["created"] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry["hits"] += 1
+            self.hits += 1
+            return entry["value"]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            self._entries[key] = {
+                "value": value,
+                "created": time.time(),
+                "hits": 0,
+                "misses": (previous["misses"] if previous else 0) + 1,
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def entry_stats(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        return {"hits": entry["hits"], "misses": entry["misses"]} if entry else None
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteResponseCache:
+    """On-disk cache shared by every worker process on the host."""
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, "
+                "hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3's own context manager commits but never closes the connection
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (key,))
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO responses (key, value, created, hits, misses) VALUES (?, ?, ?, 0, 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, created = excluded.created, "
+                "misses = misses + 1",
+                (key, value, time.time()),
+            )
+
+    def entry_stats(self, key: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT hits, misses FROM responses WHERE key = ?", (key,)).fetchone()
+        return {"hits": row[0], "misses": row[1]} if row else None
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"backend": "sqlite", "entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+class LayeredResponseCache:
+    """Memory LRU in front of a persistent backend."""
+
+    def __init__(self, memory: MemoryResponseCache, disk: SQLiteResponseCache):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def entry_stats(self, key: str) -> Optional[dict]:
+        disk = self.disk.entry_stats(key)
+        memory = self.memory.entry_stats(key)
+        if disk is None:
+            return memory
+        return {"hits": disk["hits"] + (memory["hits"] if memory else 0), "misses": disk["misses"]}
+
+    def stats(self) -> dict:
+        return {"backend": "sqlite+memory", "memory": self.memory.stats(), "disk": self.disk.stats()}
+
+
+def build_response_cache(backend: str = "memory", path: str = DEFAULT_SQLITE_PATH, ttl: float = DEFAULT_TTL):
+    if backend == "memory":
+        return MemoryResponseCache(ttl=ttl)
+    if backend == "sqlite":
+        return LayeredResponseCache(MemoryResponseCache(ttl=ttl), SQLiteResponseCache(path, ttl=ttl))
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+def cached_generate(model, prompt_text: str, key: str, cache,
+                    on_lookup: Optional[Callable[[bool], None]] = None,
+                    gate: Optional[Callable[[], ContextManager]] = None) -> str:
+    """Return the cached response for ``key`` or call the model and store its text.
+
+    ``on_lookup`` is called with True on a cache hit and False on a miss.
+    ``gate`` (e.g. ``LLMDispatcher.upstream``) is entered around the model call
+    only, so cache hits are never throttled.
+    """
+    cached = cache.get(key) if cache is not None else None
+    if on_lookup is not None:
+        on_lookup(cached is not None)
+    if cached is not None:
+        return cached
+    with gate() if gate is not None else nullcontext():
+        response_text = model.generate_content(prompt_text).text
+    if cache is not None:
+        cache.set(key, response_text)
+    return response_text
+
+
+def cached_stream(model, prompt_text: str, key: str, cache,
+                  on_lookup: Optional[Callable[[bool], None]] = None,
+                  gate: Optional[Callable[[], ContextManager]] = None) -> Iterator[str]:
+    """Stream the model's answer chunk by chunk, storing the full text once it completes.
+
+    A cache hit is yielded as a single chunk; ``gate`` is held while the model streams.
+    """
+    cached = cache.get(key) if cache is not None else None
+    if on_lookup is not None:
+        on_lookup(cached is not None)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    with gate() if gate is not None else nullcontext():
+        for text in iter_text(model.generate_content(prompt_text, stream=True)):
+            parts.append(text)
+            yield text
+    if cache is not None:
+        cache.set(key, "".join(parts))
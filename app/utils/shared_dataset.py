@@ -0,0 +1,127 @@
+"""Publish the dataset once as memory-mapped NumPy columns for many app workers.
+
+    python -m app.utils.shared_dataset            # publish data/ into data/shared
+    HYDROAI_SHARED_DATASET=data/shared streamlit run main.py
+
+Each column is a ``.npy`` file; categorical columns store their codes plus the
+category list in the manifest. Workers map the files read-only, so the pages are
+shared through the OS page cache and an extra worker adds almost no memory.
+"""
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SHARED_DIR = "data/shared"
+CURRENT_NAME = "current.json"
+MANIFEST_NAME = "manifest.json"
+# Older published versions kept so workers still mapping them are not cut off mid-read
+KEEP_VERSIONS = 2
+
+
+def _current_path(shared_dir: str) -> str:
+    return os.path.join(shared_dir, CURRENT_NAME)
+
+
+def _write_json(path: str, payload: dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+    os.replace(tmp_path, path)
+
+
+def publish(df: pd.DataFrame, shared_dir: str = SHARED_DIR, source_version: str = "") -> dict:
+    """Write ``df`` as one ``.npy`` per column and point ``current.json`` at it."""
+    version = f"v{time.time_ns()}"
+    target = os.path.join(shared_dir, version)
+    os.makedirs(target, exist_ok=True)
+    columns = []
+    for position, col in enumerate(df.columns):
+        series = df[col]
+        entry = {"name": str(col), "file": f"{position}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object or pd.api.types.is_string_dtype(series):
+            # Text is always shared as codes; the categories are small enough for JSON
+            categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+            np.save(os.path.join(target, entry["file"]), categorical.cat.codes.to_numpy())
+            entry.update(kind="category", categories=[str(value) for value in categorical.cat.categories])
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and hasattr(series.array, "_mask"):
+            # Nullable integers (e.g. the Int16 year column) become values plus a mask
+            entry.update(kind="masked", mask=f"{position}.mask.npy", dtype=str(series.dtype))
+            np.save(os.path.join(target, entry["file"]), np.asarray(series.array._data))
+            np.save(os.path.join(target, entry["mask"]), np.asarray(series.array._mask))
+        else:
+            np.save(os.path.join(target, entry["file"]), series.to_numpy())
+            entry.update(kind="numpy")
+        columns.append(entry)
+
+    manifest = {"version": version, "source_version": source_version, "rows": len(df),
+                "columns": columns, "published": time.time()}
+    _write_json(os.path.join(target, MANIFEST_NAME), manifest)
+    _write_json(_current_path(shared_dir), {"version": version})
+    _prune(shared_dir, keep=version)
+    return manifest
+
+
+def _prune(shared_dir: str, keep: str) -> None:
+    versions = sorted(name for name in os.listdir(shared_dir) if name.startswith("v") and name != keep)
+    # Unlinking a mapped file is safe on POSIX; mapped pages stay valid until the worker drops them
+    for name in versions[:max(0, len(versions) - (KEEP_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(shared_dir, name), ignore_errors=True)
+
+
+def shared_version(shared_dir: str = SHARED_DIR) -> Optional[str]:
+    """Currently published version, or None when nothing has been published."""
+    path = _current_path(shared_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)["version"]
+
+
+def attach(shared_dir: str = SHARED_DIR, version: Optional[str] = None) -> pd.DataFrame:
+    """Map the published columns into a DataFrame without copying them.
+
+    The arrays are read-only; operations that would modify them in place raise
+    instead of silently diverging between workers.
+    """
+    version = version or shared_version(shared_dir)
+    if version is None:
+        raise FileNotFoundError(f"No dataset has been published to {shared_dir}")
+    target = os.path.join(shared_dir, version)
+    with open(os.path.join(target, MANIFEST_NAME), encoding="utf-8") as handle:
+        manifest = json.load(handle)
+
+    data = {}
+    for entry in manifest["columns"]:
+        values = np.load(os.path.join(target, entry["file"]), mmap_mode="r")
+        if entry["kind"] == "category":
+            data[entry["name"]] = pd.Categorical.from_codes(values, categories=entry["categories"], validate=False)
+        elif entry["kind"] == "masked":
+            mask = np.load(os.path.join(target, entry["mask"]), mmap_mode="r")
+            array_type = pd.api.types.pandas_dtype(entry["dtype"]).construct_array_type()
+            data[entry["name"]] = array_type(values, mask)
+        else:
+            data[entry["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+if __name__ == "__main__":
+    from app.utils.data_loader import data_version, has_store, load_dataset, load_store
+    from app.utils.district_index import DistrictIndex
+    from app.utils.helpers import DISTRICT_KEYWORDS, find_column
+
+    shared_dir = sys.argv[1] if len(sys.argv) > 1 else SHARED_DIR
+    started = time.perf_counter()
+    frame = load_store() if has_store() else load_dataset()
+    district_col = find_column(frame.columns, DISTRICT_KEYWORDS)
+    if district_col is not None:
+        # Publish rows grouped by district so each worker's DistrictIndex can skip its sorted copy
+        frame = DistrictIndex(frame, district_col).grouped().reset_index(drop=True)
+    published = publish(frame, shared_dir, source_version=data_version())
+    print(f"Published {published['rows']:,} rows × {len(published['columns'])} columns to "
+          f"{os.path.join(shared_dir, published['version'])} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,219 @@
+import re
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.context_builder import parameter_columns
+from app.utils.helpers import DISTRICT_KEYWORDS, LATITUDE_KEYWORDS, LONGITUDE_KEYWORDS, STATION_KEYWORDS, find_column
+from app.utils.standards import outside_limits
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+# 0.1° cells are ~11 km, so a "within 10 km" query touches a handful of cells
+CELL_DEGREES = 0.1
+# Stations closer than ~1 m are treated as the same well
+COORD_DECIMALS = 5
+
+COORD_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*[, ]\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def haversine_km(lat, lon, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, in kilometres."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _grid_cells(lats: np.ndarray, lons: np.ndarray, cell_degrees: float):
+    """Row, column and a collision-free int64 key of each point's grid cell.
+
+    Indices are offset by the most negative cell on the globe, so keys stay
+    unique for southern latitudes and western longitudes.
+    """
+    rows = np.floor(lats / cell_degrees).astype(np.int64)
+    cols = np.floor(lons / cell_degrees).astype(np.int64)
+    row_min, col_min = np.floor(-90 / cell_degrees), np.floor(-180 / cell_degrees)
+    width = int(np.floor(180 / cell_degrees) - col_min) + 1
+    return rows, cols, (rows - int(row_min)) * width + (cols - int(col_min))
+
+
+def _gather(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenate the integer ranges [start, stop) without a Python loop."""
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return offsets + np.arange(total)
+
+
+class SpatialIndex:
+    """Wells (distinct coordinates) bucketed on a regular lat/lon grid.
+
+    Queries only visit the cells overlapping the search area and then filter
+    candidates by exact haversine distance, so cost tracks the size of the
+    answer rather than the number of stations. Rows for each well are kept as
+    contiguous ranges of a position array, like ``DistrictIndex``, so
+    aggregating over a result never scans the whole frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, lat_col: str, lon_col: str, cell_degrees: float = CELL_DEGREES):
+        self.df = df
+        self.cell_degrees = cell_degrees
+        lats = pd.to_numeric(df[lat_col], errors='coerce').to_numpy(dtype=np.float64)
+        lons = pd.to_numeric(df[lon_col], errors='coerce').to_numpy(dtype=np.float64)
+        valid = np.isfinite(lats) & np.isfinite(lons) & (np.abs(lats) <= 90) & (np.abs(lons) <= 180)
+        positions = np.flatnonzero(valid)
+
+        # One well per rounded coordinate; rows are grouped by well
+        scale = 10 ** COORD_DECIMALS
+        lat_key = np.round(lats[valid] * scale).astype(np.int64) + 90 * scale
+        lon_key = np.round(lons[valid] * scale).astype(np.int64) + 180 * scale
+        keys, first, inverse = np.unique(lat_key * (361 * scale) + lon_key, return_index=True, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        self._row_positions = positions[order]
+        counts = np.bincount(inverse, minlength=len(keys))
+        self._row_stops = np.cumsum(counts)
+        self._row_starts = self._row_stops - counts
+
+        self.lats = lats[valid][first]
+        self.lons = lons[valid][first]
+        self.samples = counts
+        first_rows = positions[first]
+        name_col = find_column(df.columns, STATION_KEYWORDS)
+        district_col = find_column(df.columns, DISTRICT_KEYWORDS)
+        self.names = df[name_col].iloc[first_rows].astype(str).to_numpy() if name_col is not None else None
+        self.districts = df[district_col].iloc[first_rows].astype(str).to_numpy() if district_col is not None else None
+        self._names_lower: Optional[pd.Series] = None
+
+        # Grid over wells: wells sorted by cell, one [start, stop) range per occupied cell
+        cell_rows, cell_cols, cell_keys = _grid_cells(self.lats, self.lons, cell_degrees)
+        self._well_order = np.argsort(cell_keys, kind="stable")
+        _, cell_starts, cell_counts = np.unique(cell_keys[self._well_order], return_index=True, return_counts=True)
+        self._cell_rows = cell_rows[self._well_order][cell_starts]
+        self._cell_cols = cell_cols[self._well_order][cell_starts]
+        self._cell_starts = cell_starts
+        self._cell_stops = cell_starts + cell_counts
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    # -- candidate selection ---------------------------------------------------
+    def _candidates(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> np.ndarray:
+        r0, r1 = np.floor(min_lat / self.cell_degrees), np.floor(max_lat / self.cell_degrees)
+        c0, c1 = np.floor(min_lon / self.cell_degrees), np.floor(max_lon / self.cell_degrees)
+        hit = (self._cell_rows >= r0) & (self._cell_rows <= r1) & (self._cell_cols >= c0) & (self._cell_cols <= c1)
+        return self._well_order[_gather(self._cell_starts[hit], self._cell_stops[hit])]
+
+    # -- queries -------------------------------------------------------------------
+    def radius(self, lat: float, lon: float, km: float) -> pd.DataFrame:
+        """Wells within ``km`` of a point, nearest first."""
+        dlat = km / KM_PER_DEGREE
+        cos_lat = max(np.cos(np.radians(min(abs(lat) + dlat, 90.0))), 1e-6)
+        dlon = min(km / (KM_PER_DEGREE * cos_lat), 180.0)
+        candidates = self._candidates(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = distances <= km
+        return self.wells(candidates[inside], distances[inside])
+
+    def nearest(self, lat: float, lon: float, k: int = 10) -> pd.DataFrame:
+        """The ``k`` closest wells, found by widening a radius query until it holds ``k``."""
+        k = min(k, len(self))
+        km = self.cell_degrees * KM_PER_DEGREE
+        while k:
+            found = self.radius(lat, lon, km)
+            # Every well closer than the k-th one lies inside an exact radius query
+            if len(found) >= k or km > np.pi * EARTH_RADIUS_KM:
+                return found.head(k)
+            km *= 2
+        return self.wells(np.empty(0, dtype=np.int64))
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> pd.DataFrame:
+        candidates = self._candidates(min_lat, max_lat, min_lon, max_lon)
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return self.wells(candidates[inside])
+
+    # -- results ---------------------------------------------------------------------
+    def wells(self, ids: np.ndarray, distances: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Well table for ids; sorted by distance when distances are given."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if distances is not None:
+            order = np.argsort(distances, kind="stable")
+            ids, distances = ids[order], distances[order]
+        table = pd.DataFrame({"well": ids, "lat": self.lats[ids], "lon": self.lons[ids], "samples": self.samples[ids]})
+        if self.names is not None:
+            table.insert(1, "station", self.names[ids])
+        if self.districts is not None:
+            table.insert(2 if self.names is not None else 1, "district", self.districts[ids])
+        if distances is not None:
+            table["distance_km"] = np.round(distances, 3)
+        return table
+
+    def rows(self, ids: Sequence[int]) -> pd.DataFrame:
+        """All samples taken at the given wells."""
+        ids = np.asarray(ids, dtype=np.int64)
+        return self.df.iloc[np.sort(self._row_positions[_gather(self._row_starts[ids], self._row_stops[ids])])]
+
+    def aggregate(self, ids: Sequence[int], params: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Per-parameter count/mean/min/max and BIS exceedances over the wells' samples."""
+        rows = self.rows(ids)
+        params = list(params) if params is not None else parameter_columns(rows)
+        if rows.empty or not params:
+            return pd.DataFrame(columns=["count", "mean", "min", "max", "exceed"])
+        values = rows[params].astype(float)
+        stats = values.agg(['count', 'mean', 'min', 'max']).T
+        exceed = []
+        for col in params:
+            over = outside_limits(values[col], col)
+            exceed.append(np.nan if over is None else int(over.sum()))
+        stats["exceed"] = exceed
+        stats["count"] = stats["count"].astype(int)
+        return stats
+
+    def clusters(self, cell_degrees: float = 0.25, ids: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """Wells merged per coarse grid cell: centroid, well count and sample count, for overview maps."""
+        ids = np.arange(len(self)) if ids is None else np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return pd.DataFrame(columns=["lat", "lon", "wells", "samples"])
+        _, _, keys = _grid_cells(self.lats[ids], self.lons[ids], cell_degrees)
+        _, inverse, wells = np.unique(keys, return_inverse=True, return_counts=True)
+        return pd.DataFrame({
+            "lat": np.bincount(inverse, weights=self.lats[ids]) / wells,
+            "lon": np.bincount(inverse, weights=self.lons[ids]) / wells,
+            "wells": wells,
+            "samples": np.bincount(inverse, weights=self.samples[ids]).astype(np.int64),
+        })
+
+    def locate(self, text: str) -> Optional[Tuple[float, float, str]]:
+        """Resolve "lat, lon" or a station name fragment to a point and a label."""
+        match = COORD_PATTERN.match(text or "")
+        if match:
+            lat, lon = float(match.group(1)), float(match.group(2))
+            if abs(lat) <= 90 and abs(lon) <= 180:
+                return lat, lon, f"{lat:.4f}, {lon:.4f}"
+            return None
+        needle = " ".join(str(text).split()).lower()
+        if not needle or self.names is None:
+            return None
+        if self._names_lower is None:
+            self._names_lower = pd.Series(self.names).str.split().str.join(" ").str.lower()
+        # An exact station name wins over the first partial match
+        hits = np.flatnonzero((self._names_lower == needle).to_numpy())
+        if not len(hits):
+            hits = np.flatnonzero(self._names_lower.str.contains(needle, regex=False).to_numpy())
+        if not len(hits):
+            return None
+        well = int(hits[0])
+        return float(self.lats[well]), float(self.lons[well]), str(self.names[well])
+
+
+def build_spatial_index(df: pd.DataFrame) -> Optional[SpatialIndex]:
+    """SpatialIndex over the detected coordinate columns, or None if the data has none."""
+    lat_col = find_column(df.columns, LATITUDE_KEYWORDS)
+    lon_col = find_column(df.columns, LONGITUDE_KEYWORDS)
+    if lat_col is None or lon_col is None:
+        return None
+    return SpatialIndex(df, lat_col, lon_col)
@@ -0,0 +1,85 @@
+import re
+from typing import Dict, Iterable, Optional
+
+# Drinking water limits from BIS IS 10500:2012 (mg/L unless noted).
+# "acceptable" is the desirable limit, "permissible" applies in the absence of an
+# alternate source and is what exceedance counts are measured against.
+# Limit values are read at call time, so a deployment can adjust them in place.
+STANDARDS: Dict[str, dict] = {
+    "pH": {"aliases": ("ph",), "acceptable": 8.5, "permissible": 8.5, "lower": 6.5, "ideal": 7.0, "unit": ""},
+    "TDS": {"aliases": ("tds", "total dissolved solids"), "acceptable": 500, "permissible": 2000, "ideal": 0, "unit": "mg/L"},
+    "EC": {"aliases": ("ec", "electrical conductivity", "conductivity"), "acceptable": 750, "permissible": 3000, "ideal": 0, "unit": "µS/cm"},
+    "TH": {"aliases": ("th", "total hardness", "hardness", "caco3"), "acceptable": 200, "permissible": 600, "ideal": 0, "unit": "mg/L"},
+    "Ca": {"aliases": ("ca", "calcium"), "acceptable": 75, "permissible": 200, "ideal": 0, "unit": "mg/L"},
+    "Mg": {"aliases": ("mg", "magnesium"), "acceptable": 30, "permissible": 100, "ideal": 0, "unit": "mg/L"},
+    "Cl": {"aliases": ("cl", "chloride"), "acceptable": 250, "permissible": 1000, "ideal": 0, "unit": "mg/L"},
+    "SO4": {"aliases": ("so4", "sulphate", "sulfate"), "acceptable": 200, "permissible": 400, "ideal": 0, "unit": "mg/L"},
+    "NO3": {"aliases": ("no3", "nitrate"), "acceptable": 45, "permissible": 45, "ideal": 0, "unit": "mg/L"},
+    "F": {"aliases": ("f", "fluoride"), "acceptable": 1.0, "permissible": 1.5, "ideal": 0, "unit": "mg/L"},
+    "Fe": {"aliases": ("fe", "iron"), "acceptable": 0.3, "permissible": 0.3, "ideal": 0, "unit": "mg/L"},
+    "As": {"aliases": ("as", "arsenic"), "acceptable": 0.01, "permissible": 0.01, "ideal": 0, "unit": "mg/L"},
+    "U": {"aliases": ("u", "uranium"), "acceptable": 0.03, "permissible": 0.03, "ideal": 0, "unit": "mg/L"},
+    "Alkalinity": {"aliases": ("alkalinity", "total alkalinity"), "acceptable": 200, "permissible": 600, "ideal": 0, "unit": "mg/L"},
+}
+
+# WHO Guidelines for Drinking-water Quality (4th ed.) health-based values, for the
+# parameters that have one; others are not flagged under the WHO standard.
+WHO_GUIDELINES: Dict[str, float] = {"F": 1.5, "NO3": 50, "As": 0.01, "U": 0.03}
+
+
+def exceedance_limits(standard: str = "bis") -> Dict[str, tuple]:
+    """(lower, upper) bounds per parameter key for ``"bis"`` (permissible) or ``"who"``."""
+    if standard == "who":
+        return {key: (None, value) for key, value in WHO_GUIDELINES.items()}
+    if standard != "bis":
+        raise ValueError(f"Unknown standard: {standard}")
+    return {key: (spec.get("lower"), spec["permissible"]) for key, spec in STANDARDS.items()}
+
+
+def outside_limits(values, column, standard: str = "bis"):
+    """Mask of values outside the standard's limits for the parameter ``column`` measures, or None without one.
+
+    NaN compares False, so unmeasured values are never flagged.
+    """
+    bounds = exceedance_limits(standard).get(parameter_for_column(column) or "")
+    if bounds is None:
+        return None
+    lower, upper = bounds
+    outside = values > upper
+    if lower is not None:
+        outside |= values < lower
+    return outside
+
+
+def normalize_parameter_name(name) -> str:
+    # "NO3 (mg/L)" -> "no3", "Total  Hardness" -> "total hardness"
+    text = re.sub(r"\(.*?\)|\[.*?\]", " ", str(name)).lower()
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return " ".join(text.split())
+
+
+_ALIAS_TO_PARAMETER = {
+    normalize_parameter_name(alias): key
+    for key, spec in STANDARDS.items()
+    for alias in spec["aliases"] + (key,)
+}
+
+
+def parameter_for_column(col) -> Optional[str]:
+    """Return the standard parameter key a column measures, if any."""
+    return _ALIAS_TO_PARAMETER.get(normalize_parameter_name(col))
+
+
+def map_parameter_columns(columns: Iterable) -> Dict[str, str]:
+    """Map standard parameter keys to the first matching dataset column."""
+    mapping = {}
+    for col in columns:
+        key = parameter_for_column(col)
+        if key is not None and key not in mapping:
+            mapping[key] = col
+    return mapping
+
+
+def limit_for_column(col) -> Optional[dict]:
+    key = parameter_for_column(col)
+    return STANDARDS[key] if key is not None else None
@@ -0,0 +1,174 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+POINT_BUDGET = 5000
+WEBGL_THRESHOLD = 1000
+DENSITY_BINS = 120
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection over points sorted by ``x``.
+
+    Keeps the first and last point and, from each bucket in between, the point
+    forming the largest triangle with the previous pick and the next bucket mean.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    bounds = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    prev = 0
+    for i in range(threshold - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        next_stop = bounds[i + 2] if i + 2 < len(bounds) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:stop] - y[prev])
+            - (x[prev] - x[start:stop]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        picked[i + 1] = prev
+    return picked
+
+
+def _clean_xy(df: pd.DataFrame, x: str, y: str):
+    xs = pd.to_numeric(df[x], errors='coerce').to_numpy(dtype=float)
+    ys = pd.to_numeric(df[y], errors='coerce').to_numpy(dtype=float)
+    mask = np.isfinite(xs) & np.isfinite(ys)
+    return xs[mask], ys[mask]
+
+
+def build_scatter_figure(df: pd.DataFrame, x: str, y: str, title: str, point_budget: int = POINT_BUDGET,
+                         method: str = "bin", webgl_threshold: int = WEBGL_THRESHOLD, template: str = "plotly_dark",
+                         font_color: str = "white", grid_color: str = "#2a2a2a") -> go.Figure:
+    """Scatter of every row when it fits in ``point_budget``, otherwise an aggregated view.
+
+    ``method="bin"`` draws a server-side 2D histogram of all rows; ``method="lttb"``
+    keeps ``point_budget`` shape-preserving points. Traces switch to WebGL above
+    ``webgl_threshold`` points.
+    """
+    xs, ys = _clean_xy(df, x, y)
+    fig = go.Figure()
+    if len(xs) > point_budget and method == "bin":
+        counts, xedges, yedges = np.histogram2d(xs, ys, bins=DENSITY_BINS)
+        counts[counts == 0] = np.nan
+        fig.add_trace(go.Heatmap(
+            x=(xedges[:-1] + xedges[1:]) / 2,
+            y=(yedges[:-1] + yedges[1:]) / 2,
+            z=counts.T,
+            colorscale="Viridis",
+            colorbar={"title": "Samples"},
+            hovertemplate=f"{x}: %{{x:.3g}}<br>{y}: %{{y:.3g}}<br>Samples: %{{z}}<extra></extra>",
+        ))
+        subtitle = f"{len(xs):,} samples binned"
+    else:
+        if len(xs) > point_budget:
+            total = len(xs)
+            order = np.argsort(xs, kind="stable")
+            keep = order[lttb_indices(xs[order], ys[order], point_budget)]
+            xs, ys = xs[keep], ys[keep]
+            subtitle = f"{len(xs):,} of {total:,} samples (LTTB)"
+        else:
+            subtitle = f"{len(xs):,} samples"
+        trace = go.Scattergl if len(xs) > webgl_threshold else go.Scatter
+        fig.add_trace(trace(x=xs, y=ys, mode="markers", marker={"size": 5, "opacity": 0.7}))
+    fig.update_layout(
+        title=f"{title} · {subtitle}",
+        xaxis_title=str(x),
+        yaxis_title=str(y),
+        template=template,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color=font_color
+    )
+    fig.update_xaxes(gridcolor=grid_color, zerolinecolor=grid_color)
+    fig.update_yaxes(gridcolor=grid_color, zerolinecolor=grid_color)
+    return fig
+
+
+def build_well_map(clusters: Optional[pd.DataFrame] = None, wells: Optional[pd.DataFrame] = None,
+                   center: Optional[tuple] = None, zoom: float = 5, point_budget: int = POINT_BUDGET,
+                   template: str = "plotly_dark", font_color: str = "white") -> go.Figure:
+    """Map of clustered wells (bubbles sized by well count) and/or individual wells.
+
+    ``clusters`` comes from ``SpatialIndex.clusters`` and keeps overview maps to a
+    few hundred markers; ``wells`` are drawn individually, nearest first, up to
+    ``point_budget``.
+    """
+    fig = go.Figure()
+    if clusters is not None and len(clusters):
+        sizes = np.sqrt(clusters["wells"].to_numpy(dtype=float))
+        fig.add_trace(go.Scattermap(
+            lat=clusters["lat"], lon=clusters["lon"], mode="markers", name="Wells",
+            marker={"size": 6 + 24 * sizes / sizes.max(), "color": "#00d4ff", "opacity": 0.6},
+            customdata=clusters[["wells", "samples"]].to_numpy(),
+            hovertemplate="%{customdata[0]:,} wells<br>%{customdata[1]:,} samples<extra></extra>",
+        ))
+    if wells is not None and len(wells):
+        shown = wells.head(point_budget)
+        color = shown["distance_km"] if "distance_km" in shown else "#00d4ff"
+        label = shown["station"] if "station" in shown else shown["well"].astype(str)
+        fig.add_trace(go.Scattermap(
+            lat=shown["lat"], lon=shown["lon"], mode="markers", name="Wells", text=label,
+            marker={"size": 8, "color": color, "colorscale": "Viridis_r",
+                    "colorbar": {"title": "km"} if "distance_km" in shown else None},
+            hovertemplate="%{text}<br>%{lat:.4f}, %{lon:.4f}<extra></extra>",
+        ))
+    if center is not None:
+        fig.add_trace(go.Scattermap(
+            lat=[center[0]], lon=[center[1]], mode="markers", name="Centre",
+            marker={"size": 14, "color": "#ff4b4b"}, hoverinfo="skip",
+        ))
+    if center is None and clusters is not None and len(clusters):
+        center = (float(clusters["lat"].mean()), float(clusters["lon"].mean()))
+    fig.update_layout(
+        map={"style": "carto-darkmatter" if template == "plotly_dark" else "carto-positron",
+             "center": {"lat": center[0], "lon": center[1]} if center else None, "zoom": zoom},
+        template=template,
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color=font_color,
+        margin={"l": 0, "r": 0, "t": 0, "b": 0},
+        showlegend=False,
+        height=480
+    )
+    return fig
+
+
+class FigureCache:
+    """Bounded LRU of built figures keyed by (district, x, y, ...).
+
+    The figure object itself is kept and shared: ``st.plotly_chart`` only reads
+    it, so a hit skips both the build and a JSON round-trip through plotly's
+    validators. Callers must not mutate a returned figure.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build) -> go.Figure:
+        with self._lock:
+            fig: Optional[go.Figure] = self._entries.get(key)
+            if fig is not None:
+                self._entries.move_to_end(key)
+        if fig is None:
+            fig = build()
+            with self._lock:
+                self._entries[key] = fig
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return fig
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
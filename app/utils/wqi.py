@@ -0,0 +1,137 @@
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.district_index import normalize_name
+from app.utils.helpers import DISTRICT_KEYWORDS, find_column, normalize_names
+from app.utils.standards import STANDARDS, exceedance_limits, map_parameter_columns
+
+# Weighted arithmetic WQI bands (Brown et al.; as used in CGWB/BIS assessments)
+WQI_CATEGORIES = ((50, "Excellent"), (100, "Good"), (200, "Poor"), (300, "Very Poor"), (np.inf, "Unsuitable"))
+
+
+def wqi_category(value: float) -> str:
+    if value is None or np.isnan(value):
+        return "No data"
+    return next(label for upper, label in WQI_CATEGORIES if value <= upper)
+
+
+def compute_wqi(values: np.ndarray, standards: np.ndarray, ideals: np.ndarray,
+                two_sided: np.ndarray) -> np.ndarray:
+    """Weighted arithmetic WQI per sample of a (parameters × samples) matrix.
+
+    q_i = 100 · (V_i − I_i) / (S_i − I_i), w_i ∝ 1 / S_i. Missing values drop out
+    of both numerator and weights, so a sample is scored on what was measured.
+    Two-sided parameters (pH) use the absolute deviation from the ideal.
+    """
+    weights = (1.0 / standards)[:, None]
+    scale = (100.0 / (standards - ideals))[:, None] * weights
+    deviation = values - ideals[:, None]
+    deviation[two_sided] = np.abs(deviation[two_sided])
+    present = ~np.isnan(values)
+    weighted = np.where(present, deviation * scale, 0.0).sum(axis=0)
+    total_weight = (present * weights).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total_weight > 0, weighted / total_weight, np.nan)
+
+
+def _bound(bounds: dict, key: str, side: int, default: float) -> float:
+    value = bounds.get(key, (None, None))[side]
+    return default if value is None else value
+
+
+class WQIEngine:
+    """Per-sample WQI and exceedance flags for a dataset, with district roll-ups.
+
+    Everything is computed in one vectorized pass when the engine is built (once
+    per dataset version); ``summary`` is then a dictionary lookup, so it can run
+    on every rerun.
+    """
+
+    def __init__(self, df: pd.DataFrame, limit: str = "acceptable", standard: str = "bis",
+                 limits: Optional[Dict[str, float]] = None):
+        # limit: which STANDARDS value is S_i in the index; limits overrides it per parameter key
+        self.columns = map_parameter_columns(df.columns)
+        self.keys = list(self.columns)
+        self.standard = standard
+        overrides = limits or {}
+        standards = np.array([overrides.get(key, STANDARDS[key][limit]) for key in self.keys], dtype=np.float64)
+        ideals = np.array([STANDARDS[key]["ideal"] for key in self.keys], dtype=np.float64)
+        two_sided = np.array(["lower" in STANDARDS[key] for key in self.keys])
+
+        # Parameters along axis 0 so each row of the matrix is one contiguous column of the frame
+        values = np.empty((len(self.keys), len(df)), dtype=np.float64)
+        for j, key in enumerate(self.keys):
+            values[j] = pd.to_numeric(df[self.columns[key]], errors='coerce').to_numpy(dtype=np.float64)
+        self.wqi = compute_wqi(values, standards, ideals, two_sided).astype(np.float32)
+
+        bounds = exceedance_limits(standard)
+        lower = np.array([_bound(bounds, key, 0, -np.inf) for key in self.keys])[:, None]
+        upper = np.array([_bound(bounds, key, 1, np.inf) for key in self.keys])[:, None]
+        with np.errstate(invalid="ignore"):
+            # NaN compares False, so unmeasured values are never flagged
+            self.exceed = (values > upper) | (values < lower)
+        self._measured = ~np.isnan(values)
+
+        # District roll-ups through category codes; the last slot is the whole dataset
+        district_col = find_column(df.columns, DISTRICT_KEYWORDS)
+        if district_col is not None:
+            names = normalize_names(df[district_col])
+            codes = names.cat.codes.to_numpy()
+            self._districts = {normalize_name(name): i for i, name in enumerate(names.cat.categories)}
+        else:
+            codes = np.full(len(df), -1)
+            self._districts = {}
+        self._summaries = self._roll_up(codes, len(self._districts))
+
+    def _roll_up(self, codes: np.ndarray, groups: int) -> list:
+        slots = np.where(codes >= 0, codes, groups)
+        scored = ~np.isnan(self.wqi)
+        wqi_sum = np.bincount(slots[scored], weights=self.wqi[scored], minlength=groups + 1)
+        wqi_n = np.bincount(slots[scored], minlength=groups + 1)
+        any_exceed = self.exceed.any(axis=0)
+        sample_n = np.bincount(slots, minlength=groups + 1)
+        unsafe_n = np.bincount(slots, weights=any_exceed, minlength=groups + 1)
+        exceed_n = np.zeros((groups + 1, len(self.keys)))
+        measured_n = np.zeros((groups + 1, len(self.keys)))
+        for j in range(len(self.keys)):
+            exceed_n[:, j] = np.bincount(slots, weights=self.exceed[j], minlength=groups + 1)
+            measured_n[:, j] = np.bincount(slots, weights=self._measured[j], minlength=groups + 1)
+
+        # Rows with an unknown district only count towards the whole-dataset slot
+        totals = (wqi_sum.sum(), wqi_n.sum(), sample_n.sum(), unsafe_n.sum(), exceed_n.sum(axis=0), measured_n.sum(axis=0))
+        summaries = []
+        for g in range(groups + 1):
+            if g == groups:
+                w_sum, w_n, s_n, u_n, e_n, m_n = totals
+            else:
+                w_sum, w_n, s_n, u_n, e_n, m_n = wqi_sum[g], wqi_n[g], sample_n[g], unsafe_n[g], exceed_n[g], measured_n[g]
+            wqi = float(w_sum / w_n) if w_n else float("nan")
+            exceedances = {key: int(e_n[j]) for j, key in enumerate(self.keys) if m_n[j]}
+            rates = e_n / np.maximum(m_n, 1)
+            worst = self.keys[int(np.argmax(rates))] if self.keys and rates.max() > 0 else None
+            summaries.append({
+                "wqi": wqi,
+                "category": wqi_category(wqi),
+                "samples": int(s_n),
+                "scored": int(w_n),
+                "unsafe_share": float(u_n / s_n) if s_n else 0.0,
+                "exceedances": exceedances,
+                "worst_parameter": worst,
+            })
+        return summaries
+
+    def summary(self, district: Optional[str] = None) -> dict:
+        """Mean WQI, band, share of samples breaching any limit and per-parameter exceedances.
+
+        Unknown districts fall back to the whole-dataset summary.
+        """
+        if district is None:
+            return self._summaries[-1]
+        position = self._districts.get(normalize_name(district))
+        return self._summaries[position] if position is not None else self._summaries[-1]
+
+    def flags(self) -> pd.DataFrame:
+        """Per-sample exceedance flags keyed by standard parameter name."""
+        return pd.DataFrame(self.exceed.T, columns=self.keys)
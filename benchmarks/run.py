@@ -0,0 +1,176 @@
+"""Benchmarks for the per-rerun hot paths of main.py.
+
+    python -m benchmarks.run --sizes 10k,1m
+    python -m benchmarks.run --sizes 10k,1m --update-baseline
+
+Results are compared against benchmarks/baseline.json; a case is a regression
+when its wall time or peak memory exceeds the baseline by more than --threshold.
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app.utils import helpers
+from app.utils.aggregate_cube import build_cube
+from app.utils.context_builder import build_context
+from app.utils.data_loader import convert_to_columnar, load_dataset
+from app.utils.dataset_handle import DatasetHandle
+from app.utils.forecast import fit_forecaster
+from app.utils.district_index import DistrictIndex
+from app.utils.llm import StubModel
+from app.utils.prompts import build_city_prompt
+from app.utils.response_cache import MemoryResponseCache, cached_generate, make_cache_key
+from app.utils.spatial import build_spatial_index
+from app.utils.wqi import WQIEngine
+from benchmarks.synthetic import make_groundwater_frame
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+PROMPT = "What is the average fluoride and nitrate in Kutch since 2015?"
+# Measurements below these are dominated by noise and are never flagged
+MIN_SECONDS = 0.005
+MIN_PEAK_MB = 1.0
+
+
+def measure(fn, repeat: int = 3):
+    """Best wall time over ``repeat`` runs and the peak traced memory of the first."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    best = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return result, {"seconds": round(best, 6), "peak_mb": round(peak / 2 ** 20, 3)}
+
+
+def run_size(rows: int, workdir: str) -> dict:
+    results = {}
+    frame = make_groundwater_frame(rows)
+    csv_path = os.path.join(workdir, f"groundwater_{rows}.csv")
+    frame.to_csv(csv_path, index=False)
+
+    _, results["load_csv"] = measure(lambda: load_dataset(csv_path), repeat=1)
+    convert_to_columnar(csv_path)
+    df, results["load_columnar"] = measure(lambda: load_dataset(csv_path))
+    _, results["load_columnar_projected"] = measure(lambda: load_dataset(csv_path, columns=["DISTRICT", "F", "NO3"]))
+
+    # What st.cache_data pays per rerun (pickle round trip) against the resource-cached handle
+    _, results["access_cache_data"] = measure(lambda: pickle.loads(pickle.dumps(df)))
+    handle = DatasetHandle(df.copy(), "bench")
+    _, results["access_handle"] = measure(lambda: handle.frame)
+
+    _, results["filter_scan"] = measure(lambda: df[df["DISTRICT"].str.lower() == "kutch"])
+    index, results["district_index_build"] = measure(lambda: DistrictIndex(df, "DISTRICT"), repeat=1)
+    _, results["filter_index"] = measure(lambda: index.slice("Kutch"))
+
+    def cold_summary():
+        helpers._SUMMARY_CACHE.clear()
+        return helpers.get_data_summary(df, "bench")
+
+    _, results["summary_cold"] = measure(cold_summary)
+    _, results["summary_warm"] = measure(lambda: helpers.get_data_summary(df, "bench"))
+
+    def scan_city_match():
+        names = df["DISTRICT"].unique().astype(str).tolist()
+        return next((word for word in PROMPT.split() if word.lower() in [name.lower() for name in names]), None)
+
+    _, results["city_match_scan"] = measure(scan_city_match)
+    city, results["city_match_index"] = measure(lambda: index.match_text(PROMPT))
+
+    cube, results["cube_build"] = measure(lambda: build_cube(df), repeat=1)
+    _, results["cube_lookup"] = measure(lambda: cube.value("mean", "F", city))
+
+    wqi, results["wqi_build"] = measure(lambda: WQIEngine(df), repeat=1)
+    _, results["wqi_summary"] = measure(lambda: wqi.summary("Kutch"))
+
+    forecaster, results["forecast_fit"] = measure(lambda: fit_forecaster(df), repeat=1)
+    results["forecast_fit"]["series"] = (len(forecaster.stations) + len(forecaster.districts) + 1) * len(forecaster.parameters)
+    _, results["forecast_outlook"] = measure(lambda: forecaster.outlook("Kutch"))
+
+    spatial, results["spatial_build"] = measure(lambda: build_spatial_index(df), repeat=1)
+    _, results["spatial_radius_10km"] = measure(lambda: spatial.radius(22.3, 70.8, 10))
+    _, results["spatial_nearest_10"] = measure(lambda: spatial.nearest(22.3, 70.8, 10))
+
+    city_data = index.slice(city)
+
+    def build_prompt():
+        context, _ = build_context(city_data, PROMPT, label=city)
+        return build_city_prompt(city, "Standard Analysis", len(city_data), context, PROMPT)
+
+    prompt_text, results["prompt_build"] = measure(build_prompt)
+    results["prompt_build"]["prompt_chars"] = len(prompt_text)
+
+    model = StubModel()
+    cache = MemoryResponseCache()
+    key = make_cache_key(PROMPT, "Standard Analysis", model.model_name, city)
+    _, results["llm_stub_cached"] = measure(lambda: cached_generate(model, prompt_text, key, cache))
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for size, cases in results.items():
+        for case, current in cases.items():
+            previous = baseline.get(size, {}).get(case)
+            if not previous:
+                continue
+            for metric in ("seconds", "peak_mb"):
+                if current[metric] < (MIN_SECONDS if metric == "seconds" else MIN_PEAK_MB):
+                    continue
+                if previous.get(metric) and current[metric] > previous[metric] * threshold:
+                    regressions.append(f"{size}/{case} {metric}: {previous[metric]} -> {current[metric]}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,1m", help="comma-separated subset of " + ",".join(SIZES))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed ratio over the baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes.split(","):
+            print(f"== {size} rows ==")
+            results[size] = run_size(SIZES[size], workdir)
+            for case, metrics in results[size].items():
+                print(f"  {case:<26} {metrics['seconds'] * 1000:>10.2f} ms {metrics['peak_mb']:>10.1f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(baseline, handle, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
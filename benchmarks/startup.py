@@ -0,0 +1,154 @@
+"""Cold-start benchmark for main.py: import time and time to first render.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --rows 100k --repeat 5 --output startup.json
+
+Every measurement runs in a fresh interpreter. Imports are timed with
+``-X importtime`` over main.py's own top-level import lines; the modules the
+app defers (Gemini SDK, plotly) are timed separately as what they would
+add to the critical path. The render is a full AppTest run of main.py against a
+synthetic dataset: "shell" is script start until the header and placeholder
+cards are on the page, "first_render" the whole first run, and "warm" a rerun
+in the same process once the resource caches are filled.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PATH = os.path.join(REPO_ROOT, "main.py")
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+# Imported only when a tab or the chat needs them, so not part of main.py's import cost
+DEFERRED_MODULES = ("google.generativeai", "plotly.graph_objects", "app.utils.visualization", "plotly.express",
+                    "plotly.subplots")
+TOP_MODULES = 8
+
+
+def main_imports() -> str:
+    """main.py's module-level import statements, one per line."""
+    with open(MAIN_PATH, encoding="utf-8") as handle:
+        tree = ast.parse(handle.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def run_child(code: str, cwd: str = REPO_ROOT, env: dict = None, flags: tuple = ()) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=cwd, env=env, capture_output=True,
+                          text=True, check=True)
+
+
+def measure_imports() -> dict:
+    """Wall time of main.py's imports in a fresh interpreter and the slowest top-level modules."""
+    code = "import time\n_started = time.perf_counter()\n" + main_imports() + \
+           "\nprint(time.perf_counter() - _started)"
+    result = run_child(code, flags=("-X", "importtime"))
+    # Interpreter start-up (site, encodings...) is logged too; keep the packages main.py names
+    roots = {module.split(".")[0] for module in re.findall(r"^(?:from|import) ([\w.]+)", code, re.M)}
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that pulled them in
+        if not name[1:].startswith(" ") and name.strip().split(".")[0] in roots:
+            modules.append((name.strip(), int(cumulative) / 1e6))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return {"seconds": round(float(result.stdout.split()[-1]), 4),
+            "top_modules": {name: round(seconds, 4) for name, seconds in modules[:TOP_MODULES]}}
+
+
+def measure_deferred() -> dict:
+    """Extra seconds each deferred module would add on top of main.py's imports."""
+    deferred = {}
+    for module in DEFERRED_MODULES:
+        code = main_imports() + f"\nimport time\n_started = time.perf_counter()\nimport {module}\n" \
+                                "print(time.perf_counter() - _started)"
+        try:
+            deferred[module] = round(float(run_child(code).stdout.split()[-1]), 4)
+        except subprocess.CalledProcessError:
+            deferred[module] = None
+    return deferred
+
+
+def render_once(workdir: str) -> dict:
+    """Runs in the child: first render of main.py, then a warm rerun."""
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+    from streamlit.testing.v1 import AppTest
+    from app.utils.instrumentation import STAGE_STATS
+
+    started = time.perf_counter()
+    app = AppTest.from_file(MAIN_PATH, default_timeout=600)
+    app.run()
+    first_render = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    shell = next(row["max_ms"] for row in STAGE_STATS.summary() if row["stage"] == "shell") / 1000
+
+    started = time.perf_counter()
+    AppTest.from_file(MAIN_PATH, default_timeout=600).run()
+    warm = time.perf_counter() - started
+    return {"shell": round(shell, 4), "first_render": round(first_render, 4), "warm": round(warm, 4)}
+
+
+def measure_render(workdir: str) -> dict:
+    env = dict(os.environ, HYDROAI_STUB_LLM="1", HYDROAI_CHAT_BACKEND="memory", PYTHONPATH=REPO_ROOT)
+    code = f"import json\nfrom benchmarks.startup import render_once\nprint(json.dumps(render_once({workdir!r})))"
+    result = run_child(code, cwd=REPO_ROOT, env=env)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def prepare_workdir(workdir: str, rows: int) -> None:
+    sys.path.insert(0, REPO_ROOT)
+    from app.utils.data_loader import DATA_PATH, convert_to_columnar
+    from benchmarks.synthetic import make_groundwater_frame
+
+    csv_path = os.path.join(workdir, DATA_PATH)
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    make_groundwater_frame(rows).to_csv(csv_path, index=False)
+    convert_to_columnar(csv_path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100k", choices=list(SIZES), help="synthetic dataset size")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per measurement; the median is kept")
+    parser.add_argument("--output", help="also write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    imports = [measure_imports() for _ in range(args.repeat)]
+    results = {
+        "imports": {"seconds": statistics.median(run["seconds"] for run in imports),
+                    "top_modules": imports[-1]["top_modules"]},
+        "deferred_imports": measure_deferred(),
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_workdir(workdir, SIZES[args.rows])
+        # The first boot also builds the on-disk cube and caches; later boots are plain restarts
+        results["first_boot"] = measure_render(workdir)
+        restarts = [measure_render(workdir) for _ in range(args.repeat)]
+        results["restart"] = {key: statistics.median(run[key] for run in restarts) for key in restarts[0]}
+
+    print(f"imports                    {results['imports']['seconds'] * 1000:>10.1f} ms")
+    for name, seconds in results["imports"]["top_modules"].items():
+        print(f"  {name:<24} {seconds * 1000:>10.1f} ms")
+    for name, seconds in results["deferred_imports"].items():
+        print(f"{'deferred ' + name:<26} {'n/a' if seconds is None else f'{seconds * 1000:.1f}':>10} ms")
+    for phase in ("first_boot", "restart"):
+        for key, seconds in results[phase].items():
+            print(f"{phase + ' ' + key:<26} {seconds * 1000:>10.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+GUJARAT_DISTRICTS = [
+    "Ahmedabad", "Amreli", "Anand", "Aravalli", "Banaskantha", "Bharuch", "Bhavnagar", "Botad",
+    "Chhota Udaipur", "Dahod", "Dang", "Devbhoomi Dwarka", "Gandhinagar", "Gir Somnath", "Jamnagar",
+    "Junagadh", "Kheda", "Kutch", "Mahisagar", "Mehsana", "Morbi", "Narmada", "Navsari",
+    "Panch Mahals", "Patan", "Porbandar", "Rajkot", "Sabarkantha", "Surat", "Surendranagar",
+    "Tapi", "Vadodara", "Valsad",
+]
+OTHER_STATES = ["Rajasthan", "Maharashtra", "Madhya Pradesh", "Karnataka", "Tamil Nadu", "Uttar Pradesh"]
+
+# (column, gamma shape, gamma scale) chosen so medians sit near typical CGWB values
+PARAMETERS = [
+    ("EC", 2.0, 900.0), ("TDS", 2.0, 600.0), ("TH", 2.5, 140.0), ("Ca", 2.5, 35.0),
+    ("Mg", 2.5, 20.0), ("Na", 2.0, 120.0), ("Cl", 1.8, 220.0), ("SO4", 1.8, 80.0),
+    ("NO3", 1.5, 25.0), ("F", 2.0, 0.6), ("Fe", 1.2, 0.25), ("As", 1.0, 0.004),
+]
+
+
+def make_groundwater_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic CGWB-style frame; above 100k rows other states' districts are mixed in."""
+    rng = np.random.default_rng(seed)
+    districts = list(GUJARAT_DISTRICTS)
+    states = ["Gujarat"] * len(districts)
+    if rows > 100_000:
+        for state in OTHER_STATES:
+            districts += [f"{state[:3]} District {i}" for i in range(30)]
+            states += [state] * 30
+    district_codes = rng.integers(0, len(districts), rows)
+    stations_per_district = max(1, min(2000, rows // (len(districts) * 4)))
+    station_codes = rng.integers(0, stations_per_district, rows)
+
+    frame = {
+        "STATE": np.array(states)[district_codes],
+        "DISTRICT": pd.Categorical.from_codes(district_codes, categories=districts),
+        "STN_NAME": np.char.add(np.array(districts, dtype=str)[district_codes], np.char.add(" W", station_codes.astype(str))),
+        "LATITUDE": 20.0 + rng.random(rows) * 4.5,
+        "LONGITUDE": 68.5 + rng.random(rows) * 5.5,
+        "Year": rng.integers(2000, 2024, rows),
+        "pH": rng.normal(7.6, 0.45, rows).round(2),
+    }
+    for name, shape, scale in PARAMETERS:
+        values = rng.gamma(shape, scale, rows)
+        values[rng.random(rows) < 0.03] = np.nan
+        frame[name] = values.round(3)
+    return pd.DataFrame(frame)
@@ -1,18 +1,187 @@
+"""Streaming cleaner for raw groundwater dumps.
+
+    python clean_data.py
+    python clean_data.py data/finaldataset.csv --format parquet --chunksize 200000
+    python clean_data.py dump.csv --encoding cp1252 --output data/dump_clean.csv
+
+The file is read in chunks, so memory stays flat however large the dump is.
+Headers are normalized once and names (district, state, station...) are
+title-cased per distinct value, not per row. Numeric columns are decided from the
+first chunk, and unparseable values in them are blanked and counted per column.
+Every chunk is written with the same types: whole-number years (a fractional or
+out-of-range year counts as unparseable) and floats for everything else.
+"""
+import argparse
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
 import pandas as pd
 
-def clean_csv_file():
-    input_file = "data/finaldataset.csv"
-    output_file = "data/finaldataset_clean.csv"
-    
-    df = pd.read_csv(input_file, encoding='latin-1')
-    
-    df.columns = df.columns.str.strip().str.replace('\n', '').str.replace('\r', '')
-    df = df.dropna(how='all')
-    df.to_csv(output_file, index=False)
-    
-    print(f"Columns: {df.columns.tolist()}")
-    print(f"Rows: {len(df)}")
-    print(f"Saved as: {output_file}")
+from app.utils.data_loader import HAS_PYARROW, detect_encoding, is_categorical_column, is_year_column
+from app.utils.helpers import normalize_column_names, normalize_names
+from app.utils.standards import parameter_for_column
+
+INPUT_FILE = "data/finaldataset.csv"
+DEFAULT_CHUNKSIZE = 100_000
+# A column is numeric when at least this share of its first-chunk values parse as numbers
+NUMERIC_SHARE = 0.9
+# Unparseable values kept per column for the report
+BAD_SAMPLES = 5
+# Years are written as int16 in Parquet
+YEAR_LIMITS = (-32768, 32767)
+
+
+def output_path(input_file: str, output_format: str) -> str:
+    return os.path.splitext(input_file)[0] + ("_clean.parquet" if output_format == "parquet" else "_clean.csv")
+
+
+def numeric_columns(chunk: pd.DataFrame) -> list:
+    """Columns of a raw (all-text) chunk that hold numbers; names are never numeric."""
+    numeric = []
+    for col in chunk.columns:
+        if is_categorical_column(col):
+            continue
+        # Known water-quality parameters are numeric even when a dump is full of "BDL"/"<0.01" entries
+        if parameter_for_column(col) is not None:
+            numeric.append(col)
+            continue
+        values = chunk[col].dropna()
+        if not values.empty and pd.to_numeric(values, errors='coerce').notna().mean() >= NUMERIC_SHARE:
+            numeric.append(col)
+    return numeric
+
+
+def numeric_dtypes(numeric) -> Dict[str, object]:
+    """The pandas dtype every chunk's numeric columns are cast to, fixed before the first write."""
+    return {col: "Int64" if is_year_column(col) else np.float64 for col in numeric}
+
+
+def parquet_schema(columns, numeric):
+    import pyarrow as pa
+
+    fields = []
+    for col in columns:
+        if col in numeric:
+            kind = pa.int16() if is_year_column(col) else pa.float32()
+        elif is_categorical_column(col):
+            # Read back as categoricals, like the typed copy data_loader writes
+            kind = pa.dictionary(pa.int32(), pa.string())
+        else:
+            kind = pa.string()
+        fields.append(pa.field(col, kind))
+    return pa.schema(fields)
+
+
+def clean_csv_file(input_file: str = INPUT_FILE, output_file: Optional[str] = None,
+                   chunksize: int = DEFAULT_CHUNKSIZE, encoding: Optional[str] = None,
+                   output_format: str = "csv") -> dict:
+    """Clean ``input_file`` chunk by chunk into CSV or Parquet and return a report."""
+    if output_format == "parquet" and not HAS_PYARROW:
+        raise ImportError("pyarrow is required to write Parquet output")
+    started = time.perf_counter()
+    encoding = encoding or detect_encoding(input_file)
+    output_file = output_file or output_path(input_file, output_format)
+    tmp_file = output_file + ".tmp"
+
+    header = numeric = dtypes = schema = writer = None
+    errors: Dict[str, int] = {}
+    bad_values: Dict[str, list] = {}
+    rows_read = rows_written = 0
+    finished = False
+    try:
+        # Everything is read as text so every chunk gets the same columns and types
+        reader = pd.read_csv(input_file, encoding=encoding, chunksize=chunksize, dtype=str)
+        for chunk in reader:
+            rows_read += len(chunk)
+            if header is None:
+                header = normalize_column_names(chunk.columns)
+            chunk.columns = header
+            text_cols = [col for col in header if col not in (numeric or ())]
+            for col in text_cols:
+                chunk[col] = chunk[col].str.strip().replace("", np.nan)
+            chunk = chunk.dropna(how='all')
+
+            if numeric is None:
+                numeric = numeric_columns(chunk)
+                dtypes = numeric_dtypes(numeric)
+                errors = {col: 0 for col in numeric}
+                bad_values = {col: [] for col in numeric}
+            for col in numeric:
+                raw = chunk[col].str.strip()
+                try:
+                    # Fast path: the whole chunk parses, which is the common case
+                    values = raw.astype(np.float64)
+                except (ValueError, TypeError):
+                    values = pd.to_numeric(raw, errors='coerce')
+                if dtypes[col] == "Int64":
+                    values = values.where((values % 1 == 0) & values.between(*YEAR_LIMITS))
+                failed = values.isna() & raw.notna() & (raw != "")
+                if failed.any():
+                    errors[col] += int(failed.sum())
+                    if len(bad_values[col]) < BAD_SAMPLES:
+                        new_values = [value for value in raw[failed].unique() if value not in bad_values[col]]
+                        bad_values[col] += new_values[:BAD_SAMPLES - len(bad_values[col])]
+                chunk[col] = values.astype(dtypes[col])
+            for col in header:
+                if is_categorical_column(col):
+                    # Only the distinct names in the chunk are normalized
+                    chunk[col] = normalize_names(chunk[col])
+
+            if output_format == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if writer is None:
+                    schema = parquet_schema(header, numeric)
+                    writer = pq.ParquetWriter(tmp_file, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            else:
+                chunk.to_csv(tmp_file, mode="w" if rows_written == 0 else "a", header=rows_written == 0, index=False)
+            rows_written += len(chunk)
+        if rows_written == 0 and output_format == "csv":
+            # Still leave a header-only file behind
+            pd.DataFrame(columns=header if header is not None else []).to_csv(tmp_file, index=False)
+        finished = True
+    except UnicodeDecodeError as error:
+        raise ValueError(f"{input_file} is not valid {encoding} past the sampled blocks ({error}); "
+                         f"pass the encoding explicitly") from error
+    finally:
+        if writer is not None:
+            writer.close()
+        if not finished and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    os.replace(tmp_file, output_file)
+
+    return {
+        "input": input_file,
+        "output": output_file,
+        "encoding": encoding,
+        "columns": list(header) if header is not None else [],
+        "numeric_columns": numeric or [],
+        "rows_read": rows_read,
+        "rows_written": rows_written,
+        "empty_rows_dropped": rows_read - rows_written,
+        "coercion_errors": {col: count for col, count in errors.items() if count},
+        "bad_values": {col: values for col, values in bad_values.items() if values},
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
 
 if __name__ == "__main__":
-    clean_csv_file()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default=INPUT_FILE)
+    parser.add_argument("--output", help="defaults to <input>_clean.csv or .parquet")
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet"])
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    parser.add_argument("--encoding", help="skip detection and read with this encoding")
+    args = parser.parse_args()
+
+    report = clean_csv_file(args.input, args.output, args.chunksize, args.encoding, args.format)
+    print(f"Encoding: {report['encoding']}")
+    print(f"Columns: {report['columns']}")
+    print(f"Rows: {report['rows_written']} ({report['empty_rows_dropped']} empty rows dropped)")
+    for col, count in report["coercion_errors"].items():
+        print(f"  {col}: {count} non-numeric values blanked, e.g. {report['bad_values'][col]}")
+    print(f"Saved as: {report['output']} in {report['seconds']}s")
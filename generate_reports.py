@@ -0,0 +1,129 @@
+"""Headless batch reports: answer questions for many districts without the chat.
+
+    python generate_reports.py --districts all --out reports/2026-10
+    python generate_reports.py --districts Kutch,Surat --questions questions.txt --workers 4 --rpm 60
+    python generate_reports.py --districts all --stub          # offline, no API calls
+
+Every finished answer is appended to <out>/checkpoint.jsonl; rerunning the same
+command skips those and only retries what is missing or failed.
+"""
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from app.utils.aggregate_cube import load_or_build_cube
+from app.utils.data_loader import DATA_PATH, data_version, has_store, load_dataset, load_store
+from app.utils.dataset_registry import CATALOG_PATH, load_registry
+from app.utils.district_index import DistrictIndex
+from app.utils.forecast import load_or_fit_forecaster
+from app.utils.helpers import DISTRICT_KEYWORDS, find_column, get_data_summary
+from app.utils.llm import MODEL_NAME, StubModel, cache_model_name, get_model
+from app.utils.prompts import scope_label
+from app.utils.reports import (
+    CHECKPOINT_NAME, DEFAULT_QUESTIONS, Checkpoint, plan_jobs, run_job, run_reports, write_reports
+)
+from app.utils.response_cache import build_response_cache
+
+
+def read_questions(value: str):
+    if value and os.path.exists(value):
+        with open(value, encoding="utf-8") as handle:
+            return [line.strip() for line in handle if line.strip() and not line.startswith("#")]
+    return [value] if value else list(DEFAULT_QUESTIONS)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DATA_PATH,
+                        help="dataset file (ignored when the partitioned store or data/catalog.json exists)")
+    parser.add_argument("--states", default="all",
+                        help="comma-separated states from data/catalog.json; only their datasets are read")
+    parser.add_argument("--districts", default="all",
+                        help="comma-separated district names, 'all', or 'dataset' for one whole-dataset report")
+    parser.add_argument("--questions", default="", help="a question, or a file with one question per line")
+    parser.add_argument("--mode", default="Standard Analysis", choices=["Standard Analysis", "Predictive Modeling"])
+    parser.add_argument("--out", default=os.path.join("reports", time.strftime("%Y-%m")))
+    parser.add_argument("--format", default="md,json", help="comma-separated subset of md,json")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent model calls")
+    parser.add_argument("--rpm", type=float, default=30, help="max model requests per minute (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--stub", action="store_true", help="use the offline stub model")
+    parser.add_argument("--cache", default="sqlite", choices=["none", "memory", "sqlite"],
+                        help="response cache; sqlite (memory in front of disk) reuses answers across runs")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    if args.stub:
+        model = StubModel(args.model)
+    else:
+        model = get_model(args.model)
+    # Stub answers are cached and checkpointed apart from real ones
+    model_name = cache_model_name(args.model, stub=args.stub or None)
+    cache = None if args.cache == "none" else build_response_cache(args.cache)
+
+    if os.path.exists(CATALOG_PATH) or args.states != "all":
+        registry = load_registry()
+        states = None if args.states == "all" else [" ".join(name.split()).title() for name in args.states.split(",")]
+        unknown = sorted(set(states or ()) - set(registry.states()))
+        if unknown:
+            print(f"Unknown state: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        df = registry.load(states=states)
+        version, scope = registry.version(), (",".join(sorted(states)) if states else "all")
+        label = scope_label(states or registry.states())
+    else:
+        df = load_store() if has_store() else load_dataset(args.data)
+        version, scope, label = data_version(args.data), "all", scope_label()
+    scoped_version = f"{version}|{scope}"
+    data_summary = get_data_summary(df, scoped_version)
+    cube = load_or_build_cube(df, version=scoped_version)
+    # Trend fits only feed Predictive Modeling prompts
+    forecaster = load_or_fit_forecaster(df, version=scoped_version) if args.mode == "Predictive Modeling" else None
+    district_col = find_column(df.columns, DISTRICT_KEYWORDS)
+    district_index = DistrictIndex(df, district_col) if district_col is not None else None
+
+    if args.districts == "dataset" or district_index is None:
+        districts = [None]
+    elif args.districts == "all":
+        districts = district_index.names
+    else:
+        districts = []
+        for name in args.districts.split(","):
+            if name.strip() not in district_index:
+                print(f"Unknown district: {name.strip()}", file=sys.stderr)
+                return 2
+            districts.append(district_index.match_text(name) or name.strip())
+
+    jobs = plan_jobs(districts, read_questions(args.questions), args.mode, model_name, version, scope)
+    os.makedirs(args.out, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(args.out, CHECKPOINT_NAME))
+    print(f"{len(jobs)} jobs, {sum(checkpoint.done(job['id']) for job in jobs)} already done")
+
+    def work(job, gate):
+        return run_job(job, df, district_index, cube, data_summary, model, model_name, cache, forecaster, gate,
+                       scope=label)
+
+    def progress(job, error):
+        status = "FAILED " + str(error) if error is not None else "ok"
+        print(f"  [{job['district'] or 'dataset'}] {job['question'][:60]} ... {status}", flush=True)
+
+    started = time.perf_counter()
+    result = run_reports(jobs, work, checkpoint, workers=args.workers, requests_per_minute=args.rpm,
+                         retries=args.retries, on_progress=progress)
+    records = [checkpoint.records[job["id"]] for job in jobs if checkpoint.done(job["id"])]
+    written = write_reports(records, args.out, formats=args.format.split(","))
+
+    print(f"Completed {result['completed']}/{result['pending']} pending jobs in "
+          f"{time.perf_counter() - started:.1f}s; wrote {len(written)} files to {args.out}")
+    if result["failed"]:
+        print(f"{len(result['failed'])} jobs failed; rerun the same command to retry them", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
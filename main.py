@@ -1,15 +1,26 @@
 import streamlit as st
 import pandas as pd
-import google.generativeai as genai
 from dotenv import load_dotenv 
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+# The Gemini SDK is imported on first model call (see get_model); plotly only inside the tab that draws
 import numpy as np
-from datetime import datetime
 import time
-from app.utils.helpers import get_data_summary
+import uuid
+from app.utils.helpers import DISTRICT_KEYWORDS, find_column, get_data_summary
+from app.utils.app_data import catalog_stamp, current_data_version, get_dataset_handle, get_registry, scoped_version
+from app.utils.aggregate_cube import load_or_build_cube
+from app.utils.chat_history import PAGE, ChatHistory, build_chat_store, model_summarizer
+from app.utils.dispatcher import build_dispatcher
+from app.utils.district_index import DistrictIndex
+from app.utils.forecast import HORIZON, load_or_fit_forecaster
+from app.utils.instrumentation import STAGE_STATS, RerunProfiler, configure_metrics_logging
+from app.utils.llm import MODEL_NAME, cache_model_name, get_model, strip_unwanted
+from app.utils.prompts import build_analysis_prompt, build_phrasing_prompt, build_summary_prompt, scope_label
+from app.utils.query_engine import answer_question
+from app.utils.response_cache import build_response_cache, cached_generate, cached_stream, fingerprint, make_cache_key
+from app.utils.spatial import build_spatial_index
+from app.utils.wqi import WQIEngine
 
 load_dotenv()
 
@@ -21,158 +32,81 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-rerun stage timers; one JSON log line is emitted when the script finishes
+configure_metrics_logging()
+run_ctx = get_script_run_ctx()
+profiler = RerunProfiler(session_id=run_ctx.session_id if run_ctx else None)
+# Script start until the header and placeholder cards are on the page
+profiler.begin("shell")
+
+THEME_CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "assets", "theme.css")
+
+@st.cache_resource
+def get_theme_css():
+    # Theme lives in app/assets so the script stays a thin shell; the file is read once per process
+    with open(THEME_CSS_PATH, encoding="utf-8") as handle:
+        return handle.read()
+
 # Dark theme CSS (single mode)
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Exo+2:wght@300;400;600&display=swap');
-
-    :root {
-        --bg-primary: linear-gradient(135deg, #0c0c0c 0%, #1a1a2e 25%, #16213e 50%, #0f3460 75%, #533483 100%);
-        --text-color: #ffffff;
-        --card-bg: rgba(255, 255, 255, 0.1);
-        --card-border: rgba(255, 255, 255, 0.2);
-        --card-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-        --chart-bg: rgba(0, 0, 0, 0);
-        --chart-paper: rgba(0, 0, 0, 0);
-        --accent: #00d4ff;
-    }
-
-    .stApp {
-        background: var(--bg-primary);
-        color: var(--text-color);
-        transition: all 0.3s ease;
-    }
-    
-    .main-header {
-        background: linear-gradient(90deg, #00d4ff, #0099cc, #7b68ee, #9370db);
-        background-size: 400% 400%;
-        animation: gradientShift 4s ease infinite;
-        padding: 2rem;
-        border-radius: 20px;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 20px 40px rgba(0, 212, 255, 0.3);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    @keyframes gradientShift {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
-    
-    .main-title {
-        font-family: 'Orbitron', monospace;
-        font-size: 3.5rem;
-        font-weight: 900;
-        text-shadow: 0 0 20px rgba(0, 212, 255, 0.8);
-        margin: 0;
-        background: linear-gradient(45deg, #00d4ff, #ffffff, #7b68ee);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        animation: titleGlow 2s ease-in-out infinite alternate;
-    }
-    
-    @keyframes titleGlow {
-        from { filter: drop-shadow(0 0 10px rgba(0, 212, 255, 0.8)); }
-        to { filter: drop-shadow(0 0 20px rgba(123, 104, 238, 0.8)); }
-    }
-    
-    .subtitle {
-        font-family: 'Exo 2', sans-serif;
-        font-size: 1.2rem;
-        color: #b0c4de;
-        margin-top: 1rem;
-        text-shadow: 0 0 10px rgba(176, 196, 222, 0.5);
-    }
-    
-    .metric-card {
-        background: linear-gradient(145deg, rgba(255, 255, 255, 0.1), rgba(255, 255, 255, 0.05));
-        backdrop-filter: blur(10px);
-        border: 1px solid var(--card-border);
-        border-radius: 15px;
-        padding: 1.5rem;
-        margin: 1rem 0;
-        box-shadow: var(--card-shadow);
-        transition: all 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 15px 40px rgba(0, 212, 255, 0.2);
-        border-color: rgba(0, 212, 255, 0.5);
-    }
-    
-    .metric-value {
-        font-family: 'Orbitron', monospace;
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: #00d4ff;
-        text-shadow: 0 0 15px rgba(0, 212, 255, 0.6);
-    }
-    
-    .metric-label {
-        font-family: 'Exo 2', sans-serif;
-        font-size: 0.9rem;
-        color: #b0c4de;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-
-    .stChatMessage {
-        background: linear-gradient(145deg, rgba(0, 212, 255, 0.1), rgba(123, 104, 238, 0.1));
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 15px;
-        backdrop-filter: blur(10px);
-    }
-
-    .stTextInput>div>div>input {
-        background-color: var(--card-bg);
-        color: var(--text-color);
-        border: 1px solid var(--card-border);
-    }
-
-    .stSelectbox>div>div>div>div {
-        background-color: var(--card-bg);
-        color: var(--text-color);
-    }
-
-    .stMultiSelect>div>div>div>div>span {
-        background-color: var(--card-bg);
-        color: var(--text-color);
-        border: 1px solid var(--card-border);
-    }
-
-    /* Plotly background */
-    .js-plotly-plot .plotly .main-svg {
-        background: var(--chart-bg) !important;
-    }
-    .js-plotly-plot .plotly .plotly-svg {
-        background: var(--chart-paper) !important;
-    }
-
-    .stDataFrame {
-        background-color: var(--card-bg);
-        border-radius: 10px;
-        box-shadow: var(--card-shadow);
-    }
-</style>
-""", unsafe_allow_html=True)
+profiler.begin("css")
+st.markdown(f"<style>\n{get_theme_css()}</style>", unsafe_allow_html=True)
+profiler.end("css")
 
 # Plotly theme constants (dark mode only)
 plotly_template = 'plotly_dark'
 font_color = 'white'
 grid_color = '#2a2a2a'
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+@st.cache_resource(max_entries=2)
+def get_catalog_states(catalog_version):
+    return get_registry(catalog_stamp()).states()
+
+@st.cache_resource(max_entries=2)
+def get_district_index(district_col, version):
+    # Built once per process and data version: district row ranges over the shared frame and name lookups
+    return DistrictIndex(get_dataset_handle(version).frame, district_col)
+
+@st.cache_resource(max_entries=2)
+def get_aggregate_cube(version):
+    # District × year × parameter statistics, persisted next to the data so restarts only load the arrays
+    handle = get_dataset_handle(version)
+    return load_or_build_cube(handle.frame, version=handle.version)
+
+@st.cache_resource(max_entries=2)
+def get_forecaster(version):
+    # Trend fits for every district/station series, persisted per data version like the cube
+    handle = get_dataset_handle(version)
+    return load_or_fit_forecaster(handle.frame, version=handle.version)
 
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+@st.cache_resource(max_entries=2)
+def get_wqi_engine(version):
+    # Per-sample WQI and exceedance flags computed once per data version, rolled up per district
+    return WQIEngine(get_dataset_handle(version).frame)
 
-# Load data with progress indicator
-@st.cache_data
-def load_groundwater_data():
-    return pd.read_csv("data/gujarat_groundwater_merged_final.csv")
+@st.cache_resource(max_entries=2)
+def get_spatial_index(version):
+    # Grid index over well coordinates; None when the dataset has no latitude/longitude
+    return build_spatial_index(get_dataset_handle(version).frame)
+
+@st.cache_resource
+def get_response_cache():
+    # Shared by all sessions; HYDROAI_CACHE_BACKEND=sqlite also persists to disk
+    return build_response_cache(os.getenv("HYDROAI_CACHE_BACKEND", "memory"))
+
+@st.cache_resource
+def get_figure_cache():
+    from app.utils.visualization import FigureCache
+    return FigureCache()
+
+@st.cache_resource
+def get_chat_store():
+    # Shared by all sessions; HYDROAI_CHAT_BACKEND=memory keeps conversations in-process only
+    return build_chat_store(os.getenv("HYDROAI_CHAT_BACKEND", "sqlite"))
+
+@st.cache_resource
+def get_dispatcher():
+    # One bounded pool per process; identical concurrent questions share a call
+    return build_dispatcher()
 
 # Main header with futuristic design
 st.markdown("""
@@ -182,10 +116,17 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Loading animation
-with st.spinner('🚀 Initializing quantum data processors...'):
-    df = load_groundwater_data()
-    data_summary = get_data_summary(df)
+# Placeholder cards paint with the header, before the first data load, and are replaced below
+card_slot = st.empty()
+with card_slot.container():
+    for column in st.columns(4):
+        column.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">…</div>
+            <div class="metric-label">Loading</div>
+        </div>
+        """, unsafe_allow_html=True)
+profiler.end("shell")
 
 # Sidebar with futuristic controls
 with st.sidebar:
@@ -196,44 +137,82 @@ with st.sidebar:
         </h2>
     </div>
     """, unsafe_allow_html=True)
-    
+
+    # State scope comes first: it decides which catalogued datasets are loaded at all
+    data_version = current_data_version()
+    registry = None if data_version.startswith("shared-") else get_registry(catalog_stamp())
+    states = get_catalog_states(data_version) if registry is not None else []
+    if len(states) > 1:
+        # With several catalogued files, start on one state instead of loading them all
+        selected_state = st.selectbox("🗺️ State", ['All States'] + states,
+                                      index=1 if len(registry.sources) > 1 else 0)
+    else:
+        selected_state = 'All States'
+
+# Loading animation
+with st.spinner('🚀 Initializing quantum data processors...'):
+    with profiler.stage("data_load"):
+        version = scoped_version(data_version, selected_state)
+        df = get_dataset_handle(version).frame
+    with profiler.stage("cube"):
+        cube = get_aggregate_cube(version)
+
+with st.sidebar:
     # Find district column
-    district_col = next((col for col in df.columns if 'district' in col.lower() or 'location' in col.lower()), None)
+    district_col = find_column(df.columns, DISTRICT_KEYWORDS)
     
+    profiler.begin("filter")
     if district_col:
-        districts = ['All Districts'] + sorted(df[district_col].unique().astype(str).tolist())
+        district_index = get_district_index(district_col, version)
+        districts = ['All Districts'] + district_index.names
         selected_district = st.selectbox("🎯 Target District", districts)
         
         # Filter data based on selection
         if selected_district != 'All Districts':
-            filtered_df = df[df[district_col].str.lower() == selected_district.lower()]
+            filtered_df = district_index.slice(selected_district)
         else:
             filtered_df = df
     else:
+        district_index = None
         filtered_df = df
         selected_district = 'All Districts'
+    profiler.end("filter")
     
     # Analysis mode selector
     analysis_mode = st.selectbox("🔬 Analysis Mode", 
                                ["Standard Analysis", "Predictive Modeling"])
     
+    # Fitted trends are only needed for Predictive Modeling
+    forecaster = get_forecaster(version) if analysis_mode == "Predictive Modeling" else None
+
     # Real-time metrics toggle
     show_realtime = st.toggle("📊 Metrics", value=True)
 
+    # Render answers token by token instead of waiting for the full text
+    stream_responses = st.toggle("⚡ Stream Responses", value=True)
+
+    # Answer simple "average X in Y" lookups from the data without calling the model
+    instant_answers = st.toggle("🧮 Instant Answers", value=True)
+
 # Main dashboard with metrics
-col1, col2, col3, col4 = st.columns(4)
+profiler.begin("metric_cards")
+# Dashboard numbers come from the precomputed cube rather than the filtered frame
+cube_district = None if selected_district == 'All Districts' else selected_district
+if cube_district is not None and not cube.has_district(cube_district):
+    cube_district = None
+col1, col2, col3, col4 = card_slot.container().columns(4)
 
 with col1:
     st.markdown(f"""
     <div class="metric-card">
-        <div class="metric-value">{len(filtered_df):,}</div>
+        <div class="metric-value">{cube.rows(cube_district):,}</div>
         <div class="metric-label">Data Points</div>
     </div>
     """, unsafe_allow_html=True)
 
 with col2:
     if district_col:
-        unique_districts = filtered_df[district_col].nunique() if selected_district == 'All Districts' else 1
+        unique_districts = len(cube.districts) if selected_district == 'All Districts' else 1
     else:
         unique_districts = 1
     st.markdown(f"""
@@ -246,11 +225,14 @@ with col2:
 with col3:
     # Find numeric columns for quality metrics
     numeric_cols = filtered_df.select_dtypes(include=[np.number]).columns
-    quality_score = min(100, max(0, int(np.random.uniform(75, 95))))  # Simulated quality score
+    # Weighted arithmetic WQI (lower is better) from the per-district roll-up
+    wqi_engine = get_wqi_engine(version)
+    quality = wqi_engine.summary(cube_district)
+    quality_score = quality["wqi"]
     st.markdown(f"""
     <div class="metric-card">
-        <div class="metric-value">{quality_score}%</div>
-        <div class="metric-label">Quality Index</div>
+        <div class="metric-value">{"–" if np.isnan(quality_score) else f"{quality_score:.0f}"}</div>
+        <div class="metric-label">WQI · {quality["category"]}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -263,58 +245,173 @@ with col4:
     </div>
     """, unsafe_allow_html=True)
 
+profiler.end("metric_cards")
+
 # Interactive visualizations
 if show_realtime and len(numeric_cols) > 0:
     st.markdown("### 📈 Data Visualization")
     
-    # Create tabs for different visualizations
-    tab1, tab2 = st.tabs(["🌊 Water Quality Trends", "⚡ Monitoring"])
+    # Create tabs for different visualizations; only the open one builds its figure (and, for the
+    # map, the spatial index). Streamlit releases without tab state run every tab as before.
+    tab_labels = ["🌊 Water Quality Trends", "⚡ Monitoring", "📅 Yearly Profile", "🗺️ Wells Map"]
+    try:
+        tab1, tab2, tab3, tab4 = st.tabs(tab_labels, key="viz_tab", on_change="rerun")
+    except TypeError:
+        tab1, tab2, tab3, tab4 = st.tabs(tab_labels)
+
+    def tab_is_open(tab):
+        return getattr(tab, "open", None) is not False
     
     with tab1:
-        # Sample visualization with plotly
-        if len(numeric_cols) >= 2:
-            fig = px.scatter(filtered_df.head(1000), 
-                           x=numeric_cols[0], 
-                           y=numeric_cols[1],
-                           title="Water Quality Parameter Correlation",
-                           template=plotly_template)
+        if tab_is_open(tab1) and len(numeric_cols) >= 2:
+            render_mode = st.radio("Large data rendering", ["Density bins", "LTTB sample"], horizontal=True)
+            method = "bin" if render_mode == "Density bins" else "lttb"
+            x_col, y_col = numeric_cols[0], numeric_cols[1]
+            # Every row is represented; large selections are binned or downsampled server-side
+            profiler.begin("plot")
+            from app.utils.visualization import build_scatter_figure
+            fig = get_figure_cache().get_or_build(
+                (version, selected_district, x_col, y_col, method),
+                lambda: build_scatter_figure(
+                    filtered_df, x_col, y_col,
+                    title="Water Quality Parameter Correlation",
+                    method=method,
+                    template=plotly_template,
+                    font_color=font_color,
+                    grid_color=grid_color
+                )
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            profiler.end("plot")
+    
+    with tab2:
+        if tab_is_open(tab2):
+            # WQI gauge for the current selection, compared with the whole dataset
+            overall = wqi_engine.summary()
+            gauge_max = max(300, (quality_score if not np.isnan(quality_score) else 0) * 1.1)
+            import plotly.graph_objects as go
+            fig = go.Figure(go.Indicator(
+                mode = "gauge+number+delta",
+                value = quality_score,
+                domain = {'x': [0, 1], 'y': [0, 1]},
+                title = {'text': f"Water Quality Index · {quality['category']}"},
+                delta = {'reference': overall["wqi"], 'increasing': {'color': "red"}, 'decreasing': {'color': "green"}},
+                gauge = {
+                    'axis': {'range': [0, gauge_max]},
+                    'bar': {'color': "#00d4ff"},
+                    'steps': [
+                        {'range': [0, 50], 'color': "#1f4d3a"},
+                        {'range': [50, 100], 'color': "#3a3a3a"},
+                        {'range': [100, 200], 'color': "#555"},
+                        {'range': [200, gauge_max], 'color': "#6b2b2b"}],
+                    'threshold': {
+                        'line': {'color': "red", 'width': 4},
+                        'thickness': 0.75,
+                        'value': 100}
+                }
+            ))
             fig.update_layout(
+                template=plotly_template,
                 plot_bgcolor='rgba(0,0,0,0)',
                 paper_bgcolor='rgba(0,0,0,0)',
-                font_color=font_color
+                font_color=font_color,
+                height=400
             )
-            fig.update_xaxes(gridcolor=grid_color, zerolinecolor=grid_color)
-            fig.update_yaxes(gridcolor=grid_color, zerolinecolor=grid_color)
             st.plotly_chart(fig, use_container_width=True)
-    
-    with tab2:
-        # Simulated real-time gauge
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = quality_score,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Water Quality Index"},
-            delta = {'reference': 80},
-            gauge = {
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "#00d4ff"},
-                'steps': [
-                    {'range': [0, 50], 'color': "#3a3a3a"},
-                    {'range': [50, 80], 'color': "#555"}],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 90}
-            }
-        ))
-        fig.update_layout(
-            template=plotly_template,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color=font_color,
-            height=400
-        )
-        st.plotly_chart(fig, use_container_width=True)
+            worst = f"; most often exceeded: {quality['worst_parameter']}" if quality["worst_parameter"] else ""
+            st.caption(f"{quality['unsafe_share']:.0%} of {quality['samples']:,} samples breach at least one "
+                       f"BIS permissible limit{worst}")
+
+    with tab3:
+        if tab_is_open(tab3) and cube.parameters and cube.years:
+            trend_param = st.selectbox("Parameter", cube.parameters)
+            profiler.begin("plot_yearly")
+            # Read straight from the cube: mean with the p10–p90 band per year
+            yearly_mean = cube.yearly("mean", trend_param, cube_district)
+            yearly_p10 = cube.yearly("p10", trend_param, cube_district)
+            yearly_p90 = cube.yearly("p90", trend_param, cube_district)
+            import plotly.graph_objects as go
+            fig = go.Figure([
+                go.Scatter(x=yearly_p90.index, y=yearly_p90.values, line=dict(width=0), showlegend=False, hoverinfo='skip'),
+                go.Scatter(x=yearly_p10.index, y=yearly_p10.values, fill='tonexty', line=dict(width=0),
+                           fillcolor='rgba(0, 212, 255, 0.2)', name='p10–p90'),
+                go.Scatter(x=yearly_mean.index, y=yearly_mean.values, mode='lines+markers',
+                           line=dict(color='#00d4ff'), name='Mean'),
+            ])
+            trend = forecaster.trend(trend_param, cube_district) if forecaster is not None else None
+            if trend is not None:
+                # Fitted trend over the observed years, then the forecast with its 90% band
+                fitted = forecaster.forecast(trend_param, cube_district, start=forecaster.first_year)
+                ahead = fitted.loc[forecaster.last_year + 1:]
+                fig.add_traces([
+                    go.Scatter(x=ahead.index, y=ahead["upper"], line=dict(width=0), showlegend=False, hoverinfo='skip'),
+                    go.Scatter(x=ahead.index, y=ahead["lower"], fill='tonexty', line=dict(width=0),
+                               fillcolor='rgba(255, 107, 107, 0.2)', name='90% forecast band'),
+                    go.Scatter(x=fitted.index, y=fitted["forecast"], mode='lines',
+                               line=dict(color='#ff6b6b', dash='dash'), name='Trend / forecast'),
+                ])
+            fig.update_layout(
+                title=f"{trend_param} by Year",
+                template=plotly_template,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                font_color=font_color,
+                xaxis=dict(gridcolor=grid_color),
+                yaxis=dict(gridcolor=grid_color),
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            if trend is not None:
+                outlook = forecaster.outlook(cube_district, [trend_param])
+                crossing = outlook.at[trend_param, "crossing"]
+                reaches = "" if pd.isna(crossing) else f"; reaches the BIS limit around {int(crossing)}"
+                st.caption(f"Trend {trend['slope']:+.3g}/yr over {trend['n']:,} samples; "
+                           f"{HORIZON}-year forecast {outlook.at[trend_param, 'forecast']:.3g}{reaches}")
+                rising = forecaster.station_trends(trend_param, cube_district, limit=10)
+                if not rising.empty:
+                    st.dataframe(rising, hide_index=True, use_container_width=True)
+            elif forecaster is not None:
+                st.caption("Not enough samples across years to fit a trend here.")
+            profiler.end("plot_yearly")
+
+    with tab4:
+        if tab_is_open(tab4):
+            spatial = get_spatial_index(version)
+            if spatial is None:
+                st.info("This dataset has no latitude/longitude columns to map.")
+            else:
+                place_col, radius_col = st.columns([3, 1])
+                place = place_col.text_input("📍 Station name or 'lat, lon'", "")
+                radius_km = radius_col.number_input("Radius (km)", min_value=1.0, max_value=200.0, value=10.0, step=1.0)
+                profiler.begin("spatial")
+                from app.utils.visualization import build_well_map
+                located = spatial.locate(place) if place else None
+                if place and located is None:
+                    st.warning(f"No station matches '{place}'.")
+                if located:
+                    lat, lon, label = located
+                    wells = spatial.radius(lat, lon, radius_km)
+                    if wells.empty:
+                        wells = spatial.nearest(lat, lon, 10)
+                        st.caption(f"No wells within {radius_km:g} km of {label}; showing the 10 nearest.")
+                    else:
+                        st.caption(f"{len(wells):,} wells within {radius_km:g} km of {label}")
+                    fig = build_well_map(wells=wells, center=(lat, lon), zoom=10,
+                                         template=plotly_template, font_color=font_color)
+                    st.plotly_chart(fig, use_container_width=True)
+                    st.dataframe(spatial.aggregate(wells["well"]), use_container_width=True)
+                else:
+                    # Overview: wells merged per grid cell so the browser only draws a few hundred markers
+                    def build_overview():
+                        ids = None
+                        if selected_district != 'All Districts' and spatial.districts is not None:
+                            ids = np.flatnonzero(spatial.districts == selected_district)
+                        return build_well_map(clusters=spatial.clusters(ids=ids), template=plotly_template,
+                                              font_color=font_color)
+                    fig = get_figure_cache().get_or_build((version, "wells", selected_district), build_overview)
+                    st.caption(f"{len(spatial):,} wells; enter a station or coordinates to search nearby wells")
+                    st.plotly_chart(fig, use_container_width=True)
+                profiler.end("spatial")
 
 # Enhanced chat interface
 st.markdown("""
@@ -325,112 +422,142 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Display chat history with enhanced styling
-for message in st.session_state.chat_history:
+if 'chat' not in st.session_state:
+    # The chat id lives in the URL, so a reload picks the persisted conversation back up
+    chat_id = st.query_params.get("chat") or uuid.uuid4().hex
+    st.query_params["chat"] = chat_id
+    summarizer = None
+    if os.getenv("HYDROAI_CHAT_SUMMARY") == "model":
+        summarizer = model_summarizer(get_model(MODEL_NAME), build_summary_prompt, dispatcher=get_dispatcher())
+    chat_store = get_chat_store()
+    # The store purged expired conversations when it opened; long-running processes repeat that hourly
+    chat_store.purge_if_due()
+    st.session_state.chat = ChatHistory(chat_store, chat_id, summarizer=summarizer)
+    st.session_state.older_shown = 0
+chat = st.session_state.chat
+
+# Only the latest window is rendered on each rerun; older messages are read a page at a time on request
+profiler.begin("chat_render")
+def show_older_messages():
+    st.session_state.older_shown += PAGE
+
+hidden = chat.hidden()
+if hidden:
+    shown = min(hidden, st.session_state.older_shown)
+    if shown < hidden:
+        st.button(f"⬆️ Load older messages ({hidden - shown} more)", key="load_older", on_click=show_older_messages)
+    for message in chat.older(shown):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+for message in chat.recent():
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+profiler.end("chat_render")
 
 # Enhanced chat input
 prompt = st.chat_input("🔮 Ask about groundwater insights, predictions, or analysis...")
 
 if prompt:
-    st.session_state.chat_history.append({"role": "user", "content": prompt})
+    chat.append("user", prompt)
 
     with st.chat_message("user"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("🧠 Processing with quantum algorithms..."):
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            
-            # Enhanced context with analysis mode
-            district_col = next((col for col in df.columns if 'district' in col.lower() or 'location' in col.lower()), None)
-            district_names = df[district_col].unique().astype(str).tolist() if district_col is not None else []
+        # A question naming another catalogued state is answered from that state's data, loaded on demand
+        chat_df, chat_index, chat_cube, chat_forecaster = df, district_index, cube, forecaster
+        chat_version = version
+        chat_scope = scope_label(states if selected_state == 'All States' else [selected_state])
+        asked_state = registry.match_state(prompt) if len(states) > 1 else None
+        if asked_state and selected_state not in ('All States', asked_state):
+            with profiler.stage("data_load"), st.spinner(f"🗺️ Loading {asked_state} data..."):
+                chat_version = scoped_version(data_version, asked_state)
+                chat_df = get_dataset_handle(chat_version).frame
+                chat_cube = get_aggregate_cube(chat_version)
+                chat_index = get_district_index(district_col, chat_version) if district_col else None
+                chat_forecaster = get_forecaster(chat_version) if forecaster is not None else None
+                chat_scope = asked_state
+            st.caption(f"🗺️ Using the {asked_state} data for this question")
+        # Plain factual lookups are answered from the data; the model is only phrasing them if enabled
+        with profiler.stage("query_engine"):
+            quick_answer = answer_question(prompt, chat_df, chat_index, chat_cube) if instant_answers else None
+        
+        if quick_answer is not None:
+            profiler.count("instant_answer")
+            response_text = quick_answer
+            if os.getenv("HYDROAI_PHRASE_ANSWERS") == "1":
+                with st.spinner("🧠 Phrasing the result..."):
+                    phrase_key = make_cache_key(prompt, "phrase", cache_model_name(), fingerprint(quick_answer))
+                    dispatcher = get_dispatcher()
+                    response_text = dispatcher.call(
+                        phrase_key, cached_generate, get_model(MODEL_NAME),
+                        build_phrasing_prompt(prompt, quick_answer), phrase_key, get_response_cache(),
+                        gate=dispatcher.upstream
+                    )
+            st.markdown(response_text)
+            st.caption("⚡ Answered directly from the dataset")
+            chat.append("assistant", response_text)
+        else:
+            profiler.begin("llm")
+            with st.spinner("🧠 Processing with quantum algorithms..."):
+                model = get_model(MODEL_NAME)
             
-            # Find city in prompt
-            city = next(
-                (word for word in prompt.split() 
-                 if word.lower() in [name.lower() for name in district_names]),
-                None
-            )
+                # Find city in prompt
+                city = chat_index.match_text(prompt) if chat_index is not None else None
             
-            if city and district_col:
-                city_data = df[df[district_col].str.lower() == city.lower()].copy()
-                city_summary = city_data.describe(include='all').to_string()
-                sample_data = city_data.head(5).to_string()
-                
-                context_prompt = """
-                You are HydroAI, an advanced groundwater intelligence system analyzing data for {city_name} 
-                Current Analysis Mode: {analysis_mode}
-                
-                🌊 CITY DATA ANALYSIS - {city_upper}:
-                - Total samples: {sample_count:,}
-                - Data parameters: {params}
-                
-                📊 SAMPLE DATA (Latest 5 readings):
-                {sample_data}
-                
-                📈 STATISTICAL OVERVIEW:
-                {city_summary}
-                
-                🎯 USER QUERY: {prompt}
-                
-                Provide a comprehensive analysis with:
-                1. Key findings and insights
-                2. Water quality assessment
-                3. Potential concerns or recommendations
-                4. Future predictions if applicable
-                
-                Use emojis and formatting for better readability. Keep response engaging and professional.
-                """.format(
-                    city_name=city,
-                    city_upper=city.upper(),
-                    analysis_mode=analysis_mode,
-                    sample_count=len(city_data),
-                    params=', '.join(city_data.columns),
-                    sample_data=sample_data,
-                    city_summary=city_summary,
-                    prompt=prompt
-                )
-            else:
-                context_prompt = """
-                You are HydroAI, an advanced groundwater intelligence system for Gujarat.
-                Current Analysis Mode: {analysis_mode}
-                
-                🌊 GUJARAT GROUNDWATER DATASET:
-                {data_summary}
-                
-                🎯 USER QUERY: {prompt}
-                
-                Provide insights based on the dataset with:
-                1. Quantitative analysis with specific numbers
-                2. Regional patterns and trends
-                3. Water quality assessment
-                4. Actionable recommendations
-                
-                Use emojis and professional formatting. Be concise but comprehensive.
-                """.format(
-                    analysis_mode=analysis_mode,
-                    data_summary=data_summary,
-                    prompt=prompt
+                city_data = chat_index.slice(city) if city else None
+                # Only chat prompts use the dataset summary, so it is not built for first paint
+                with profiler.stage("summary"):
+                    data_summary = get_data_summary(chat_df, chat_version)
+                # Summary of earlier turns plus the latest messages, so follow-ups keep their context
+                context_prompt, context_report, context_fingerprint = build_analysis_prompt(
+                    chat_df, prompt, analysis_mode, data_summary, city, city_data, chat_cube, chat_forecaster,
+                    conversation=chat.memory(exclude_last=True), scope=chat_scope
                 )
             
-            response = model.generate_content(context_prompt)
-            response_text = response.text
+                cache_key = make_cache_key(prompt, analysis_mode, cache_model_name(), context_fingerprint)
+                profiler.count("prompt_tokens", context_report['tokens'])
             
-            # Remove unwanted text from the response
-            unwanted_text = "Here's a more detailed analysis of the groundwater data:"
-            response_text = response_text.replace(unwanted_text, "").strip()
+                def record_lookup(hit):
+                    profiler.count("llm_cache_hit" if hit else "llm_cache_miss")
             
-            # Add some visual flair to the response
-            enhanced_response = """
-            <div class="data-insight">
-                {response_text}
-            </div>
-            """.format(response_text=response_text)
+                # Remove unwanted text from the response
+                unwanted_text = "Here's a more detailed analysis of the groundwater data:"
+            
+                # Only a cache miss takes a model slot and a rate-limit token
+                dispatcher = get_dispatcher()
+                if not stream_responses:
+                    response_text = dispatcher.call(
+                        cache_key, cached_generate, model, context_prompt, cache_key, get_response_cache(), record_lookup,
+                        gate=dispatcher.upstream
+                    )
+                    response_text = response_text.replace(unwanted_text, "").strip()
+        
+            if stream_responses:
+                # Stripping happens on the fly so the first tokens show up immediately
+                response_text = st.write_stream(strip_unwanted(
+                    # Same coalescing and retries as the non-streamed call, plus a per-chunk timeout
+                    dispatcher.stream(cache_key, cached_stream, model, context_prompt, cache_key, get_response_cache(),
+                                      record_lookup, gate=dispatcher.upstream),
+                    [unwanted_text]
+                ))
+            else:
+                # Add some visual flair to the response
+                enhanced_response = """
+                <div class="data-insight">
+                    {response_text}
+                </div>
+                """.format(response_text=response_text)
             
-            st.markdown(enhanced_response, unsafe_allow_html=True)
-            st.session_state.chat_history.append({"role": "assistant", "content": response_text})
+                st.markdown(enhanced_response, unsafe_allow_html=True)
+            st.caption(f"Context: ~{context_report['tokens']:,} tokens, "
+                       f"{context_report['parameters']} parameters from {context_report['rows']:,} rows")
+            chat.append("assistant", response_text)
+            profiler.end("llm")
+
+    # Fold turns that left the verbatim window into the rolling summary
+    with profiler.stage("chat_summary"):
+        chat.summarize()
 
 # Footer with futuristic styling
 st.markdown("""
@@ -440,3 +567,17 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# Admin timing panel: HYDROAI_ADMIN=1 or ?admin=1
+if os.getenv("HYDROAI_ADMIN") == "1" or st.query_params.get("admin") == "1":
+    with st.sidebar.expander("🛠️ Rerun timings", expanded=False):
+        stage_rows = STAGE_STATS.summary()
+        if stage_rows:
+            st.dataframe(pd.DataFrame(stage_rows), hide_index=True, use_container_width=True)
+        st.json({"counters": STAGE_STATS.counters(), "llm_dispatcher": get_dispatcher().stats(),
+                 "chat_history": get_chat_store().stats()})
+        if registry is not None:
+            st.dataframe(pd.DataFrame(registry.describe()), hide_index=True, use_container_width=True)
+
+profiler.tag(state=selected_state, district=selected_district, analysis_mode=analysis_mode, chat=bool(prompt), rows=len(filtered_df))
+profiler.finish()
@@ -1,47 +1,46 @@
 import streamlit as st
-import pandas as pd
-import google.generativeai as genai
 from dotenv import load_dotenv 
 import os
+from app.utils.app_data import catalog_stamp, get_dataset_handle, get_registry, scoped_version
+from app.utils.helpers import get_data_summary
+from app.utils.llm import MODEL_NAME, cache_model_name, get_model
+from app.utils.response_cache import build_response_cache, cached_generate, fingerprint, make_cache_key
 
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+st.set_page_config(page_title="Water Quality Expert")
 
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
-df = pd.read_csv("F:\\study\\hydro ai\\data\\gujarat_groundwater_merged_final.csv")
+registry = get_registry(catalog_stamp())
+states = registry.states()
+if len(states) > 1:
+    selected_state = st.sidebar.selectbox("State", ["All States"] + states, index=1)
+else:
+    selected_state = "All States"
+# The same read-only handle main.py holds: only the selected state's sources and rows are read,
+# and each rerun gets its own shallow frame instead of the cached object
+data_version = scoped_version(registry.version(), selected_state)
+df = get_dataset_handle(data_version).frame
+if selected_state != "All States":
+    coverage = selected_state
+else:
+    coverage = ", ".join(states) or "the loaded"
 
-st.set_page_config(page_title="Water Quality Expert")
 st.title("Groundwater Quality Analysis Platform")
 st.subheader("Professional water quality assessment and regional analysis")
 
-def get_data_summary(df: pd.DataFrame) -> str:
-    states = df['STATE'].astype(str).str.strip().str.replace("\\s+", " ", regex=True).str.title() if 'STATE' in df.columns else pd.Series([])
-    districts = df['DISTRICT'].astype(str).str.strip().str.replace("\\s+", " ", regex=True).str.title() if 'DISTRICT' in df.columns else pd.Series([])
-    years = df['Year'] if 'Year' in df.columns else pd.Series([])
-    num_states = states.nunique() if len(states) else 0
-    num_districts = districts.nunique() if len(districts) else 0
-    year_min = int(years.min()) if len(years) else "?"
-    year_max = int(years.max()) if len(years) else "?"
-    return f"""
-    Loaded groundwater quality dataset with {len(df)} samples.
-
-    Columns: {', '.join(df.columns.tolist())}
-
-    Coverage:
-    - States: {num_states}
-    - Districts: {num_districts}
-    - Years: {year_min}-{year_max}
+summary = get_data_summary(df, data_version) + f"""
+    Columns: {', '.join(map(str, df.columns))}
 
     Sample data:
     {df.head(3).to_string()}
     """
 
-
-
-summary = get_data_summary(df)
+@st.cache_resource
+def get_response_cache():
+    return build_response_cache(os.getenv("HYDROAI_CACHE_BACKEND", "memory"))
 
 st.success(f"Dataset loaded: {len(df):,} groundwater samples")
 
@@ -49,7 +48,7 @@ for message in st.session_state.chat_history:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
-prompt = st.chat_input("Ask about Gujarat groundwater (add a district to focus)...")
+prompt = st.chat_input(f"Ask about {coverage} groundwater (add a district to focus)...")
 
 if prompt:
     st.session_state.chat_history.append({"role": "user", "content": prompt})
@@ -59,9 +58,9 @@ if prompt:
 
     with st.chat_message("assistant"):
         with st.spinner("Processing..."):
-            model = genai.GenerativeModel("gemini-1.5-flash")
+            model = get_model(MODEL_NAME)
             context = f"""
-            You are a water quality expert analyzing Gujarat groundwater data. Use ONLY the dataset text provided.
+            You are a water quality expert analyzing {coverage} groundwater data. Use ONLY the dataset text provided.
 
             Dataset Summary:
             {summary}
@@ -70,7 +69,7 @@ if prompt:
 
             Provide a clear, quantitative answer with specific numbers when possible. If a metric is unavailable, say so briefly.
             """
-            response = model.generate_content(context)
-            response_text = response.text
+            cache_key = make_cache_key(prompt, "expert", cache_model_name(), fingerprint(summary))
+            response_text = cached_generate(model, context, cache_key, get_response_cache())
             st.markdown(response_text)
             st.session_state.chat_history.append({"role": "assistant", "content": response_text})
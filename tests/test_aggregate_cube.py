@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.aggregate_cube import build_cube, load_or_build_cube
+from app.utils.standards import outside_limits
+from benchmarks.synthetic import make_groundwater_frame
+
+PARAMETERS = ["F", "NO3", "pH"]
+
+
+@pytest.fixture(scope="module")
+def frame():
+    frame = make_groundwater_frame(3_000)
+    frame["Year"] = frame["Year"].astype(float)
+    # Undated rows only reach the all-years margins
+    frame.loc[::50, "Year"] = np.nan
+    return frame
+
+
+@pytest.fixture(scope="module")
+def cube(frame):
+    return build_cube(frame)
+
+
+def expected_stats(rows: pd.DataFrame, parameter: str) -> dict:
+    values = rows[parameter].dropna()
+    return {"count": len(values), "mean": values.mean(), "min": values.min(), "max": values.max(),
+            "exceed": int(outside_limits(values, parameter).sum()), "p50": values.quantile(0.5)}
+
+
+def assert_cell(cube, rows, parameter, district, year):
+    expected = expected_stats(rows, parameter)
+    for stat, value in expected.items():
+        assert cube.value(stat, parameter, district, year) == pytest.approx(value, rel=1e-5, nan_ok=True), stat
+    assert cube.rows(district, year) == len(rows)
+
+
+@pytest.mark.parametrize("parameter", PARAMETERS)
+def test_cells_match_a_pandas_groupby(frame, cube, parameter):
+    for (district, year), rows in frame.groupby(["DISTRICT", "Year"], observed=True):
+        assert_cell(cube, rows, parameter, district, int(year))
+
+
+@pytest.mark.parametrize("parameter", PARAMETERS)
+def test_margins_match_a_pandas_groupby(frame, cube, parameter):
+    for district, rows in frame.groupby("DISTRICT", observed=True):
+        assert_cell(cube, rows, parameter, district, None)
+    for year, rows in frame.groupby("Year"):
+        assert_cell(cube, rows, parameter, None, int(year))
+    assert_cell(cube, frame, parameter, None, None)
+
+
+def test_year_ranges_merge_cells(frame, cube):
+    rows = frame[(frame["DISTRICT"] == "Kutch") & frame["Year"].between(2005, 2012)]
+    expected = expected_stats(rows, "F")
+    for stat in ("count", "mean", "min", "max", "exceed"):
+        assert cube.combine(stat, "F", "Kutch", 2005, 2012) == pytest.approx(expected[stat], rel=1e-5), stat
+    assert cube.combine("p50", "F", "Kutch", 2005, 2012) is None
+
+
+def test_years_outside_the_cube_are_empty(cube):
+    assert np.isnan(cube.value("count", "F", "Kutch", 1995))
+    assert np.isnan(cube.value("max", "F", None, 2030))
+    assert np.isnan(cube.combine("count", "F", None, 2030, 2035))
+    assert np.isnan(cube.combine("mean", "F", "Kutch", 1990, 1995))
+    assert cube.rows("Kutch", 1995) == 0
+
+
+def test_corrected_value_rebuilds_the_cube(tmp_path):
+    frame = make_groundwater_frame(5_000)
+    before = load_or_build_cube(frame, cache_dir=str(tmp_path))
+    corrected = frame.copy()
+    # Row 3 is not among the rows the sampled dataset fingerprint looks at
+    corrected.loc[3, "F"] = 999.0
+    after = load_or_build_cube(corrected, cache_dir=str(tmp_path))
+    assert before.fingerprint != after.fingerprint
+    assert after.value("max", "F", None, None) == np.float32(999.0)
+
+
+def test_version_token_keys_the_cache(tmp_path):
+    frame = make_groundwater_frame(5_000)
+    first = load_or_build_cube(frame, cache_dir=str(tmp_path), version="catalog-a|Gujarat")
+    again = load_or_build_cube(frame.iloc[:10], cache_dir=str(tmp_path), version="catalog-a|Gujarat")
+    other = load_or_build_cube(frame, cache_dir=str(tmp_path), version="catalog-b|Gujarat")
+    assert again.fingerprint == first.fingerprint
+    assert again.rows(None, None) == len(frame)
+    assert other.fingerprint != first.fingerprint
+    assert len(list(tmp_path.glob("cube-*.npz"))) == 2
+
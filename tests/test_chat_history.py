@@ -0,0 +1,142 @@
+import sqlite3
+import time
+
+import pytest
+
+from app.utils import chat_history
+from app.utils.chat_history import (
+    ChatHistory, MemoryChatStore, SQLiteChatStore, extractive_summary, model_summarizer
+)
+from app.utils.dispatcher import LLMDispatcher
+from app.utils.llm import StubModel
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryChatStore(ttl=60)
+    return SQLiteChatStore(str(tmp_path / "chat.sqlite"), ttl=60)
+
+
+def test_purge_drops_only_idle_sessions(store, monkeypatch):
+    store.append("old", "user", "hello")
+    store.set_summary("old", "greeting", 1)
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    store.append("fresh", "user", "hi")
+    assert store.purge_expired() >= 1
+    assert store.count("old") == 0 and store.summary("old") == ("", 0)
+    assert store.count("fresh") == 1
+
+
+def test_purge_if_due_waits_for_the_interval(store, monkeypatch):
+    store.append("old", "user", "hello")
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert store.purge_if_due(interval=600) == 0
+    assert store.count("old") == 1
+    assert store.purge_if_due(interval=60) >= 1
+    assert store.count("old") == 0
+
+
+def test_sqlite_store_purges_when_opened(tmp_path, monkeypatch):
+    path = str(tmp_path / "chat.sqlite")
+    SQLiteChatStore(path, ttl=60).append("old", "user", "hello")
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert SQLiteChatStore(path, ttl=60).count("old") == 0
+
+
+def fill(store, session: str, count: int) -> None:
+    for i in range(count):
+        store.append(session, "user" if i % 2 == 0 else "assistant", f"Message {i}. More detail follows.")
+
+
+def test_window_holds_only_the_latest_messages(store):
+    fill(store, "s", 30)
+    history = ChatHistory(store, "s", window=20)
+    assert len(history) == 30 and history.hidden() == 10
+    assert [m["content"] for m in history.recent()][0] == "Message 10. More detail follows."
+    assert [m["content"][:10] for m in history.older(5)] == [f"Message {i}." for i in range(5, 10)]
+    history.append("user", "Message 30.")
+    assert len(history.recent()) == 20 and history.hidden() == 11
+    # A new session object (a reload) renders the same window
+    assert ChatHistory(store, "s", window=20).recent() == history.recent()
+
+
+def test_rolling_summary_folds_old_turns_in_batches(store):
+    calls = []
+
+    def summarizer(previous, messages):
+        calls.append([m["content"][:10] for m in messages])
+        return extractive_summary(previous, messages)
+
+    history = ChatHistory(store, "s", window=20, summarizer=summarizer)
+    for i in range(9):
+        history.append("user", f"Message {i}.")
+    # 9 messages, 4 kept verbatim: only 5 fell out, one short of a batch
+    assert not history.summarize(keep_verbatim=4, batch=6)
+    history.append("assistant", "Message 9.")
+    assert history.summarize(keep_verbatim=4, batch=6)
+    assert calls == [[f"Message {i}." for i in range(6)]]
+    assert not history.summarize(keep_verbatim=4, batch=6)
+
+    memory = history.memory(exclude_last=True)
+    assert memory.startswith("Earlier: Q: Message 0.")
+    assert "user: Message 6." in memory and "Message 9." not in memory
+    # The summary is persisted with the messages it covers
+    reloaded = ChatHistory(store, "s", window=20)
+    assert (reloaded.summary, reloaded.summarized_upto) == (history.summary, history.summarized_upto)
+
+
+def test_memory_and_sqlite_stores_agree(tmp_path):
+    stores = [MemoryChatStore(), SQLiteChatStore(str(tmp_path / "chat.sqlite"))]
+    for store in stores:
+        fill(store, "a", 12)
+        fill(store, "b", 3)
+        store.set_summary("a", "so far", 4)
+
+    def view(store):
+        strip = lambda messages: [(m["id"], m["role"], m["content"]) for m in messages]
+        return (store.count("a"), store.count("b"), strip(store.page("a", 5)), strip(store.page("a", 5, before=8)),
+                strip(store.between("a", 4, 9)), store.summary("a"), store.summary("b"),
+                {key: value for key, value in store.stats().items() if key != "backend"})
+
+    assert view(stores[0]) == view(stores[1])
+
+
+def test_sqlite_store_closes_its_connections(tmp_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(chat_history.sqlite3, "connect", tracking_connect)
+    store = SQLiteChatStore(str(tmp_path / "chat.sqlite"))
+    fill(store, "s", 3)
+    store.page("s", 2)
+    store.set_summary("s", "text", 1)
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_model_summarizer_goes_through_the_dispatcher():
+    dispatcher = LLMDispatcher(max_concurrency=1, retries=0)
+    summarize = model_summarizer(StubModel(reply="They asked about fluoride."), lambda prev, text: text,
+                                 dispatcher=dispatcher)
+    assert summarize("", [{"role": "user", "content": "Fluoride in Kutch?"}]) == "They asked about fluoride."
+    assert dispatcher.counters["upstream"] == 1
+
+
+def test_model_summarizer_falls_back_to_the_extractive_summary():
+    class Broken(StubModel):
+        def generate_content(self, prompt, stream=False):
+            raise RuntimeError("quota")
+
+    dispatcher = LLMDispatcher(max_concurrency=1, retries=0)
+    summarize = model_summarizer(Broken(), lambda prev, text: text, dispatcher=dispatcher)
+    assert summarize("", [{"role": "user", "content": "Fluoride in Kutch?"}]) == "Q: Fluoride in Kutch?"
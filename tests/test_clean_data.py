@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from clean_data import clean_csv_file
+
+ROWS = 25
+
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    years = [str(2000 + i % 10) for i in range(ROWS)]
+    fluoride = [f"{0.1 * i:.1f}" for i in range(ROWS)]
+    # Later chunks bring a fractional year, a blank year and a below-detection entry
+    years[12], years[15] = "2019.5", ""
+    fluoride[23] = "BDL"
+    frame = pd.DataFrame({" District ": ["kutch  ", "SURAT"] * 12 + ["kutch"], "Year": years, "F": fluoride})
+    path = tmp_path / "raw.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_multi_chunk_file_cleans_to_csv(raw_csv, tmp_path):
+    report = clean_csv_file(raw_csv, str(tmp_path / "clean.csv"), chunksize=10)
+    assert report["rows_written"] == ROWS
+    assert report["coercion_errors"] == {"Year": 1, "F": 1}
+    assert report["bad_values"] == {"Year": ["2019.5"], "F": ["BDL"]}
+    text = pd.read_csv(report["output"], dtype=str)
+    # Every chunk writes whole years, never "2001.0"
+    assert text["Year"].dropna().str.fullmatch(r"\d{4}").all()
+    assert set(text["District"]) == {"Kutch", "Surat"}
+
+
+def test_multi_chunk_file_cleans_to_parquet(raw_csv, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    report = clean_csv_file(raw_csv, str(tmp_path / "clean.parquet"), chunksize=10, output_format="parquet")
+    schema = pq.read_schema(report["output"])
+    assert str(schema.field("Year").type) == "int16" and str(schema.field("F").type) == "float"
+    frame = pd.read_parquet(report["output"])
+    assert len(frame) == ROWS
+    assert frame["Year"].isna().sum() == 2 and frame["F"].isna().sum() == 1
+    assert isinstance(frame["District"].dtype, pd.CategoricalDtype)
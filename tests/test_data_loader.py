@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import data_loader
+from app.utils.data_loader import convert_to_columnar, load_dataset, load_store, optimize_dtypes
+from app.utils.ingest import ingest_delta
+from benchmarks.synthetic import make_groundwater_frame
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "wells.csv"
+    make_groundwater_frame(500).to_csv(path, index=False)
+    return str(path)
+
+
+def test_optimize_dtypes_applies_the_columnar_schema():
+    frame = optimize_dtypes(make_groundwater_frame(200).assign(Count=np.arange(200, dtype=np.int64)))
+    assert isinstance(frame["DISTRICT"].dtype, pd.CategoricalDtype)
+    assert isinstance(frame["STN_NAME"].dtype, pd.CategoricalDtype)
+    assert frame["Year"].dtype == "Int16"
+    assert frame["F"].dtype == np.float32
+    assert frame["Count"].dtype == np.int16
+
+
+def test_csv_and_parquet_paths_load_the_same_frame(csv_path):
+    from_csv = load_dataset(csv_path)
+    convert_to_columnar(csv_path)
+    from_parquet = load_dataset(csv_path)
+    pd.testing.assert_frame_equal(from_parquet, from_csv)
+    projected = load_dataset(csv_path, columns=["DISTRICT", "F"])
+    assert list(projected.columns) == ["DISTRICT", "F"]
+    assert projected["F"].dtype == np.float32
+
+
+def _delta(tmp_path, name, districts, value):
+    rows = len(districts)
+    frame = pd.DataFrame({"DISTRICT": districts, "STN_NAME": [f"W{i}" for i in range(rows)],
+                          "Year": [2019] * rows, "F": [value] * rows})
+    path = tmp_path / name
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_store_reads_only_changed_partitions(tmp_path, monkeypatch):
+    store = str(tmp_path / "store")
+    ingest_delta(_delta(tmp_path, "first.csv", ["Kutch", "Kutch", "Surat"], 1.0), store_dir=store)
+    first = load_store(store)
+    assert len(first) == 3 and isinstance(first["DISTRICT"].dtype, pd.CategoricalDtype)
+
+    reads = []
+    read_parquet = pd.read_parquet
+    monkeypatch.setattr(pd, "read_parquet", lambda path, **kwargs: reads.append(path) or read_parquet(path, **kwargs))
+    ingest_delta(_delta(tmp_path, "second.csv", ["Surat", "Surat"], 2.0), store_dir=store)
+    reads.clear()
+    second = load_store(store)
+    assert len(reads) == 1 and "surat" in reads[0].lower()
+    assert sorted(second["F"].tolist()) == [1.0, 1.0, 1.0, 2.0, 2.0]
+
+    # Same store version: served from the cached frame, as a separate frame object
+    reads.clear()
+    again = load_store(store)
+    assert reads == [] and again is not second
+    again["F"] = 0.0
+    assert (load_store(store)["F"] > 0).all()
+
+    # The incremental result matches a cold read
+    data_loader._STORE_CACHE.clear()
+    pd.testing.assert_frame_equal(load_store(store), second)
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from app.utils.dataset_handle import DatasetHandle
+from benchmarks.synthetic import make_groundwater_frame
+
+
+@pytest.fixture
+def handle():
+    return DatasetHandle(make_groundwater_frame(1_000), "v1")
+
+
+def test_column_assignment_does_not_reach_the_handle(handle):
+    original = handle.frame["F"].copy()
+    frame = handle.frame
+    frame["F"] = 0.0
+    frame["WQI"] = 1.0
+    assert handle.frame["F"].equals(original)
+    assert "WQI" not in handle.columns
+
+
+def test_view_and_slice_are_isolated(handle):
+    view = handle.view()
+    view["pH"] = 0.0
+    part = handle.slice(0, 10)
+    part["NO3"] = -1.0
+    assert (handle.frame["pH"] != 0.0).all()
+    assert (handle.frame["NO3"].dropna() >= 0).all()
+
+
+def test_writes_into_shared_arrays_fail(handle):
+    with pytest.raises(ValueError):
+        handle.frame["EC"].to_numpy()[0] = -5.0
+    with pytest.raises(ValueError):
+        handle.view(["EC"]).to_numpy()[0, 0] = -5.0
+
+
+def test_categorical_and_nullable_columns_are_locked():
+    frame = make_groundwater_frame(100)
+    frame["Year"] = frame["Year"].astype("Int16")
+    handle = DatasetHandle(frame, "v1")
+    with pytest.raises(ValueError):
+        handle.frame["DISTRICT"].array.codes[0] = 1
+    with pytest.raises(ValueError):
+        handle.frame["Year"].array[0] = 1999
+    assert handle.frame["DISTRICT"].equals(frame["DISTRICT"])
+    assert handle.frame["Year"].equals(frame["Year"])
+
+
+def test_columns_that_cannot_be_locked_are_copied_per_caller():
+    stamps = pd.Series(pd.date_range("2020-01-01", periods=3, tz="UTC"))
+    handle = DatasetHandle(pd.DataFrame({"stamp": stamps, "EC": [1.0, 2.0, 3.0]}), "v1")
+    handle.frame["stamp"].array[0] = pd.Timestamp("1999-01-01", tz="UTC")
+    handle.slice(0, 2)["stamp"].array[0] = pd.Timestamp("1999-01-01", tz="UTC")
+    assert handle.frame["stamp"].equals(stamps)
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from app.utils.dataset_registry import DatasetRegistry, DatasetSource
+from benchmarks.synthetic import make_groundwater_frame
+
+
+@pytest.fixture
+def files(tmp_path):
+    gujarat = make_groundwater_frame(2_000, seed=1)
+    gujarat.to_csv(tmp_path / "gujarat.csv", index=False)
+    rajasthan = make_groundwater_frame(1_000, seed=2).drop(columns=["STATE"])
+    rajasthan["DISTRICT"] = "Raj " + rajasthan["DISTRICT"].astype(str)
+    rajasthan["Sampling Date"] = [f"15/{month:02d}/{year}" for month, year in
+                                  zip((rajasthan.index % 12) + 1, rajasthan["Year"])]
+    rajasthan = rajasthan.drop(columns=["Year"]).rename(columns={"DISTRICT": "District Name", "F": "Fluoride"})
+    rajasthan.to_csv(tmp_path / "rajasthan.csv", index=False)
+    return tmp_path
+
+
+def test_one_file_catalog_reads_back_unchanged(files):
+    source = DatasetSource("rajasthan", path=str(files / "rajasthan.csv"), state="Rajasthan")
+    registry = DatasetRegistry([source], str(files / "profiles.json"))
+    loaded = registry.load()
+    # Only the state label of a file without a state column is added
+    pd.testing.assert_frame_equal(loaded.drop(columns=["STATE"]), source.read())
+
+
+def test_dated_source_alone_keeps_its_dates(files):
+    registry = DatasetRegistry([
+        DatasetSource("gujarat", path=str(files / "gujarat.csv")),
+        DatasetSource("rajasthan", path=str(files / "rajasthan.csv"), state="Rajasthan"),
+    ], str(files / "profiles.json"))
+    rajasthan = registry.load(states=["Rajasthan"])
+    assert not pd.api.types.is_numeric_dtype(rajasthan["Year"])
+    assert str(rajasthan["Year"].iloc[0]).startswith("15/")
+    assert "F" in rajasthan.columns and "DISTRICT" in rajasthan.columns
+
+
+def test_mixed_sources_share_a_year_column_and_keep_dates(files):
+    registry = DatasetRegistry([
+        DatasetSource("gujarat", path=str(files / "gujarat.csv")),
+        DatasetSource("rajasthan", path=str(files / "rajasthan.csv"), state="Rajasthan"),
+    ], str(files / "profiles.json"))
+    combined = registry.load()
+    assert len(combined) == 3_000
+    assert pd.api.types.is_numeric_dtype(combined["Year"]) and combined["Year"].notna().all()
+    dated = combined[combined["STATE"] == "Rajasthan"]
+    assert dated["Sampling Date"].notna().all()
+    assert combined.loc[combined["STATE"] == "Gujarat", "Sampling Date"].isna().all()
@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.dispatcher import LLMDispatcher, RateLimiter
+from app.utils.llm import StubModel
+from app.utils.response_cache import MemoryResponseCache, cached_generate, cached_stream
+
+
+class Flaky:
+    """Fails the first ``failures`` calls, then returns "ok"."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("upstream unavailable")
+        return "ok"
+
+
+@pytest.fixture
+def dispatcher():
+    pool = LLMDispatcher(max_concurrency=4, timeout=5, retries=2, backoff=0.01)
+    yield pool
+    pool.shutdown()
+
+
+def test_retries_until_success(dispatcher):
+    fn = Flaky(failures=2)
+    assert dispatcher.call("k", fn) == "ok"
+    assert fn.calls == 3
+    assert dispatcher.stats()["retries"] == 2
+
+
+def test_gives_up_after_the_last_retry(dispatcher):
+    fn = Flaky(failures=5)
+    with pytest.raises(ConnectionError):
+        dispatcher.call("k", fn)
+    assert fn.calls == 3
+    assert dispatcher.stats()["failed"] == 1
+
+
+def test_identical_keys_share_one_call(dispatcher):
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    futures = [dispatcher.submit("same", slow) for _ in range(5)]
+    release.set()
+    assert [future.result(5) for future in futures] == ["answer"] * 5
+    assert len(calls) == 1
+    assert dispatcher.stats()["coalesced"] == 4
+
+
+def test_rate_limiter_spaces_acquisitions():
+    limiter = RateLimiter(rate=20, per=1.0)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    # One burst token, then 1/20 s for each of the other three
+    assert time.monotonic() - started >= 0.14
+
+
+def test_cache_hits_skip_the_rate_limit():
+    dispatcher = LLMDispatcher(max_concurrency=2, rate_limiter=RateLimiter(rate=1, per=60.0))
+    cache = MemoryResponseCache()
+    cache.set("key", "cached answer")
+    model = StubModel()
+    started = time.monotonic()
+    answers = [dispatcher.call("key", cached_generate, model, "prompt", "key", cache, gate=dispatcher.upstream)
+               for _ in range(3)]
+    dispatcher.shutdown()
+    assert answers == ["cached answer"] * 3
+    assert time.monotonic() - started < 0.5
+    assert model.calls == 0 and dispatcher.stats()["upstream"] == 0
+
+
+def test_misses_take_an_upstream_slot(dispatcher):
+    cache = MemoryResponseCache()
+    model = StubModel(reply="fresh")
+    assert dispatcher.call("key", cached_generate, model, "prompt", "key", cache, gate=dispatcher.upstream) == "fresh"
+    assert dispatcher.call("key", cached_generate, model, "prompt", "key", cache, gate=dispatcher.upstream) == "fresh"
+    assert model.calls == 1
+    assert dispatcher.stats()["upstream"] == 1
+
+
+def test_streams_with_the_same_key_share_one_upstream_stream(dispatcher):
+    release = threading.Event()
+    calls = []
+
+    def chunks():
+        calls.append(1)
+        yield "a "
+        release.wait(5)
+        yield "b"
+
+    first = dispatcher.stream("q", chunks)
+    second = dispatcher.stream("q", chunks)
+    release.set()
+    assert "".join(first) == "a b" and "".join(second) == "a b"
+    assert len(calls) == 1
+    assert dispatcher.stats()["coalesced"] == 1
+
+
+def test_stream_retries_before_the_first_chunk(dispatcher):
+    attempts = []
+
+    def chunks():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("reset")
+        yield "ok"
+
+    assert list(dispatcher.stream("q", chunks)) == ["ok"]
+    assert len(attempts) == 2
+
+
+def test_stream_failure_after_text_is_raised(dispatcher):
+    attempts = []
+
+    def chunks():
+        attempts.append(1)
+        yield "partial"
+        raise ConnectionError("reset")
+
+    received = []
+    with pytest.raises(ConnectionError):
+        for chunk in dispatcher.stream("q", chunks):
+            received.append(chunk)
+    assert received == ["partial"] and len(attempts) == 1
+
+
+def test_stalled_stream_times_out(dispatcher):
+    release = threading.Event()
+
+    def chunks():
+        yield "first"
+        release.wait(5)
+        yield "late"
+
+    stream = dispatcher.stream("q", chunks, timeout=0.2)
+    assert next(stream) == "first"
+    with pytest.raises(TimeoutError):
+        next(stream)
+    release.set()
+
+
+def test_cached_stream_hit_skips_the_rate_limit():
+    dispatcher = LLMDispatcher(max_concurrency=2, rate_limiter=RateLimiter(rate=1, per=60.0))
+    cache = MemoryResponseCache()
+    cache.set("key", "cached answer")
+    started = time.monotonic()
+    for _ in range(3):
+        assert list(dispatcher.stream("key", cached_stream, StubModel(), "prompt", "key", cache,
+                                      gate=dispatcher.upstream)) == ["cached answer"]
+    dispatcher.shutdown()
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,27 @@
+import numpy as np
+
+from app.utils.district_index import DistrictIndex
+from benchmarks.synthetic import make_groundwater_frame
+
+
+def test_slices_match_a_column_filter_without_copying_the_frame():
+    frame = make_groundwater_frame(2_000)
+    index = DistrictIndex(frame, "DISTRICT")
+    assert index._frame is frame
+    for name in ("Kutch", "surat", "  Panch   Mahals "):
+        expected = frame[frame["DISTRICT"].str.lower() == " ".join(name.split()).lower()]
+        assert index.slice(name).equals(expected)
+    assert index.slice("Nowhere").empty
+
+
+def test_grouped_frame_keeps_districts_contiguous():
+    frame = make_groundwater_frame(2_000)
+    grouped = DistrictIndex(frame, "DISTRICT").grouped()
+    codes = grouped["DISTRICT"].cat.codes.to_numpy()
+    assert len(grouped) == len(frame)
+    assert len(np.unique(codes)) == np.count_nonzero(np.diff(codes)) + 1
+
+    # An already grouped frame is sliced in place, with no sort order kept
+    regrouped = DistrictIndex(grouped, "DISTRICT")
+    assert regrouped._order is None
+    assert regrouped.slice("Kutch").equals(grouped[grouped["DISTRICT"] == "Kutch"])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.forecast import fit_forecaster, load_or_fit_forecaster
+from benchmarks.synthetic import make_groundwater_frame
+
+YEARS = np.arange(2010, 2020)
+
+
+@pytest.fixture(scope="module")
+def linear():
+    # Kutch fluoride rises 0.1 mg/L a year and reaches the 1.5 permissible limit in 2023;
+    # Surat nitrate is noisy around a falling line
+    rng = np.random.default_rng(7)
+    kutch = pd.DataFrame({"DISTRICT": "Kutch", "Year": YEARS, "F": 0.25 + 0.1 * (YEARS - 2010),
+                          "NO3": np.nan})
+    surat_years = np.repeat(YEARS, 3)
+    surat = pd.DataFrame({"DISTRICT": "Surat", "Year": surat_years, "F": np.nan,
+                          "NO3": 40 - 1.5 * (surat_years - 2010) + rng.normal(0, 2, surat_years.size)})
+    return pd.concat([kutch, surat], ignore_index=True)
+
+
+def test_exact_line_is_recovered(linear):
+    engine = fit_forecaster(linear)
+    trend = engine.trend("F", "Kutch")
+    assert trend["slope"] == pytest.approx(0.1)
+    assert trend["now"] == pytest.approx(0.25 + 0.1 * 9)
+    assert trend["sigma"] == pytest.approx(0.0, abs=1e-9)
+    forecast = engine.forecast("F", "Kutch", horizon=3)
+    assert list(forecast.index) == [2020, 2021, 2022]
+    np.testing.assert_allclose(forecast["forecast"], [1.25, 1.35, 1.45])
+
+
+def test_noisy_fit_matches_polyfit(linear):
+    engine = fit_forecaster(linear)
+    surat = linear[linear["DISTRICT"] == "Surat"]
+    slope, intercept = np.polyfit(surat["Year"], surat["NO3"], 1)
+    residual = surat["NO3"] - (intercept + slope * surat["Year"])
+    trend = engine.trend("NO3", "Surat")
+    assert trend["slope"] == pytest.approx(slope)
+    assert trend["now"] == pytest.approx(intercept + slope * 2019)
+    assert trend["sigma"] == pytest.approx(np.sqrt((residual ** 2).sum() / (len(surat) - 2)))
+
+
+def test_outlook_reports_the_limit_crossing(linear):
+    outlook = fit_forecaster(linear).outlook("Kutch", horizon=5)
+    assert list(outlook.index) == ["F"]
+    row = outlook.loc["F"]
+    assert row["limit"] == 1.5 and row["crossing"] == 2023
+    assert row["forecast"] == pytest.approx(0.25 + 0.1 * 14)
+    assert row["lower"] <= row["forecast"] <= row["upper"]
+    # Nitrate falls, so it never reaches its limit
+    assert np.isnan(fit_forecaster(linear).outlook("Surat").loc["NO3", "crossing"])
+
+
+def test_short_series_have_no_trend():
+    frame = pd.DataFrame({"DISTRICT": "Kutch", "Year": [2018, 2019, 2019], "F": [1.0, 1.1, 1.2]})
+    engine = fit_forecaster(frame)
+    assert engine.trend("F", "Kutch") is None
+    assert engine.forecast("F", "Kutch").empty
+
+
+def test_monthly_season_is_removed_before_the_trend():
+    dates = pd.to_datetime([f"{year}-{month:02d}-15" for year in range(2015, 2020) for month in range(1, 13)])
+    t = dates.year + (dates.dayofyear - 1) / np.where(dates.is_leap_year, 366, 365)
+    season = 2 * np.sin(2 * np.pi * (dates.month - 1) / 12)
+    frame = pd.DataFrame({"DISTRICT": "Kutch", "Date": dates.strftime("%Y-%m-%d"),
+                          "NO3": 10 + 0.5 * (t - 2015) + season})
+    engine = fit_forecaster(frame)
+    assert engine.seasonal
+    assert engine.trend("NO3", "Kutch")["slope"] == pytest.approx(0.5, abs=0.01)
+    np.testing.assert_allclose(engine.arrays["seasonal"][0, 0], season[:12], atol=0.1)
+    # Annual forecasts are mid-year values of the deseasonalized line
+    assert engine.forecast("NO3", "Kutch").loc[2021, "forecast"] == pytest.approx(10 + 0.5 * 6.5, abs=0.05)
+    # Without the adjustment the seasonal swing biases the slope
+    assert fit_forecaster(frame, seasonal=False).trend("NO3", "Kutch")["slope"] != pytest.approx(0.5, abs=0.01)
+
+
+def test_forecaster_follows_the_data_version(tmp_path):
+    frame = make_groundwater_frame(5_000)
+    first = load_or_fit_forecaster(frame, cache_dir=str(tmp_path), version="catalog-a|all")
+    second = load_or_fit_forecaster(frame, cache_dir=str(tmp_path), version="catalog-b|all")
+    again = load_or_fit_forecaster(frame.iloc[:10], cache_dir=str(tmp_path), version="catalog-a|all")
+    assert first.fingerprint != second.fingerprint
+    assert len(list(tmp_path.glob("forecast-*.npz"))) == 2
+    # The persisted fits round-trip
+    assert again.outlook().equals(first.outlook())
@@ -0,0 +1,18 @@
+from app.utils.helpers import get_data_summary
+from benchmarks.synthetic import make_groundwater_frame
+
+
+def test_summary_sees_a_corrected_unsampled_row():
+    frame = make_groundwater_frame(5_000)
+    assert f"Years: {frame['Year'].min()}-" in get_data_summary(frame)
+    corrected = frame.copy()
+    # Row 3 is not among the rows the sampled dataset fingerprint looks at
+    corrected.loc[3, "Year"] = 1990
+    assert "Years: 1990-" in get_data_summary(corrected)
+
+
+def test_summary_is_keyed_on_the_data_version():
+    frame = make_groundwater_frame(2_000)
+    first = get_data_summary(frame, "catalog-a|Gujarat")
+    assert get_data_summary(frame.iloc[:10], "catalog-a|Gujarat") == first
+    assert "10 samples" in get_data_summary(frame.iloc[:10], "catalog-b|Gujarat")
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from app.utils.data_loader import read_manifest
+from app.utils.ingest import _dedupe, ingest_delta
+
+
+def _store_rows(store_dir) -> int:
+    return sum(entry["rows"] for entry in read_manifest(str(store_dir))["partitions"].values())
+
+
+def test_readings_within_a_year_are_kept(tmp_path):
+    delta = pd.DataFrame({
+        "DISTRICT": ["Kutch"] * 4,
+        "STN_NAME": ["Bhuj W1", "Bhuj W1", "Bhuj W2", "Bhuj W2"],
+        "Year": [2019] * 4,
+        "F": [1.1, 1.4, 0.8, 0.9],
+    })
+    delta.to_csv(tmp_path / "delta.csv", index=False)
+    report = ingest_delta(str(tmp_path / "delta.csv"), store_dir=str(tmp_path / "store"))
+    assert report["duplicates"] == 0
+    assert _store_rows(tmp_path / "store") == 4
+
+
+def test_reingesting_the_same_file_adds_nothing(tmp_path):
+    delta = pd.DataFrame({"DISTRICT": ["Kutch", "Surat"], "Year": [2019, 2019], "F": [1.1, 0.4]})
+    delta.to_csv(tmp_path / "delta.csv", index=False)
+    ingest_delta(str(tmp_path / "delta.csv"), store_dir=str(tmp_path / "store"))
+    report = ingest_delta(str(tmp_path / "delta.csv"), store_dir=str(tmp_path / "store"))
+    assert report["rows_added"] == 0 and report["duplicates"] == 2
+    assert _store_rows(tmp_path / "store") == 2
+
+
+def test_station_and_sample_date_correct_earlier_readings():
+    frame = pd.DataFrame({
+        "STN_NAME": ["Bhuj W1", "Bhuj W1", "Bhuj W1"],
+        "Sample_Date": ["2019-01-10", "2019-06-02", "2019-01-10"],
+        "Year": [2019, 2019, 2019],
+        "F": [1.1, 1.4, 1.2],
+    })
+    merged = _dedupe(frame)
+    assert merged["F"].tolist() == [1.4, 1.2]
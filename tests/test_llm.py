@@ -0,0 +1,27 @@
+from app.utils.llm import StubModel, get_model, iter_text, strip_unwanted
+
+
+def test_stub_model_answers_like_the_sdk():
+    model = StubModel("test-model")
+    response = model.generate_content("Dataset summary...\nWhat is the average fluoride?")
+    assert response.text.startswith("[stub test-model]")
+    assert response.text.endswith("What is the average fluoride?")
+    assert model.calls == 1
+
+
+def test_stub_stream_rebuilds_the_reply():
+    model = StubModel(reply="Fluoride is high in Kutch.")
+    chunks = list(iter_text(model.generate_content("prompt", stream=True)))
+    assert len(chunks) == 5
+    assert "".join(chunks) == "Fluoride is high in Kutch."
+
+
+def test_get_model_returns_the_stub_offline(monkeypatch):
+    monkeypatch.setenv("HYDROAI_STUB_LLM", "1")
+    assert isinstance(get_model("any"), StubModel)
+
+
+def test_unwanted_phrase_split_across_chunks_is_removed():
+    phrase = "Here's a more detailed analysis of the groundwater data:"
+    chunks = ["  Here's a more det", "ailed analysis of the groundwater data: Fluoride ", "is high.  "]
+    assert "".join(strip_unwanted(chunks, [phrase])) == "Fluoride is high."
@@ -0,0 +1,72 @@
+import pytest
+
+from app.utils.aggregate_cube import build_cube
+from app.utils.prompts import build_analysis_prompt, is_follow_up, scope_label
+from benchmarks.synthetic import make_groundwater_frame
+
+MEMORY = "user: What is the average fluoride in Kutch?\nassistant: About 1.2 mg/L."
+
+
+@pytest.mark.parametrize("question", [
+    "And Surat?",
+    "Why?",
+    "What about nitrate in those wells over the last decade?",
+    "Why is it so high there compared with the state average?",
+    "Give me recommendations for reducing nitrate",
+    "As you mentioned earlier, is the fluoride trend in Kutch rising?",
+    "Those numbers look high, can you double-check them for Kutch",
+])
+def test_follow_ups_are_recognized(question):
+    assert is_follow_up(question, ["Gujarat"])
+
+
+@pytest.mark.parametrize("question, places", [
+    ("Summarize nitrate contamination across all districts of the dataset", ["Gujarat"]),
+    ("What is the average fluoride in Kutch in 2019?", ["Kutch", "Gujarat"]),
+    ("Give me more detail on nitrate trends across Gujarat", ["Gujarat"]),
+    ("Is there any arsenic above the limit in the dataset?", ["Gujarat"]),
+    ("Which parameters are worst in Surat and why does that happen", ["Surat", "Gujarat"]),
+])
+def test_self_contained_questions_are_recognized(question, places):
+    assert not is_follow_up(question, places)
+
+
+def test_self_contained_question_ignores_the_conversation():
+    frame = make_groundwater_frame(2_000)
+    cube = build_cube(frame)
+    question = "Summarize nitrate contamination across all districts of the dataset"
+    first, _, first_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary", cube=cube)
+    later, _, later_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary", cube=cube,
+                                                conversation=MEMORY)
+    assert first_key == later_key and first == later
+
+
+def test_follow_up_keeps_the_conversation():
+    frame = make_groundwater_frame(2_000)
+    question = "Why is it so high there?"
+    plain, _, plain_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary")
+    follow, _, follow_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary",
+                                                  conversation=MEMORY)
+    assert "About 1.2 mg/L." in follow and "About 1.2 mg/L." not in plain
+    assert plain_key != follow_key
+
+
+def test_dataset_prompt_names_the_loaded_states():
+    frame = make_groundwater_frame(2_000)
+    question = "Summarize nitrate contamination across all districts of the dataset"
+    gujarat, _, gujarat_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary")
+    both, _, both_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary",
+                                              scope=scope_label(["Gujarat", "Rajasthan"]))
+    assert "for Gujarat." in gujarat and "GUJARAT GROUNDWATER DATASET" in gujarat
+    assert "for Gujarat and Rajasthan." in both and "GUJARAT AND RAJASTHAN GROUNDWATER DATASET" in both
+    assert gujarat_key != both_key
+
+
+def test_question_naming_its_district_ignores_the_conversation():
+    frame = make_groundwater_frame(2_000)
+    kutch = frame[frame["DISTRICT"] == "Kutch"]
+    question = "Give me recommendations for reducing nitrate in Kutch"
+    first, _, first_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary", "Kutch", kutch)
+    later, _, later_key = build_analysis_prompt(frame, question, "Standard Analysis", "summary", "Kutch", kutch,
+                                                conversation=MEMORY)
+    assert first_key == later_key and "About 1.2 mg/L." not in later
@@ -0,0 +1,127 @@
+import pytest
+
+from app.utils.aggregate_cube import build_cube
+from app.utils.district_index import DistrictIndex
+from app.utils.query_engine import answer_question, parse_query
+from benchmarks.synthetic import make_groundwater_frame
+
+COLUMNS = ["EC", "TDS", "NO3", "F", "As"]
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return make_groundwater_frame(5_000)
+
+
+@pytest.fixture(scope="module")
+def index(frame):
+    return DistrictIndex(frame, "DISTRICT")
+
+
+def test_plain_lookup_is_parsed(index):
+    parsed = parse_query("What is the average fluoride in Kutch in 2019?", COLUMNS, index)
+    assert parsed == {"aggregate": "mean", "parameter": "F", "district": "Kutch", "years": (2019, 2019)}
+
+
+def test_count_without_parameter_is_parsed(index):
+    parsed = parse_query("How many samples are there for Surat since 2015?", COLUMNS, index)
+    assert parsed["aggregate"] == "count" and parsed["district"] == "Surat" and parsed["years"] == (2015, None)
+
+
+@pytest.mark.parametrize("question", [
+    "How many samples have fluoride above 1.0 in Kutch?",
+    "Count nitrate readings over 45 in Surat",
+    "How many samples have F > 1.5?",
+    "Maximum TDS exceeding the limit in Rajkot",
+])
+def test_thresholds_fall_through(index, question):
+    assert parse_query(question, COLUMNS, index) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Average fluoride in Kutch excluding 2019",
+    "Maximum nitrate in Gujarat except Kutch",
+    "Average TDS for samples not from Surat",
+    "Which district doesn't have the highest fluoride",
+])
+def test_negations_fall_through(index, question):
+    assert parse_query(question, COLUMNS, index) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Average fluoride Kutch vs Surat",
+    "Average fluoride in Kutch and Surat",
+    "Is the maximum nitrate in Kutch higher than in Surat?",
+])
+def test_several_districts_fall_through(index, question):
+    assert parse_query(question, COLUMNS, index) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Average fluoride in Nagpur",
+    "Average fluoride in Kutchh",
+    "What is the maximum nitrate in nagpur?",
+    "Median TDS Nagpur 2019",
+])
+def test_unknown_places_fall_through(index, question):
+    assert parse_query(question, COLUMNS, index) is None
+
+
+def test_answer_question_uses_the_cube(frame, index):
+    cube = build_cube(frame)
+    answer = answer_question("How many samples are in Kutch?", frame, index, cube)
+    assert f"{int((frame['DISTRICT'] == 'Kutch').sum()):,} samples" in answer
+    assert answer_question("How many samples have fluoride above 1.0 in Kutch?", frame, index, cube) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Average TDS in 1995",
+    "Max fluoride in 2030",
+    "Max fluoride from 2030 to 2035",
+    "How many samples in 1995?",
+])
+def test_years_outside_the_data_fall_through(frame, index, question):
+    cube = build_cube(frame)
+    assert parse_query(question, COLUMNS, index) is not None
+    assert answer_question(question, frame, index, cube) is None
+
+
+@pytest.mark.parametrize("question, parameter", [
+    ("average fluoride in Kutch in mg/L", "F"),
+    ("average fluoride in Kutch in mg per litre", "F"),
+    ("average EC in µS/cm in Kutch", "EC"),
+    ("average Mg in Kutch", "Mg"),
+    ("average magnesium in Kutch in mg/L", "Mg"),
+])
+def test_units_are_not_parameters(index, question, parameter):
+    columns = ["EC", "Ca", "Mg", "Na", "F"]
+    assert parse_query(question, columns, index)["parameter"] == parameter
+
+
+@pytest.mark.parametrize("question", [
+    "average fluoride per district",
+    "minimum fluoride by year in Kutch",
+    "maximum nitrate for each district",
+    "district-wise average TDS",
+    "yearly average fluoride in Kutch",
+])
+def test_grouping_falls_through(index, question):
+    assert parse_query(question, COLUMNS, index) is None
+
+
+@pytest.mark.parametrize("question", [
+    "average fluoride in Kutch during 2019 and 2021",
+    "average fluoride in Kutch in 2015, 2017 and 2019",
+    "max TDS in 2018 or 2020",
+])
+def test_year_lists_fall_through(index, question):
+    assert parse_query(question, COLUMNS, index) is None
+
+
+@pytest.mark.parametrize("question", [
+    "average fluoride in Kutch from 2015 to 2019",
+    "average fluoride in Kutch 2015-2019",
+    "average fluoride in Kutch between 2019 and 2015",
+])
+def test_year_ranges_are_parsed(index, question):
+    assert parse_query(question, COLUMNS, index)["years"] == (2015, 2019)
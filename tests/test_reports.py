@@ -0,0 +1,70 @@
+import generate_reports
+from app.utils.llm import StubModel
+from app.utils.reports import Checkpoint, plan_jobs, run_reports
+from benchmarks.synthetic import make_groundwater_frame
+
+QUESTIONS = ["Summarize fluoride.", "What should be prioritized?"]
+
+
+def test_job_ids_are_stable_for_the_same_inputs():
+    first = plan_jobs(["Kutch", None], QUESTIONS, "Standard Analysis", "model", "catalog-a", "Gujarat")
+    again = plan_jobs(["Kutch", None], QUESTIONS, "Standard Analysis", "model", "catalog-a", "Gujarat")
+    assert [job["id"] for job in first] == [job["id"] for job in again]
+    assert len({job["id"] for job in first}) == 4
+
+
+def test_new_data_or_states_do_not_resume_old_jobs():
+    base = plan_jobs(["Kutch"], QUESTIONS, "Standard Analysis", "model", "catalog-a", "Gujarat")
+    new_data = plan_jobs(["Kutch"], QUESTIONS, "Standard Analysis", "model", "catalog-b", "Gujarat")
+    other_scope = plan_jobs(["Kutch"], QUESTIONS, "Standard Analysis", "model", "catalog-a", "all")
+    ids = {job["id"] for job in base}
+    assert ids.isdisjoint(job["id"] for job in new_data)
+    assert ids.isdisjoint(job["id"] for job in other_scope)
+
+
+def test_rerun_resumes_only_unfinished_jobs(tmp_path):
+    jobs = plan_jobs(["Kutch", "Surat", "Rajkot"], QUESTIONS[:1], "Standard Analysis", "model", "v1")
+    calls = []
+
+    def work(job, gate):
+        calls.append(job["district"])
+        if job["district"] == "Surat" and calls.count("Surat") == 1:
+            raise ValueError("bad answer")
+        with gate():
+            return {**job, "answer": "ok"}
+
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    first = run_reports(jobs, work, checkpoint, workers=2, retries=0)
+    assert first["completed"] == 2 and len(first["failed"]) == 1
+
+    # A fresh process reading the same checkpoint only runs the failed job
+    second = run_reports(jobs, work, Checkpoint(str(tmp_path / "checkpoint.jsonl")), workers=2, retries=0)
+    assert second["pending"] == 1 and second["completed"] == 1
+    assert sorted(calls) == ["Kutch", "Rajkot", "Surat", "Surat"]
+
+
+def test_partial_checkpoint_line_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('{"id": "a", "answer": "ok"}\n{"id": "b", "ans', encoding="utf-8")
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.done("a") and not checkpoint.done("b")
+    checkpoint.record({"id": "c", "answer": "ok"})
+    assert Checkpoint(str(path)).done("c")
+
+
+def test_stub_run_does_not_poison_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("HYDROAI_STUB_LLM", raising=False)
+    (tmp_path / "data").mkdir()
+    make_groundwater_frame(2_000).to_csv("groundwater.csv", index=False)
+    args = ["--data", "groundwater.csv", "--districts", "Kutch", "--questions", QUESTIONS[0], "--rpm", "0",
+            "--out", "reports", "--format", "json"]
+    assert generate_reports.main(args + ["--stub"]) == 0
+
+    # A real run in the same place must call its model, not reuse stub answers or checkpoints
+    real = StubModel(reply="real answer")
+    monkeypatch.setattr(generate_reports, "get_model", lambda name: real)
+    assert generate_reports.main(args) == 0
+    assert real.calls == 1
+    records = Checkpoint(str(tmp_path / "reports" / "checkpoint.jsonl")).records.values()
+    assert sorted(record["answer"] for record in records)[-1] == "real answer"
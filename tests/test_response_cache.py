@@ -0,0 +1,83 @@
+import sqlite3
+import time
+
+import pytest
+
+from app.utils import response_cache
+from app.utils.llm import StubModel
+from app.utils.response_cache import (
+    MemoryResponseCache, SQLiteResponseCache, build_response_cache, cached_generate, cached_stream, make_cache_key
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    return build_response_cache(request.param, path=str(tmp_path / "responses.sqlite"))
+
+
+def test_cache_key_ignores_case_and_spacing():
+    key = make_cache_key("Average  fluoride in Kutch?", "Standard Analysis", "model", "ctx")
+    assert key == make_cache_key("average fluoride in kutch?", "Standard Analysis", "model", "ctx")
+    assert key != make_cache_key("average fluoride in kutch?", "Predictive Modeling", "model", "ctx")
+    assert key != make_cache_key("average fluoride in kutch?", "Standard Analysis", "model", "other")
+
+
+def test_miss_then_hit(cache):
+    model = StubModel(reply="About 1.2 mg/L.")
+    lookups = []
+    assert cached_generate(model, "prompt", "key", cache, lookups.append) == "About 1.2 mg/L."
+    assert cached_generate(model, "prompt", "key", cache, lookups.append) == "About 1.2 mg/L."
+    assert lookups == [False, True]
+    assert model.calls == 1
+    assert cache.entry_stats("key") == {"hits": 1, "misses": 1}
+
+
+def test_stream_is_cached_once_complete(cache):
+    model = StubModel(reply="Nitrate exceeds the limit.")
+    first = list(cached_stream(model, "prompt", "key", cache))
+    assert "".join(first) == "Nitrate exceeds the limit." and len(first) > 1
+    assert list(cached_stream(model, "prompt", "key", cache)) == ["Nitrate exceeds the limit."]
+    assert model.calls == 1
+
+
+def test_sqlite_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    cached_generate(StubModel(reply="stored"), "prompt", "key", build_response_cache("sqlite", path=path))
+    model = StubModel()
+    assert cached_generate(model, "prompt", "key", build_response_cache("sqlite", path=path)) == "stored"
+    assert model.calls == 0
+
+
+def test_memory_cache_expires_and_evicts(monkeypatch):
+    cache = MemoryResponseCache(max_entries=2, ttl=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.set("c", "3")
+    assert cache.get("a") is None and cache.get("c") == "3"
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("c") is None
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        build_response_cache("layered")
+
+
+def test_sqlite_cache_closes_its_connections(tmp_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(response_cache.sqlite3, "connect", tracking_connect)
+    cache = SQLiteResponseCache(str(tmp_path / "responses.sqlite"))
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    cache.purge_expired()
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.spatial import SpatialIndex, haversine_km
+from app.utils.standards import outside_limits
+
+
+@pytest.fixture(scope="module")
+def wells():
+    rng = np.random.default_rng(3)
+    # Straddles the equator and the prime meridian, so cell indices are negative and positive
+    rows = 3_000
+    return pd.DataFrame({
+        "STN_NAME": [f"W{i}" for i in range(rows)],
+        "DISTRICT": "Test",
+        "LATITUDE": rng.uniform(-2.0, 2.0, rows),
+        "LONGITUDE": rng.uniform(-2.0, 2.0, rows),
+        "F": rng.gamma(2.0, 0.6, rows),
+        "pH": rng.normal(7.6, 0.8, rows),
+    })
+
+
+@pytest.mark.parametrize("lat, lon", [(0.0, 0.0), (-1.3, -0.7), (0.9, -1.6), (-0.05, 0.05)])
+def test_radius_matches_brute_force(wells, lat, lon):
+    index = SpatialIndex(wells, "LATITUDE", "LONGITUDE")
+    found = index.radius(lat, lon, 25)
+    distances = haversine_km(lat, lon, wells["LATITUDE"].to_numpy(), wells["LONGITUDE"].to_numpy())
+    assert sorted(found["station"]) == sorted(wells.loc[distances <= 25, "STN_NAME"])
+
+
+def test_bbox_across_both_meridians(wells):
+    index = SpatialIndex(wells, "LATITUDE", "LONGITUDE")
+    found = index.bbox(-0.5, -0.5, 0.5, 0.5)
+    inside = wells["LATITUDE"].between(-0.5, 0.5) & wells["LONGITUDE"].between(-0.5, 0.5)
+    assert len(found) == int(inside.sum())
+
+
+def test_clusters_keep_western_and_eastern_cells_apart():
+    frame = pd.DataFrame({"LATITUDE": [10.0, 10.0, -10.0], "LONGITUDE": [-0.1, 0.1, -0.1]})
+    clusters = SpatialIndex(frame, "LATITUDE", "LONGITUDE").clusters(cell_degrees=0.25)
+    assert len(clusters) == 3
+
+
+def test_aggregate_counts_exceedances_like_the_standards(wells):
+    index = SpatialIndex(wells, "LATITUDE", "LONGITUDE")
+    ids = index.radius(0.0, 0.0, 50)["well"].to_numpy()
+    stats = index.aggregate(ids, ["F", "pH"])
+    rows = index.rows(ids)
+    assert stats.at["F", "exceed"] == int(outside_limits(rows["F"], "F").sum())
+    # pH has a lower bound too
+    assert stats.at["pH", "exceed"] == int(((rows["pH"] > 8.5) | (rows["pH"] < 6.5)).sum())
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.visualization import FigureCache, build_scatter_figure, lttb_indices
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(3)
+    x = np.sort(rng.uniform(0, 100, 20_000))
+    return x, np.sin(x / 5) + rng.normal(0, 0.1, x.size)
+
+
+def test_lttb_keeps_the_endpoints(points):
+    x, y = points
+    picked = lttb_indices(x, y, 500)
+    assert len(picked) == 500
+    assert picked[0] == 0 and picked[-1] == len(x) - 1
+    assert np.all(np.diff(picked) > 0)
+
+
+@pytest.mark.parametrize("threshold", [20_000, 50_000, 2])
+def test_lttb_passes_small_inputs_through(points, threshold):
+    x, y = points
+    np.testing.assert_array_equal(lttb_indices(x, y, threshold), np.arange(len(x)))
+
+
+def test_lttb_keeps_spikes():
+    x = np.arange(1_000, dtype=float)
+    y = np.zeros_like(x)
+    y[437] = 50.0
+    assert 437 in lttb_indices(x, y, 50)
+
+
+def frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(rows)
+    df = pd.DataFrame({"EC": rng.uniform(100, 3000, rows), "TDS": rng.uniform(50, 2000, rows)})
+    df.loc[::10, "TDS"] = np.nan
+    return df
+
+
+def test_small_selection_draws_every_valid_point():
+    fig = build_scatter_figure(frame(500), "EC", "TDS", "Correlation")
+    assert fig.data[0].type == "scatter" and len(fig.data[0].x) == 450
+    assert "450 samples" in fig.layout.title.text
+
+
+def test_webgl_above_the_threshold():
+    fig = build_scatter_figure(frame(3_000), "EC", "TDS", "Correlation", webgl_threshold=1_000)
+    assert fig.data[0].type == "scattergl" and len(fig.data[0].x) == 2_700
+
+
+def test_large_selection_is_binned_without_dropping_rows():
+    fig = build_scatter_figure(frame(20_000), "EC", "TDS", "Correlation", point_budget=5_000)
+    assert fig.data[0].type == "heatmap"
+    assert np.nansum(np.asarray(fig.data[0].z, dtype=float)) == 18_000
+
+
+def test_large_selection_is_downsampled_with_lttb():
+    fig = build_scatter_figure(frame(20_000), "EC", "TDS", "Correlation", point_budget=2_000, method="lttb")
+    assert len(fig.data[0].x) == 2_000
+    assert "2,000 of 18,000 samples (LTTB)" in fig.layout.title.text
+
+
+def test_figure_cache_builds_once_and_evicts_the_oldest():
+    cache = FigureCache(max_entries=2)
+    builds = []
+
+    def build(name):
+        builds.append(name)
+        return build_scatter_figure(frame(100), "EC", "TDS", name)
+
+    first = cache.get_or_build("a", lambda: build("a"))
+    assert cache.get_or_build("a", lambda: build("a")) is first
+    cache.get_or_build("b", lambda: build("b"))
+    cache.get_or_build("c", lambda: build("c"))
+    cache.get_or_build("a", lambda: build("a"))
+    assert builds == ["a", "b", "c", "a"]
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.wqi import WQIEngine, compute_wqi, wqi_category
+
+# Weights w = 1/S: fluoride 1/1.0, nitrate 1/45, pH 1/8.5 (BIS acceptable limits).
+# Sub-indices q = 100 (V - ideal) / (S - ideal), with |V - 7| for pH.
+W_F, W_NO3, W_PH = 1.0, 1 / 45, 1 / 8.5
+SAMPLES = [
+    # district, F, NO3, pH, expected WQI
+    ("Kutch", 0.5, 45.0, 7.0, (W_F * 50 + W_NO3 * 100 + W_PH * 0) / (W_F + W_NO3 + W_PH)),
+    ("Kutch", 2.0, np.nan, 6.0, (W_F * 200 + W_PH * 100 / 1.5) / (W_F + W_PH)),
+    ("Surat", np.nan, 90.0, np.nan, 200.0),
+    ("Surat", np.nan, np.nan, np.nan, np.nan),
+    (None, 1.0, 0.0, 8.5, (W_F * 100 + W_NO3 * 0 + W_PH * 100) / (W_F + W_NO3 + W_PH)),
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    frame = pd.DataFrame([row[:4] for row in SAMPLES], columns=["DISTRICT", "F", "NO3", "pH"])
+    return WQIEngine(frame)
+
+
+def test_per_sample_wqi_matches_hand_computation(engine):
+    expected = np.array([row[4] for row in SAMPLES])
+    np.testing.assert_allclose(engine.wqi, expected, rtol=1e-6)
+
+
+def test_compute_wqi_drops_unmeasured_parameters():
+    values = np.array([[0.5, np.nan], [np.nan, np.nan]])
+    result = compute_wqi(values, np.array([1.0, 45.0]), np.array([0.0, 0.0]), np.array([False, False]))
+    assert result[0] == pytest.approx(50.0)
+    assert np.isnan(result[1])
+
+
+def test_district_roll_up(engine):
+    kutch = engine.summary("kutch")
+    assert kutch["wqi"] == pytest.approx((SAMPLES[0][4] + SAMPLES[1][4]) / 2, rel=1e-6)
+    assert kutch["samples"] == 2 and kutch["scored"] == 2
+    # The second sample breaches fluoride (2.0 > 1.5) and pH (6.0 < 6.5)
+    assert kutch["unsafe_share"] == 0.5
+    assert kutch["exceedances"] == {"F": 1, "NO3": 0, "pH": 1}
+
+    surat = engine.summary("Surat")
+    assert surat["wqi"] == pytest.approx(200.0) and surat["category"] == "Poor"
+    assert surat["samples"] == 2 and surat["scored"] == 1
+    # Parameters never measured in a district are left out rather than reported as 0
+    assert surat["exceedances"] == {"NO3": 1}
+    assert surat["worst_parameter"] == "NO3"
+
+
+def test_whole_dataset_includes_rows_without_a_district(engine):
+    overall = engine.summary()
+    scored = [row[4] for row in SAMPLES if not np.isnan(row[4])]
+    assert overall["wqi"] == pytest.approx(np.mean(scored), rel=1e-6)
+    assert overall["samples"] == 5 and overall["scored"] == 4
+    assert overall["unsafe_share"] == pytest.approx(2 / 5)
+    assert overall["exceedances"] == {"F": 1, "NO3": 1, "pH": 1}
+    assert engine.summary("Nowhere") is overall
+
+
+def test_limit_override_changes_weights_and_scale():
+    frame = pd.DataFrame({"DISTRICT": ["Kutch"], "F": [0.75]})
+    assert WQIEngine(frame, limits={"F": 1.5}).summary()["wqi"] == pytest.approx(50.0)
+
+
+@pytest.mark.parametrize("value, label", [
+    (50, "Excellent"), (50.1, "Good"), (100, "Good"), (200, "Poor"), (300, "Very Poor"), (301, "Unsuitable"),
+    (float("nan"), "No data"),
+])
+def test_categories(value, label):
+    assert wqi_category(value) == label